@@ -13,6 +13,7 @@ setup(
     package_dir={'': 'src'},
     install_requires=[
         'PyQt6>=6.6.1',
+        'qasync>=0.27.1',
         'PyInstaller>=6.3.0',
         'pyyaml>=6.0.1',
     ],
@@ -38,6 +39,7 @@ setup(
     entry_points={
         'console_scripts': [
             'user-management-app=src.main:main',
+            'user-management-benchmark=benchmarks.auth_benchmark:main',
         ],
     },
 )
\ No newline at end of file
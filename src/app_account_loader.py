@@ -0,0 +1,44 @@
+import time
+import logging
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+class AppAccountLoader(QObject):
+    """
+    Utility class loading the account store while the window renders.
+
+    The auth service is created with `defer_load` and loads on its own
+    thread; `ready` is emitted on the GUI thread once it is done, so the
+    window and the form pages can leave their pending state. Store calls
+    made before then wait in the worker threads, never on the GUI thread.
+    """
+    # None, or the exception that stopped loading
+    ready = pyqtSignal(object)
+
+    # Emitted from the loading thread, delivered queued on the GUI thread
+    _loaded = pyqtSignal(object)
+
+    def __init__(self, auth_service):
+        super().__init__()
+        self.auth_service = auth_service
+        self.logger = logging.getLogger(__name__)
+        self.is_ready = auth_service.ready.is_set()
+        self.error = auth_service.load_error
+        self._started = None
+        self._loaded.connect(self._on_loaded)
+
+    def start(self):
+        """Start loading; `ready` is emitted even if the accounts are already loaded."""
+        self._started = time.perf_counter()
+        self.auth_service.start_loading(self._loaded.emit)
+
+    def _on_loaded(self, error):
+        """Record the outcome on the GUI thread and announce it."""
+        self.is_ready = True
+        self.error = error
+        if self._started is not None:
+            self.logger.info(
+                "Accounts ready %.1f ms after the window started loading them",
+                (time.perf_counter() - self._started) * 1000
+            )
+        self.ready.emit(error)
@@ -0,0 +1,50 @@
+import asyncio
+import logging
+import qasync
+
+# Tasks started from Qt slots; referenced here so they are not garbage collected
+_pending_tasks = set()
+
+
+def _task_done(task):
+    _pending_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logging.getLogger(__name__).error(
+            "Unhandled error in %s", task.get_coro().__qualname__, exc_info=task.exception()
+        )
+
+
+def run_async(coro):
+    """
+    Start a coroutine from a Qt slot on the application's asyncio loop
+
+    Args:
+        coro: Coroutine to run
+
+    Returns:
+        asyncio.Task: The running task
+    """
+    task = asyncio.get_event_loop().create_task(coro)
+    _pending_tasks.add(task)
+    task.add_done_callback(_task_done)
+    return task
+
+
+class AppAsyncUtil:
+    """
+    Utility class running one asyncio loop together with the Qt event loop.
+
+    qasync's QEventLoop makes Qt's loop the asyncio loop, so the pages'
+    submit coroutines run on the GUI thread without polling.
+    """
+    def __init__(self, app):
+        self.app = app
+        self.logger = logging.getLogger(__name__)
+        self.loop = qasync.QEventLoop(app)
+        asyncio.set_event_loop(self.loop)
+
+    def exec(self):
+        """Run the application until it quits and return its exit code."""
+        with self.loop:
+            self.loop.run_forever()
+        return 0
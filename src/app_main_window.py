@@ -8,31 +8,30 @@ from PyQt6.QtWidgets import (
     QWidget,
     QMessageBox,
     QInputDialog,
-    QApplication
+    QApplication,
+    QProgressBar
 )
 from src.app_signal_util import AppSignalUtil
 from src.app_screen_util import AppScreenUtil
+from src.app_store_watcher import AppStoreWatcher
+from src.app_page_registry import AppPageRegistry
+from src.app_account_loader import AppAccountLoader
 
-# Import pages
-from src.pages.home_page import HomePage
-from src.pages.about_page import AboutPage
-from src.pages.login_page import LoginPage
-from src.pages.register_page import RegisterPage
-from src.pages.profile_page import ProfilePage
-
-# Importauth service
+# Importauth service and settings
 from auth.auth_service import AuthService
+from auth.lazy_import import lazy_factory
+from config.application_settings import ApplicationSettings
 
 # Import navigation menu
 from src.ui.navigation_menu import NavigationMenuBar
 
-# OS-specific imports
-if platform.system() == 'Windows':
-    import pywin32
-elif platform.system() == 'Darwin':
-    import dmgbuild
-elif platform.system() == 'Linux':
-    import appimagetool
+# Page modules are imported when their page is first built; platform
+# packaging tools (pywin32, dmgbuild, appimagetool) belong to src.packaging
+HomePage = lazy_factory('src.pages.home_page', 'HomePage')
+AboutPage = lazy_factory('src.pages.about_page', 'AboutPage')
+LoginPage = lazy_factory('src.pages.login_page', 'LoginPage')
+RegisterPage = lazy_factory('src.pages.register_page', 'RegisterPage')
+ProfilePage = lazy_factory('src.pages.profile_page', 'ProfilePage')
 
 class AppMainWindow(QMainWindow):
     """
@@ -47,8 +46,38 @@ class AppMainWindow(QMainWindow):
         # Setup logging
         self.logger = logging.getLogger(__name__)
         
-        # Initializeauth service
-        self.auth_service = AuthService()
+        # Initializeauth service with the configured storage engine
+        self.settings = ApplicationSettings()
+        background_load = self.settings.get('ui.background_load', True)
+        self.auth_service = AuthService(
+            storage_path=self.settings.get('database.path', 'accounts.json'),
+            max_login_attempts=self.settings.get('authentication.max_login_attempts', 5),
+            storage_type=self.settings.get('database.type', 'json'),
+            storage_options=self.settings.get('database', {}),
+            lockout_options=self.settings.get('authentication.lockout', {}),
+            hashing_options=self.settings.get('authentication.password_hashing', {}),
+            rate_limit_options=self.settings.get('authentication.rate_limit', {}),
+            backup_options=self.settings.get('database.backup', {}),
+            metrics_options=self.settings.get('metrics', {}),
+            policy_options=dict(
+                self.settings.get('authentication.password_policy', {}),
+                min_length=self.settings.get('authentication.password_min_length', 8)
+            ),
+            defer_load=background_load
+        )
+
+        # Load the accounts while the window is built and painted
+        self.account_loader = AppAccountLoader(self.auth_service)
+        self.account_loader.ready.connect(self._on_accounts_ready)
+        if background_load:
+            self.account_loader.start()
+        
+        # Merge account changes saved by other instances sharing the store
+        self.store_watcher = None
+        if self.settings.get('database.shared', False):
+            self.store_watcher = AppStoreWatcher(
+                self.auth_service, self.settings.get('database.watch_debounce_ms', 250)
+            )
         
         # Configure main window
         self.setWindowTitle("User Management Application")
@@ -67,8 +96,14 @@ class AppMainWindow(QMainWindow):
         self.stacked_widget = QStackedWidget()
         main_layout.addWidget(self.stacked_widget)
         
-        # Create pages
+        # Lightweight ready indicator while the accounts load
+        self.loading_indicator = None
+        if not self.account_loader.is_ready:
+            self._show_loading_indicator()
+
+        # Register pages; each is built when first shown or prewarmed after the first paint
         self._create_pages()
+        self._first_paint_done = False
         
         # Setup menu connections
         self._setup_menu_connections()
@@ -84,22 +119,79 @@ class AppMainWindow(QMainWindow):
         
         self.logger.info("Main window initialized successfully")
     
+    def paintEvent(self, event):
+        """
+        Start prewarming likely next pages once the window has painted
+        """
+        super().paintEvent(event)
+        if not self._first_paint_done:
+            self._first_paint_done = True
+            if self.settings.get('ui.prewarm_pages', True):
+                self.pages.start_prewarming(self.current_page)
+
+    def closeEvent(self, event):
+        """
+        Persist lockout state and close the account store on exit
+        """
+        self.auth_service.close()
+        super().closeEvent(event)
+    
+    def _show_loading_indicator(self):
+        """
+        Show a busy indicator in the status bar until the accounts are loaded
+        """
+        self.loading_indicator = QProgressBar()
+        self.loading_indicator.setRange(0, 0)
+        self.loading_indicator.setMaximumWidth(120)
+        self.statusBar().addPermanentWidget(self.loading_indicator)
+        self.statusBar().showMessage("Loading accounts…")
+
+    def _on_accounts_ready(self, error):
+        """
+        Clear the loading indicator, or report why the accounts failed to load
+
+        Args:
+            error (Exception or None): What stopped loading, if anything
+        """
+        if self.loading_indicator is not None:
+            self.statusBar().removeWidget(self.loading_indicator)
+            self.loading_indicator.deleteLater()
+            self.loading_indicator = None
+        if error is not None:
+            self.statusBar().showMessage("Accounts could not be loaded")
+            QMessageBox.critical(self, "Accounts", f"Accounts could not be loaded: {error}")
+        else:
+            self.statusBar().showMessage("Accounts loaded", 5000)
+
     def _create_pages(self):
         """
-        Create and add pages to the stacked widget
+        Register page factories; pages are added to the stacked widget when built
         """
-        # Create page instances
-        self.pages = {
-            'home': HomePage(),
-            'about': AboutPage(),
-            'login': LoginPage(self.auth_service),
-            'register': RegisterPage(self.auth_service),
-            'profile': ProfilePage(self.auth_service)
-        }
-        
-        # Add pages to stacked widget
-        for page in self.pages.values():
-            self.stacked_widget.addWidget(page)
+        # Bound how long a form waits for its auth call
+        timeout = self.settings.get('authentication.request_timeout_seconds', 30)
+
+        def form_page(page_class):
+            def build():
+                page = page_class(self.auth_service)
+                page.submit_timeout = timeout
+                # Pending until the accounts are loaded; submissions wait in a queue
+                if not self.account_loader.is_ready:
+                    page.set_store_ready(False)
+                    self.account_loader.ready.connect(lambda error: page.set_store_ready(True, error))
+                elif self.account_loader.error is not None:
+                    page.set_store_ready(True, self.account_loader.error)
+                return page
+            return build
+
+        self.pages = AppPageRegistry(
+            self.stacked_widget, self.settings.get('ui.prewarm_delay_ms', 50)
+        )
+        self.pages.register('home', HomePage, likely_next=('login', 'register'))
+        self.pages.register('about', AboutPage)
+        self.pages.register('login', form_page(LoginPage), likely_next=('profile', 'register'))
+        self.pages.register('register', form_page(RegisterPage), likely_next=('login',))
+        self.pages.register('profile', form_page(ProfilePage))
+        self.current_page = None
     
     def _setup_menu_connections(self):
         """
@@ -129,9 +221,11 @@ class AppMainWindow(QMainWindow):
         try:
             page = self.pages[page_name]
             self.stacked_widget.setCurrentWidget(page)
-            self.logger.info(f"Switched to {page_name} page")
+            self.current_page = page_name
+            self.pages.prewarm_after(page_name)
+            self.logger.info("Switched to %s page", page_name)
         except Exception as e:
-            self.logger.error(f"Error switching to page {page_name}: {e}")
+            self.logger.error("Error switching to page %s: %s", page_name, e)
     
     def show_home_page(self):
         """Show home page"""
@@ -0,0 +1,102 @@
+import time
+import logging
+from PyQt6.QtCore import QTimer
+
+
+class AppPageRegistry:
+    """
+    Utility class building pages on first use.
+
+    Pages are registered as factories and built the first time they are
+    looked up, then added to the stacked widget, so the first paint only
+    waits for the page shown at startup. Once prewarming is started
+    (after the first paint), the pages likely to be opened next from the
+    current one are built in the background, one per timer slice, so
+    input events are handled between builds.
+    """
+    def __init__(self, stacked_widget, prewarm_delay_ms=50):
+        """
+        Initialize an empty registry
+
+        Args:
+            stacked_widget (QStackedWidget): Widget the built pages are added to
+            prewarm_delay_ms (int): Delay between prewarmed page builds
+        """
+        self.stacked_widget = stacked_widget
+        self.logger = logging.getLogger(__name__)
+        self.factories = {}
+        self.likely_next = {}
+        self.built = {}
+
+        self.prewarming = False
+        self._queue = []
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(prewarm_delay_ms)
+        self.timer.timeout.connect(self._prewarm_one)
+
+    def register(self, name, factory, likely_next=()):
+        """
+        Register a page
+
+        Args:
+            name (str): Page name
+            factory (callable): Builds the page widget
+            likely_next (iterable): Pages to prewarm once this one is shown
+        """
+        self.factories[name] = factory
+        self.likely_next[name] = tuple(likely_next)
+
+    def __contains__(self, name):
+        return name in self.factories
+
+    def __getitem__(self, name):
+        """
+        The named page, built on first access
+
+        Raises:
+            KeyError: If no page is registered under the name
+        """
+        page = self.built.get(name)
+        if page is None:
+            started = time.perf_counter()
+            page = self.factories[name]()
+            self.stacked_widget.addWidget(page)
+            self.built[name] = page
+            self.logger.info("Built %s page in %.1f ms", name, (time.perf_counter() - started) * 1000)
+        return page
+
+    def start_prewarming(self, current):
+        """
+        Allow background builds from now on, starting with the pages likely after `current`
+
+        Args:
+            current (str): Name of the page on screen
+        """
+        self.prewarming = True
+        self.prewarm_after(current)
+
+    def prewarm_after(self, name):
+        """
+        Queue the unbuilt pages likely to follow a page
+
+        Args:
+            name (str): Page just shown
+        """
+        if not self.prewarming:
+            return
+        for candidate in self.likely_next.get(name, ()):
+            if candidate not in self.built and candidate not in self._queue:
+                self._queue.append(candidate)
+        if self._queue and not self.timer.isActive():
+            self.timer.start()
+
+    def _prewarm_one(self):
+        """Build the next queued page, then wait a slice before the one after."""
+        while self._queue:
+            name = self._queue.pop(0)
+            if name not in self.built:
+                self[name]
+                break
+        if self._queue:
+            self.timer.start()
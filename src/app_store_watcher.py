@@ -0,0 +1,70 @@
+import os
+import logging
+from PyQt6.QtCore import QFileSystemWatcher, QThreadPool, QTimer
+
+
+class AppStoreWatcher:
+    """
+    Utility class merging account changes saved by other app instances.
+
+    A QFileSystemWatcher (inotify on Linux) watches the account file, its
+    journal or shard manifest, and their directories. Atomic saves replace the watched file, so
+    the paths are re-added after every event. Bursts of events collapse
+    into one refresh after `debounce_ms`, and the refresh runs on the
+    global thread pool so a large merge never blocks the GUI; refreshes
+    after our own saves find an unchanged fingerprint and return at once.
+    """
+    def __init__(self, auth_service, debounce_ms=250):
+        self.auth_service = auth_service
+        self.logger = logging.getLogger(__name__)
+
+        store = auth_service.store
+        self.paths = [
+            os.path.abspath(path)
+            for path in (
+                store.storage_path,
+                getattr(store, 'journal_path', None),
+                getattr(store, 'manifest_path', None),
+            )
+            if path
+        ]
+        self.directories = sorted({os.path.dirname(path) for path in self.paths})
+
+        self.timer = QTimer()
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce_ms)
+        self.timer.timeout.connect(self._refresh)
+
+        self.watcher = QFileSystemWatcher()
+        self.watcher.fileChanged.connect(self._schedule)
+        self.watcher.directoryChanged.connect(self._schedule)
+        self._watch()
+
+    def _watch(self):
+        """Watch every path that exists and is not watched yet."""
+        watched = set(self.watcher.files()) | set(self.watcher.directories())
+        missing = [
+            path for path in self.paths + self.directories
+            if path not in watched and os.path.exists(path)
+        ]
+        if missing:
+            self.watcher.addPaths(missing)
+
+    def _schedule(self, path):
+        """Restart the debounce timer for a change event."""
+        self.timer.start()
+
+    def _refresh(self):
+        """Re-arm the watcher and merge the changes off the GUI thread."""
+        self._watch()
+        # Nothing to merge into when the accounts failed to load
+        if self.auth_service.load_error is not None:
+            return
+        QThreadPool.globalInstance().start(self._merge)
+
+    def _merge(self):
+        """Merge the changes on a pool thread, logging failures."""
+        try:
+            self.auth_service.refresh_accounts()
+        except Exception as e:
+            self.logger.error("Error merging account changes: %s", e)
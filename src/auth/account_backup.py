@@ -0,0 +1,241 @@
+import os
+import sys
+import json
+import logging
+import threading
+from datetime import datetime
+
+from .account_codec import AccountCodec, decode_accounts
+from .atomic_file import atomic_write, check_durability
+from .secondary_index import time_key
+
+MANIFEST_VERSION = 1
+
+
+class AccountBackup:
+    """
+    Incremental backups of an account store with a retention chain.
+
+    Each backup captures the store (AccountStore.capture) without stopping
+    writers. A full backup writes every record; a delta writes only the
+    records whose version changed since the previous backup, with deleted
+    accounts stored as null, so backup I/O follows the write rate rather
+    than the store size. A chain is one full backup and the deltas after
+    it; a new chain starts after `max_deltas` deltas, whenever the store
+    cannot say what changed (e.g. after a restart), and on request.
+    The newest `keep_chains` chains are kept.
+
+    `manifest.json` in the backup directory lists every backup in order,
+    with its creation time, and the capture token of the newest. Backup
+    files and the manifest are written atomically, the files first, so a
+    crash leaves at most an unreferenced file behind.
+
+    Restoring replays one full backup and at most `max_deltas` deltas.
+    """
+
+    def __init__(
+        self,
+        store,
+        directory,
+        max_deltas=24,
+        keep_chains=2,
+        serializer="json",
+        compression="gzip",
+        durability="flush",
+    ):
+        """
+        Initialize the backup engine
+
+        Args:
+            store (AccountStore): Loaded store to back up, or None to only restore
+            directory (str): Backup directory, created on first backup
+            max_deltas (int): Deltas after which the next backup is full
+            keep_chains (int): Full backups, with their deltas, to keep
+            serializer (str): Serializer of backup files, see AccountCodec
+            compression (str): Compression of backup files, see AccountCodec
+            durability (str): "none", "flush", "fsync" or "fsync+dir"
+        """
+        self.logger = logging.getLogger(__name__)
+        self.store = store
+        self.directory = directory
+        self.manifest_path = os.path.join(directory, "manifest.json")
+        self.max_deltas = max_deltas
+        self.keep_chains = max(1, keep_chains)
+        self.durability = check_durability(durability)
+        self.codec = AccountCodec(serializer, compression)
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _read_manifest(self):
+        """
+        Returns:
+            dict: Manifest contents, empty for a new backup directory
+        """
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return {"version": MANIFEST_VERSION, "token": None, "backups": []}
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported backup manifest version: {manifest.get('version')}")
+        return manifest
+
+    def backups(self):
+        """
+        List the retained backups, oldest first
+
+        Returns:
+            list: Dicts with id, kind ("full" or "delta"), file, created_at and records
+        """
+        return self._read_manifest()["backups"]
+
+    def backup(self, full=False):
+        """
+        Take a backup now
+
+        Args:
+            full (bool): Start a new chain even if a delta would do
+
+        Returns:
+            dict or None: Manifest entry of the new backup, or None if nothing changed
+        """
+        with self._lock:
+            manifest = self._read_manifest()
+            backups = manifest["backups"]
+            deltas = 0
+            for entry in reversed(backups):
+                if entry["kind"] == "full":
+                    break
+                deltas += 1
+            incremental = backups and not full and deltas < self.max_deltas
+
+            token, records, complete = self.store.capture(manifest["token"] if incremental else None)
+            if not complete and not records:
+                return None
+            if not isinstance(records, dict):
+                records = {email: dict(account) for email, account in records.items()}
+
+            number = backups[-1]["id"] + 1 if backups else 1
+            kind = "full" if complete else "delta"
+            entry = {
+                "id": number,
+                "kind": kind,
+                "file": f"{number:06d}-{kind}.backup",
+                "created_at": datetime.now().isoformat(),
+                "records": len(records),
+            }
+            os.makedirs(self.directory, exist_ok=True)
+            atomic_write(os.path.join(self.directory, entry["file"]), self.codec.encode(records), self.durability)
+
+            backups.append(entry)
+            removed = self._expired(backups) if complete else []
+            manifest["backups"] = backups[len(removed):]
+            manifest["token"] = token
+            atomic_write(self.manifest_path, json.dumps(manifest, indent=2), self.durability)
+            for old in removed:
+                os.remove(os.path.join(self.directory, old["file"]))
+
+        self.logger.info("Backed up %s accounts (%s backup %s)", entry['records'], kind, number)
+        return entry
+
+    def _expired(self, backups):
+        """
+        Oldest entries falling outside the retained chains
+
+        Returns:
+            list: Leading entries of `backups` to delete
+        """
+        fulls = [position for position, entry in enumerate(backups) if entry["kind"] == "full"]
+        if len(fulls) <= self.keep_chains:
+            return []
+        return backups[:fulls[-self.keep_chains]]
+
+    def restore(self, at=None, path=None):
+        """
+        Rebuild the accounts as of a backup
+
+        Args:
+            at (str or datetime, optional): Point in time; the newest backup
+                taken at or before it is restored, the newest overall if None
+            path (str, optional): Also write the accounts as a plain JSON store file
+
+        Returns:
+            dict: Account records keyed by email
+
+        Raises:
+            ValueError: If no retained backup is old enough
+        """
+        backups = self.backups()
+        if at is not None:
+            limit = time_key(at)
+            backups = [entry for entry in backups if time_key(entry["created_at"]) <= limit]
+        if not backups:
+            raise ValueError(f"No backup to restore at {at}")
+
+        start = max(position for position, entry in enumerate(backups) if entry["kind"] == "full")
+        accounts = {}
+        for entry in backups[start:]:
+            with open(os.path.join(self.directory, entry["file"]), "rb") as f:
+                records = decode_accounts(f.read())
+            for email, account in records.items():
+                if account is None:
+                    accounts.pop(email, None)
+                else:
+                    accounts[email] = account
+
+        if path is not None:
+            atomic_write(path, AccountCodec().encode(accounts), self.durability)
+        self.logger.info("Restored %s accounts from backup %s", len(accounts), backups[-1]['id'])
+        return accounts
+
+    def start(self, interval):
+        """
+        Take a backup every `interval` seconds on a background thread
+
+        Args:
+            interval (float): Seconds between backups
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(interval,), name="account-backup", daemon=True)
+        self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.backup()
+            except (OSError, ValueError) as e:
+                self.logger.error("Account backup failed: %s", e)
+
+    def close(self):
+        """
+        Stop the background thread
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main():
+    """
+    List or restore backups:
+    python -m auth.account_backup DIRECTORY [OUTPUT [AT]]
+    """
+    if len(sys.argv) not in (2, 3, 4):
+        print("Usage: python -m auth.account_backup BACKUP_DIRECTORY [OUTPUT_PATH [ISO_TIME]]")
+        sys.exit(2)
+    backup = AccountBackup(None, sys.argv[1])
+    if len(sys.argv) == 2:
+        for entry in backup.backups():
+            print(f"{entry['id']:6}  {entry['kind']:5}  {entry['created_at']}  {entry['records']} accounts")
+        return
+    accounts = backup.restore(sys.argv[3] if len(sys.argv) == 4 else None, sys.argv[2])
+    print(f"Restored {len(accounts)} accounts to {sys.argv[2]}")
+
+
+if __name__ == '__main__':
+    main()
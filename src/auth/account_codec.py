@@ -0,0 +1,172 @@
+import gzip
+import json
+import logging
+
+from .lazy_import import optional_module
+
+# Optional packages, imported when a configuration first uses them
+orjson = optional_module("orjson")
+msgpack = optional_module("msgpack")
+zstandard = optional_module("zstandard")
+
+# A NUL byte can never start a JSON document, so headered files are told
+# apart from plain JSON (including files written before this header) by
+# their first byte
+MAGIC = b"\x00ACS"
+HEADER_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 3
+
+SERIALIZERS = ("json", "orjson", "msgpack")
+COMPRESSIONS = ("none", "gzip", "zstd")
+
+# On-disk ids: orjson writes JSON, so both JSON serializers share one
+ENCODING_IDS = {"json": 1, "orjson": 1, "msgpack": 2}
+COMPRESSION_IDS = {"none": 0, "gzip": 1, "zstd": 2}
+
+
+def is_encoded(path):
+    """
+    Whether a storage file starts with the codec header
+
+    Args:
+        path (str): Storage file
+
+    Returns:
+        bool: True for headered files, False for plain JSON or a missing file
+    """
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except FileNotFoundError:
+        return False
+
+
+def _loads_json(data):
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def _decompress(compression_id, data):
+    if compression_id == COMPRESSION_IDS["none"]:
+        return data
+    if compression_id == COMPRESSION_IDS["gzip"]:
+        return gzip.decompress(data)
+    if compression_id == COMPRESSION_IDS["zstd"]:
+        if zstandard is None:
+            raise ImportError("Reading this account file needs the zstandard package")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown account file compression: {compression_id}")
+
+
+def decode_accounts(data):
+    """
+    Decode a storage file, detecting its format from the header
+
+    Args:
+        data (bytes): File contents
+
+    Returns:
+        dict: Account records keyed by email
+
+    Raises:
+        ValueError: If the contents are corrupt or of an unknown format
+        ImportError: If the file needs a codec package that is not installed
+    """
+    if not data.startswith(MAGIC):
+        return _loads_json(data)
+
+    version, encoding_id, compression_id = data[len(MAGIC):HEADER_SIZE]
+    if version != HEADER_VERSION:
+        raise ValueError(f"Unsupported account file version: {version}")
+    payload = _decompress(compression_id, data[HEADER_SIZE:])
+    if encoding_id == ENCODING_IDS["json"]:
+        return _loads_json(payload)
+    if encoding_id == ENCODING_IDS["msgpack"]:
+        if msgpack is None:
+            raise ImportError("Reading this account file needs the msgpack package")
+        return msgpack.unpackb(payload, raw=False)
+    raise ValueError(f"Unknown account file encoding: {encoding_id}")
+
+
+class AccountCodec:
+    """
+    Serializer and compression for account snapshots, chosen from config.
+
+    Plain JSON is written compactly and without a header, so it stays
+    readable by the streaming loaders, older versions and other tools.
+    Any other combination gets a header (MAGIC, version, encoding,
+    compression) that decode_accounts uses to pick the reader, so the
+    configured format can change at any time. Optional packages (orjson,
+    msgpack, zstandard) fall back to the stdlib with a warning.
+    """
+
+    def __init__(self, serializer="json", compression="none", level=None):
+        """
+        Initialize the codec
+
+        Args:
+            serializer (str): "json", "orjson" or "msgpack"
+            compression (str): "none", "gzip" or "zstd"
+            level (int, optional): Compression level; 6 for gzip and 3 for zstd if None
+
+        Raises:
+            ValueError: If the serializer or compression is unknown
+        """
+        self.logger = logging.getLogger(__name__)
+        if serializer not in SERIALIZERS:
+            raise ValueError(f"Unknown account serializer: {serializer}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unknown account compression: {compression}")
+
+        if serializer == "orjson" and orjson is None:
+            self.logger.warning("orjson is not installed; writing accounts with the json module")
+            serializer = "json"
+        if serializer == "msgpack" and msgpack is None:
+            self.logger.warning("msgpack is not installed; writing accounts as JSON")
+            serializer = "json"
+        if compression == "zstd" and zstandard is None:
+            self.logger.warning("zstandard is not installed; compressing accounts with gzip")
+            compression = "gzip"
+
+        self.serializer = serializer
+        self.compression = compression
+        self.level = level
+
+    @property
+    def plain(self):
+        """
+        Whether files are headerless JSON, the format the streaming loaders read
+        """
+        return ENCODING_IDS[self.serializer] == ENCODING_IDS["json"] and self.compression == "none"
+
+    def _serialize(self, accounts):
+        if self.serializer == "orjson":
+            return orjson.dumps(accounts)
+        if self.serializer == "msgpack":
+            return msgpack.packb(accounts, use_bin_type=True)
+        return json.dumps(accounts, separators=(",", ":")).encode("ascii")
+
+    def _compress(self, data):
+        if self.compression == "gzip":
+            return gzip.compress(data, compresslevel=6 if self.level is None else self.level, mtime=0)
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=3 if self.level is None else self.level).compress(data)
+        return data
+
+    def encode(self, accounts):
+        """
+        Encode accounts as the contents of a storage file
+
+        Args:
+            accounts (Mapping): Account records keyed by email
+
+        Returns:
+            bytes: File contents
+        """
+        data = self._serialize(accounts)
+        if self.plain:
+            return data
+        header = MAGIC + bytes(
+            (HEADER_VERSION, ENCODING_IDS[self.serializer], COMPRESSION_IDS[self.compression])
+        )
+        return header + self._compress(data)
+
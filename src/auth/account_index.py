@@ -0,0 +1,479 @@
+import os
+import json
+import mmap
+import struct
+import hashlib
+from collections.abc import MutableMapping
+
+from .account_stream import AccountOffsets, decode_key, iter_member_spans
+from .atomic_file import atomic_open
+
+# How many bytes from each end of the JSON file go into its fingerprint
+SAMPLE_SIZE = 64 * 1024
+
+
+def encode_record(account):
+    """
+    Encode an account record the way `json.dump(accounts, indent=4)` nests it
+
+    Args:
+        account (dict): Account record
+
+    Returns:
+        bytes: ASCII JSON for the record
+    """
+    return json.dumps(account, indent=4).replace("\n", "\n    ").encode("ascii")
+
+
+def file_fingerprint(path):
+    """
+    Cheap fingerprint of a file: size, mtime and a hash of its head and tail
+
+    Args:
+        path (str): File to fingerprint
+
+    Returns:
+        tuple: (size, mtime_ns, digest)
+    """
+    stat = os.stat(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        digest.update(f.read(SAMPLE_SIZE))
+        if stat.st_size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, stat.st_size - SAMPLE_SIZE))
+            digest.update(f.read())
+    return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+
+def email_hash(email):
+    """
+    Stable non-zero 64-bit hash of an email
+
+    Args:
+        email (str): Email to hash
+
+    Returns:
+        int: Hash value (0 marks an empty table slot)
+    """
+    value = int.from_bytes(
+        hashlib.blake2b(email.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+    return value or 1
+
+
+class AccountIndex:
+    """
+    Memory-mapped sidecar index over an accounts JSON file.
+
+    Layout (little endian):
+        header   magic, JSON size, JSON mtime_ns, JSON sample digest,
+                 record count, table slot count
+        records  one fixed-size entry per account, in file order:
+                 key offset, value offset, key length, value length
+        table    open-addressing hash table of (email hash, record number + 1)
+
+    Both the index and the JSON file are mapped read-only, so a lookup
+    only touches the table slot, its record entry and the account's bytes.
+    """
+
+    MAGIC = b"ACCTIDX1"
+    HEADER = struct.Struct("<8sQQ16sQQ")
+    RECORD = struct.Struct("<QQII")
+    SLOT = struct.Struct("<QQ")
+
+    def __init__(self, json_path, index_path):
+        """
+        Map an index and its JSON file
+
+        Args:
+            json_path (str): Accounts JSON file
+            index_path (str): Sidecar index file
+
+        Raises:
+            ValueError: If the index is corrupt or does not match the JSON file
+            OSError: If either file cannot be opened
+        """
+        self.json_path = json_path
+        self.index_path = index_path
+
+        with open(index_path, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, size, mtime_ns, digest, self.count, self.slots = self.HEADER.unpack_from(self._index)
+            if magic != self.MAGIC:
+                raise ValueError("Not an account index")
+            expected = self.HEADER.size + self.count * self.RECORD.size + self.slots * self.SLOT.size
+            if len(self._index) != expected:
+                raise ValueError("Truncated account index")
+            if (size, mtime_ns, digest) != file_fingerprint(json_path):
+                raise ValueError("Account index is stale")
+
+            with open(json_path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self._index.close()
+            raise
+
+        self._table_offset = self.HEADER.size + self.count * self.RECORD.size
+
+    def close(self):
+        """
+        Unmap both files
+        """
+        self._index.close()
+        self._data.close()
+
+    def __len__(self):
+        return self.count
+
+    def _record(self, number):
+        """
+        Read one record entry
+
+        Args:
+            number (int): Record number
+
+        Returns:
+            tuple: (key_offset, value_offset, key_length, value_length)
+        """
+        return self.RECORD.unpack_from(self._index, self.HEADER.size + number * self.RECORD.size)
+
+    def _find(self, email):
+        """
+        Find the record entry for an email
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            tuple or None: Record entry, or None if the email is not indexed
+        """
+        if not self.slots:
+            return None
+        target = email_hash(email)
+        mask = self.slots - 1
+        slot = target & mask
+        while True:
+            stored_hash, number = self.SLOT.unpack_from(self._index, self._table_offset + slot * self.SLOT.size)
+            if stored_hash == 0:
+                return None
+            if stored_hash == target:
+                record = self._record(number - 1)
+                key_offset, _, key_length, _ = record
+                if decode_key(self._data[key_offset:key_offset + key_length]) == email:
+                    return record
+            slot = (slot + 1) & mask
+
+    def __contains__(self, email):
+        return self._find(email) is not None
+
+    def raw_value(self, email):
+        """
+        Raw JSON bytes of an account
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            bytes or None: Encoded account record, or None if not indexed
+        """
+        record = self._find(email)
+        if record is None:
+            return None
+        _, value_offset, _, value_length = record
+        return self._data[value_offset:value_offset + value_length]
+
+    def get(self, email):
+        """
+        Parse a single account from the JSON file
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            dict or None: Account record, or None if not indexed
+        """
+        raw = self.raw_value(email)
+        return None if raw is None else json.loads(raw)
+
+    def raw_items(self):
+        """
+        Iterate over (email, raw JSON bytes) in file order
+
+        Yields:
+            tuple: (email, bytes)
+        """
+        records = self._index[self.HEADER.size:self._table_offset]
+        data = self._data
+        for key_offset, value_offset, key_length, value_length in self.RECORD.iter_unpack(records):
+            yield decode_key(data[key_offset:key_offset + key_length]), data[value_offset:value_offset + value_length]
+
+    def __iter__(self):
+        for email, _ in self.raw_items():
+            yield email
+
+    @classmethod
+    def write(cls, json_path, index_path, spans, durability="flush"):
+        """
+        Write the sidecar index for a JSON file
+
+        Args:
+            json_path (str): Accounts JSON file the spans refer to
+            index_path (str): Sidecar index file to write
+            spans (list): (email, key_offset, key_length, value_offset, value_length) per account
+            durability (str): One of DURABILITY_LEVELS
+        """
+        slots = 1
+        while slots < len(spans) * 2:
+            slots *= 2
+        mask = slots - 1
+
+        table = bytearray(slots * cls.SLOT.size)
+        occupied = bytearray(slots)
+        records = bytearray(len(spans) * cls.RECORD.size)
+        for number, (email, key_offset, key_length, value_offset, value_length) in enumerate(spans):
+            cls.RECORD.pack_into(
+                records, number * cls.RECORD.size, key_offset, value_offset, key_length, value_length
+            )
+            hashed = email_hash(email)
+            slot = hashed & mask
+            while occupied[slot]:
+                slot = (slot + 1) & mask
+            occupied[slot] = 1
+            cls.SLOT.pack_into(table, slot * cls.SLOT.size, hashed, number + 1)
+
+        size, mtime_ns, digest = file_fingerprint(json_path)
+        with atomic_open(index_path, "wb", durability) as f:
+            f.write(cls.HEADER.pack(cls.MAGIC, size, mtime_ns, digest, len(spans), slots))
+            f.write(records)
+            f.write(table)
+
+    @classmethod
+    def build(cls, json_path, index_path, durability="flush"):
+        """
+        Scan an existing JSON file and write its index
+
+        Args:
+            json_path (str): Accounts JSON file
+            index_path (str): Sidecar index file to write
+            durability (str): One of DURABILITY_LEVELS
+
+        Returns:
+            int: Number of accounts indexed
+
+        Raises:
+            ValueError: If the file is not a JSON object
+        """
+        with open(json_path, "rb") as f:
+            spans = list(iter_member_spans(f))
+        cls.write(json_path, index_path, spans, durability)
+        return len(spans)
+
+
+class IndexedAccounts(MutableMapping):
+    """
+    Dict-like accounts backed by an AccountIndex or AccountOffsets.
+
+    Accounts are parsed from the mapped JSON file on first access and kept
+    in an overlay together with every change made since the last save;
+    deletions are remembered until the next snapshot drops them. Records
+    in the overlay are replaced, never mutated, so a shallow snapshot is
+    consistent.
+    """
+
+    def __init__(self, index=None):
+        """
+        Initialize the indexed accounts
+
+        Args:
+            index (AccountIndex or AccountOffsets, optional): Index of the current JSON file
+        """
+        self.index = index
+        self.overlay = {}
+        self.deleted = set()
+        self._count = len(index) if index is not None else 0
+
+    def _in_index(self, email):
+        return self.index is not None and email in self.index
+
+    def __getitem__(self, email):
+        account = self.overlay.get(email)
+        if account is not None:
+            return account
+        if email in self.deleted or self.index is None:
+            raise KeyError(email)
+        account = self.index.get(email)
+        if account is None:
+            raise KeyError(email)
+        self.overlay[email] = account
+        return account
+
+    def peek(self, email):
+        """
+        Look up an account without caching a freshly parsed record
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            dict or None: Account record, or None if there is no such account
+        """
+        account = self.overlay.get(email)
+        if account is not None or email in self.deleted or self.index is None:
+            return account
+        return self.index.get(email)
+
+    def __setitem__(self, email, account):
+        if email not in self:
+            self._count += 1
+        self.overlay[email] = account
+        self.deleted.discard(email)
+
+    def __delitem__(self, email):
+        if email not in self:
+            raise KeyError(email)
+        self.overlay.pop(email, None)
+        if self._in_index(email):
+            self.deleted.add(email)
+        self._count -= 1
+
+    def __contains__(self, email):
+        if email in self.overlay:
+            return True
+        return email not in self.deleted and self._in_index(email)
+
+    def __iter__(self):
+        if self.index is not None:
+            for email in self.index:
+                if email not in self.overlay and email not in self.deleted:
+                    yield email
+        yield from list(self.overlay)
+
+    def __len__(self):
+        return self._count
+
+    def snapshot(self):
+        """
+        Capture the current state cheaply
+
+        Returns:
+            tuple: (index, overlay copy, deleted copy)
+        """
+        return self.index, dict(self.overlay), set(self.deleted)
+
+    def rebase(self, index, snapshot):
+        """
+        Switch to the index of a freshly written snapshot
+
+        Overlay entries and deletions that the snapshot captured are now in
+        the file and are dropped; anything changed since is kept.
+
+        Args:
+            index (AccountIndex or AccountOffsets): Index of the newly written JSON file
+            snapshot (tuple): The snapshot() the file was written from
+        """
+        old_index, overlay, deleted = snapshot
+        for email, account in overlay.items():
+            if self.overlay.get(email) is account:
+                del self.overlay[email]
+        self.deleted -= deleted
+        self.index = index
+        if old_index is not None:
+            old_index.close()
+
+    def merge(self, index, keep):
+        """
+        Switch to the index of a file another process wrote
+
+        Cached records are dropped so they are read again from the new
+        file; overlay entries and deletions of emails in `keep` are local
+        changes not yet saved and stay on top.
+
+        Args:
+            index (AccountIndex or AccountOffsets): Index of the new JSON file
+            keep (set): Emails changed locally since the last save
+        """
+        self.overlay = {email: account for email, account in self.overlay.items() if email in keep}
+        self.deleted = {email for email in self.deleted if email in keep and email in index}
+        added = sum(1 for email in self.overlay if email not in index)
+        old_index, self.index = self.index, index
+        self._count = len(index) - len(self.deleted) + added
+        if old_index is not None:
+            old_index.close()
+
+    def close(self):
+        """
+        Unmap the current index
+        """
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+
+
+def write_accounts(f, items, spans=None):
+    """
+    Write accounts JSON in the layout of `json.dump(accounts, f, indent=4)`
+
+    Args:
+        f: File opened in binary mode
+        items: (email, encoded record) pairs, e.g. from encode_record
+        spans (list, optional): Receives (email, key_offset, key_length,
+            value_offset, value_length) for every account written
+    """
+    first = True
+    offset = 1
+    f.write(b"{")
+    for email, raw in items:
+        key = json.dumps(email).encode("ascii")
+        prefix = b"\n    " if first else b",\n    "
+        f.write(prefix + key + b": " + raw)
+        first = False
+        if spans is not None:
+            key_offset = offset + len(prefix)
+            value_offset = key_offset + len(key) + 2
+            spans.append((email, key_offset, len(key), value_offset, len(raw)))
+            offset = value_offset + len(raw)
+    f.write(b"}" if first else b"\n}")
+
+
+def write_indexed_snapshot(json_path, index_path, snapshot, durability="flush"):
+    """
+    Write accounts JSON from an IndexedAccounts snapshot, plus its index
+
+    Untouched accounts are copied byte-for-byte from the current file;
+    only overlay records are encoded. The output matches
+    `json.dump(accounts, f, indent=4)`.
+
+    Args:
+        json_path (str): Accounts JSON file to replace
+        index_path (str or None): Sidecar index file to replace, None to keep offsets in memory
+        snapshot (tuple): IndexedAccounts.snapshot() result
+        durability (str): One of DURABILITY_LEVELS
+
+    Returns:
+        AccountIndex or AccountOffsets: Index mapping the new file
+    """
+    index, overlay, deleted = snapshot
+    items = []
+    written = set()
+    if index is not None:
+        for email, raw in index.raw_items():
+            account = overlay.get(email)
+            if account is not None:
+                items.append((email, encode_record(account)))
+                written.add(email)
+            elif email not in deleted:
+                items.append((email, raw))
+    items.extend(
+        (email, encode_record(account)) for email, account in overlay.items()
+        if email not in written
+    )
+
+    spans = []
+    with atomic_open(json_path, "wb", durability) as f:
+        write_accounts(f, items, spans)
+
+    if index_path is None:
+        return AccountOffsets(json_path, spans)
+    AccountIndex.write(json_path, index_path, spans, durability)
+    return AccountIndex(json_path, index_path)
@@ -0,0 +1,961 @@
+import os
+import json
+import logging
+import uuid
+import threading
+from datetime import datetime
+from contextlib import nullcontext
+from collections import OrderedDict
+from collections.abc import MutableMapping
+
+from .account_index import (
+    AccountIndex,
+    IndexedAccounts,
+    encode_record,
+    write_accounts,
+    write_indexed_snapshot,
+)
+from .account_codec import AccountCodec, decode_accounts, is_encoded
+from .account_stream import DEFAULT_BUFFER_SIZE, AccountOffsets
+from .atomic_file import GroupCommitter, atomic_open, atomic_write, check_durability
+from .compact_account_table import CompactAccountTable
+from .file_lock import FileLock, stat_fingerprint
+from .metrics import REGISTRY
+from .secondary_index import SecondaryIndexes, time_key
+
+LOAD_SECONDS = REGISTRY.histogram("account_store_load_seconds", "Time to load an account file")
+SAVE_SECONDS = REGISTRY.histogram("account_store_save_seconds", "Time to persist account changes")
+READ_BYTES = REGISTRY.counter("account_store_read_bytes_total", "Bytes of account files loaded")
+WRITTEN_BYTES = REGISTRY.counter(
+    "account_store_written_bytes_total", "Bytes of account files and journal entries written"
+)
+
+
+class AccountStore(MutableMapping):
+    """
+    Base class for account storage engines used by AuthService.
+
+    A store behaves like a dict of account records keyed by email. Every
+    mutating call (item assignment, deletion, update_fields, rename) is
+    persisted by the engine, so callers never need to rewrite the whole
+    store themselves.
+    """
+
+    def load(self):
+        """
+        Open the underlying storage and make the accounts available
+        """
+
+    def flush(self):
+        """
+        Make sure every pending change has reached the storage
+        """
+
+    def refresh(self):
+        """
+        Pick up changes other processes made to the storage
+
+        Returns:
+            set: Emails whose records changed, were added or were removed
+        """
+        return set()
+
+    def close(self):
+        """
+        Flush pending changes and release storage resources
+        """
+        self.flush()
+
+    def update_fields(self, email, **fields):
+        """
+        Update selected fields of an existing account
+
+        Args:
+            email (str): Email of the account to update
+            **fields: Field names and their new values
+        """
+        account = self[email]
+        account.update(fields)
+        self[email] = account
+
+    def put_many(self, accounts):
+        """
+        Store several accounts, committing them together where the engine allows
+
+        Args:
+            accounts (dict): Account records keyed by email
+        """
+        for email, account in accounts.items():
+            self[email] = account
+
+    def iter_accounts(self):
+        """
+        Iterate over (email, account) pairs without keeping parsed records
+
+        Yields:
+            tuple: (email, account record)
+        """
+        for email in self:
+            account = self.get(email)
+            if account is not None:
+                yield email, account
+
+    def capture(self, since=None):
+        """
+        Copy the records changed since an earlier capture, for backups
+
+        Engines without per-record versions always capture every record.
+
+        Args:
+            since (optional): Token returned by an earlier capture
+
+        Returns:
+            tuple: (token, records, complete); records maps emails to
+            records, or to None for deletions, and complete is True when it
+            holds the whole store rather than the changes since `since`
+        """
+        return None, dict(self.iter_accounts()), True
+
+    def rename(self, old_email, new_email, **fields):
+        """
+        Move an account to a new email, optionally updating fields
+
+        Args:
+            old_email (str): Current email of the account
+            new_email (str): Email to store the account under
+            **fields: Field names and their new values
+        """
+        account = self[old_email]
+        account.update(fields)
+        if old_email != new_email:
+            del self[old_email]
+        self[new_email] = account
+
+    def get_by_id(self, account_id):
+        """
+        Find the account with a given id
+
+        Engines without an id index scan every account.
+
+        Args:
+            account_id (str): Account id, as returned by login
+
+        Returns:
+            tuple or None: (email, account record), or None if no account has that id
+        """
+        for email, account in self.iter_accounts():
+            if account.get("id") == account_id:
+                return email, account
+        return None
+
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        List accounts created in [start, end), oldest first
+
+        Engines without a creation-time index scan and sort every account.
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of accounts
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        low = None if start is None else time_key(start)
+        high = None if end is None else time_key(end)
+        matches = []
+        for email, account in self.iter_accounts():
+            try:
+                key = time_key(account.get("created_at"))
+            except (TypeError, ValueError):
+                continue
+            if (low is None or key >= low) and (high is None or key < high):
+                matches.append((key, email, account))
+        matches.sort(key=lambda match: match[:2])
+        return [(email, account) for _, email, account in matches[:limit]]
+
+    def locked_accounts(self, now=None):
+        """
+        List accounts whose persisted lock has not expired
+
+        Engines without a lock index scan every account.
+
+        Args:
+            now (datetime, optional): Reference time, defaults to the current local time
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        now = time_key(now or datetime.now())
+        return [
+            (email, account) for email, account in self.iter_accounts()
+            if _lock_active(account, now)
+        ]
+
+
+def _file_size(path):
+    """
+    Returns:
+        int: Size of a file in bytes, 0 if it is missing
+    """
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _lock_active(account, now):
+    """
+    Whether a record's lock deadline lies after `now`, a time_key
+    """
+    locked_until = account.get("locked_until")
+    try:
+        return bool(locked_until) and time_key(locked_until) > now
+    except (TypeError, ValueError):
+        return False
+
+
+class JsonAccountStore(AccountStore):
+    """
+    Account store that keeps every account in memory and persists the
+    whole mapping to a single JSON file.
+
+    Saves go to a temporary file that atomically replaces the store, so a
+    crash mid-write never truncates it. With a commit interval, saves are
+    group-committed: every mutation inside the window is covered by one
+    write.
+
+    With `lazy` enabled, startup streams the file through a bounded parse
+    buffer and keeps only each account's byte offsets; an account becomes
+    a full record the first time it is accessed. With `index` enabled, a
+    memory-mapped sidecar index (`<storage_path>.idx`) replaces even that
+    scan. In both modes, saves copy untouched records from the old file.
+
+    With `compact_table` enabled (and neither lazy mode), accounts are held in a
+    CompactAccountTable of typed arrays instead of a dict of dicts.
+
+    Plain snapshots are written by an AccountCodec: compact JSON by
+    default, or orjson/msgpack with optional gzip/zstd compression behind
+    a format header. Loading detects the format, so the setting can change
+    between runs. The lazy and compact-table modes stream JSON text and
+    therefore always write plain JSON; they still read headered files.
+
+    With `shared` enabled, several processes can use the same file: saves
+    hold an exclusive `fcntl` lock on `<storage_path>.lock`, and when the
+    file's stat fingerprint shows another process wrote it since, its
+    records are diffed against ours and only the changed ones are merged
+    before our own changes are written on top. refresh() does the same
+    merge on demand, e.g. when a file watcher fires.
+
+    get_by_id, created_between and locked_accounts answer from
+    SecondaryIndexes, built by the first query and kept current by every
+    write after it. Every write also stamps the record with a version from
+    a store-wide sequence, so capture() finds the changes since a backup
+    without comparing records.
+    """
+
+    def __init__(
+        self,
+        storage_path="accounts.json",
+        durability="flush",
+        commit_interval=0,
+        index=False,
+        lazy=False,
+        compact_table=False,
+        buffer_size=DEFAULT_BUFFER_SIZE,
+        shared=False,
+        serializer="json",
+        compression="none",
+        compression_level=None,
+    ):
+        """
+        Initialize the JSON account store
+
+        Args:
+            storage_path (str): Path to the accounts JSON file
+            durability (str): "none", "flush", "fsync" or "fsync+dir"
+            commit_interval (float): Group commit window in seconds, 0 to save on every change
+            index (bool): Keep a memory-mapped sidecar index next to the JSON file
+            lazy (bool): Stream offsets at startup and parse accounts on first access
+            compact_table (bool): Keep accounts in a CompactAccountTable
+            buffer_size (int): Parse buffer size in bytes for lazy loading
+            shared (bool): Coordinate with other processes using the same file
+            serializer (str): "json", "orjson" or "msgpack" for plain snapshots
+            compression (str): "none", "gzip" or "zstd" for plain snapshots
+            compression_level (int, optional): Compression level, the codec default if None
+        """
+        self.logger = logging.getLogger(__name__)
+        self.storage_path = storage_path
+        self.index_path = f"{storage_path}.idx" if index else None
+        self.lazy = lazy or index
+        self.compact_table = compact_table and not self.lazy
+        self.buffer_size = buffer_size
+        self.durability = check_durability(durability)
+        self.codec = AccountCodec(serializer, compression, compression_level)
+        if (self.lazy or self.compact_table) and not self.codec.plain:
+            self.logger.warning("Lazy and compact-table stores write plain JSON; ignoring the serializer")
+        self.accounts = self._empty_accounts()
+
+        # Cross-process coordination: the file as we last saw it and the
+        # emails changed here since our last save
+        self.shared = shared
+        self._file_lock = FileLock(f"{storage_path}.lock") if shared else None
+        self._fingerprint = None
+        self._dirty = set()
+
+        # Query indexes; built on first query, dropped whenever accounts are reloaded
+        self._indexes = None
+
+        # Record versions for capture(): email -> sequence of its last write,
+        # ordered by that sequence; a new epoch starts on every reload
+        self._epoch = uuid.uuid4().hex
+        self._sequence = 0
+        self._versions = OrderedDict()
+
+        # Records are replaced rather than mutated, so a shallow copy taken
+        # under _lock is a consistent snapshot; _save_lock orders the writes
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._committer = None
+        if commit_interval > 0:
+            self._committer = GroupCommitter(
+                self._commit, commit_interval, name="account-store-commit"
+            )
+
+    def _locked(self, exclusive=True):
+        """
+        Cross-process file lock of a shared store; a no-op otherwise
+
+        Args:
+            exclusive (bool): Exclusive for read-modify-write, shared for reading
+
+        Returns:
+            Context manager holding the lock
+        """
+        if self._file_lock is None:
+            return nullcontext()
+        return self._file_lock.exclusive() if exclusive else self._file_lock.shared()
+
+    def _touch(self, *emails):
+        """
+        Remember emails changed locally, so merges never overwrite them; call with _lock held
+        """
+        if self.shared:
+            self._dirty.update(emails)
+
+    def load(self):
+        """
+        Load accounts from the storage file, starting empty when the
+        file is missing or unreadable
+        """
+        with self._locked(exclusive=False), LOAD_SECONDS.time():
+            self._load()
+            if self.shared:
+                self._fingerprint = stat_fingerprint(self.storage_path)
+                self._dirty.clear()
+        if REGISTRY.enabled:
+            READ_BYTES.inc(_file_size(self.storage_path))
+
+    def _new_epoch(self):
+        """
+        Forget record versions after accounts were replaced wholesale
+        """
+        self._epoch = uuid.uuid4().hex
+        self._versions.clear()
+
+    def _load(self):
+        self._indexes = None
+        self._new_epoch()
+        if (self.lazy or self.compact_table) and is_encoded(self.storage_path):
+            self.accounts = self._load_encoded()
+            return
+        if self.lazy:
+            self.accounts = self._load_lazy()
+            return
+
+        try:
+            if not os.path.exists(self.storage_path):
+                self.logger.info("No existing accounts file. Creating new.")
+                self.accounts = self._empty_accounts()
+                return
+
+            if self.compact_table:
+                self.accounts = self._load_compact()
+                return
+
+            with open(self.storage_path, "rb") as f:
+                self.accounts = decode_accounts(f.read())
+        except (IOError, ValueError) as e:
+            self.logger.error("Error loading accounts: %s", e)
+            self.accounts = self._empty_accounts()
+
+    def _empty_accounts(self):
+        return CompactAccountTable() if self.compact_table else {}
+
+    def _load_encoded(self):
+        """
+        Read a headered file into the lazy or compact container; the
+        next save rewrites it as the plain JSON those modes stream
+
+        Returns:
+            IndexedAccounts or CompactAccountTable: Loaded accounts
+        """
+        accounts = IndexedAccounts() if self.lazy else self._empty_accounts()
+        try:
+            with open(self.storage_path, "rb") as f:
+                accounts.update(decode_accounts(f.read()))
+        except (IOError, ValueError) as e:
+            self.logger.error("Error loading accounts: %s", e)
+        return accounts
+
+    def _load_compact(self):
+        """
+        Stream the storage file into a compact table one record at a time,
+        so the dict of dicts is never materialized
+
+        Returns:
+            CompactAccountTable: Loaded accounts
+        """
+        table = CompactAccountTable()
+        offsets = AccountOffsets.scan(self.storage_path, self.buffer_size)
+        try:
+            for email, raw in offsets.raw_items():
+                table[email] = json.loads(raw)
+        finally:
+            offsets.close()
+        return table
+
+    def _load_lazy(self):
+        """
+        Map the accounts without parsing them, through the sidecar index
+        when enabled (rebuilding it when missing or stale) or through a
+        streamed offset scan
+
+        Returns:
+            IndexedAccounts: Lazily parsed accounts
+        """
+        if not os.path.exists(self.storage_path):
+            self.logger.info("No existing accounts file. Creating new.")
+            return IndexedAccounts()
+
+        try:
+            return IndexedAccounts(self._open_index())
+        except (OSError, ValueError) as e:
+            self.logger.error("Error loading accounts: %s", e)
+            return IndexedAccounts()
+
+    def _open_index(self):
+        """
+        Map the storage file through the sidecar index, rebuilding it when
+        missing or stale, or through a streamed offset scan
+
+        Returns:
+            AccountIndex or AccountOffsets: Index of the current file
+
+        Raises:
+            OSError, ValueError: If the file cannot be mapped
+        """
+        if self.index_path is None:
+            return AccountOffsets.scan(self.storage_path, self.buffer_size)
+
+        try:
+            return AccountIndex(self.storage_path, self.index_path)
+        except (OSError, ValueError) as e:
+            self.logger.info("Rebuilding account index: %s", e)
+        AccountIndex.build(self.storage_path, self.index_path, self.durability)
+        return AccountIndex(self.storage_path, self.index_path)
+
+    def _disk_records(self):
+        """
+        Read every account of the storage file, streaming in compact mode
+
+        Yields:
+            tuple: (email, account record)
+        """
+        if self.compact_table and not is_encoded(self.storage_path):
+            offsets = AccountOffsets.scan(self.storage_path, self.buffer_size)
+            try:
+                for email, raw in offsets.raw_items():
+                    yield email, json.loads(raw)
+            finally:
+                offsets.close()
+            return
+        with open(self.storage_path, "rb") as f:
+            yield from decode_accounts(f.read()).items()
+
+    def _merge_records(self):
+        """
+        Replace records that differ from the storage file, except locally changed ones
+
+        Returns:
+            set: Emails changed by the merge
+        """
+        changed = set()
+        seen = set()
+        with self._lock:
+            for email, account in self._disk_records():
+                seen.add(email)
+                if email not in self._dirty and self.accounts.get(email) != account:
+                    self._set_record(email, account)
+                    changed.add(email)
+            removed = [email for email in self.accounts if email not in seen and email not in self._dirty]
+            for email in removed:
+                self._drop_record(email)
+        changed.update(removed)
+        return changed
+
+    def _merge_index(self):
+        """
+        Switch lazily loaded accounts to the storage file's new index,
+        comparing raw record bytes to find what changed
+
+        Returns:
+            set: Emails changed by the merge
+        """
+        old = self.accounts.index
+        index = self._open_index()
+        changed = {
+            email for email, raw in index.raw_items()
+            if old is None or old.raw_value(email) != raw
+        }
+        if old is not None:
+            changed.update(email for email in old if email not in index)
+        with self._lock:
+            self.accounts.merge(index, self._dirty)
+            self._indexes = None
+            self._new_epoch()
+        return changed
+
+    def _merge_changes(self):
+        """
+        Merge what other processes wrote since we last read or wrote the
+        file; call with the file lock and _save_lock held
+
+        Returns:
+            set: Emails changed by the merge
+        """
+        fingerprint = stat_fingerprint(self.storage_path)
+        if fingerprint == self._fingerprint or fingerprint is None:
+            return set()
+
+        try:
+            changed = self._merge_index() if self.lazy else self._merge_records()
+        except (OSError, ValueError) as e:
+            self.logger.error("Error merging account changes: %s", e)
+            return set()
+
+        self._fingerprint = fingerprint
+        if changed:
+            self.logger.info("Merged %s account changes from another process", len(changed))
+        return changed
+
+    def refresh(self):
+        """
+        Merge changes other processes saved to the storage file
+
+        Returns:
+            set: Emails whose records changed, were added or were removed
+        """
+        if not self.shared:
+            return set()
+        with self._locked(exclusive=False), self._save_lock:
+            return self._merge_changes()
+
+    def _snapshot(self):
+        """
+        Capture the accounts for writing; call with _lock held
+
+        Returns:
+            Snapshot accepted by _write_snapshot
+        """
+        if self.lazy:
+            return self.accounts.snapshot()
+        if self.compact_table:
+            return self.accounts.copy()
+        return dict(self.accounts)
+
+    def _write_snapshot(self, snapshot):
+        """
+        Atomically write a captured snapshot to the storage file
+
+        Args:
+            snapshot: Result of _snapshot
+        """
+        if self.compact_table:
+            with atomic_open(self.storage_path, "wb", self.durability) as f:
+                write_accounts(
+                    f, ((email, encode_record(dict(account))) for email, account in snapshot.items())
+                )
+            return
+        if not self.lazy:
+            atomic_write(self.storage_path, self.codec.encode(snapshot), self.durability)
+            return
+
+        index = write_indexed_snapshot(self.storage_path, self.index_path, snapshot, self.durability)
+        with self._lock:
+            self.accounts.rebase(index, snapshot)
+
+    def _commit(self):
+        """
+        Atomically save accounts to the storage file with error handling
+        """
+        with self._locked(), self._save_lock:
+            if self.shared:
+                self._merge_changes()
+            with self._lock:
+                snapshot = self._snapshot()
+                dirty, self._dirty = self._dirty, set()
+            try:
+                with SAVE_SECONDS.time():
+                    self._write_snapshot(snapshot)
+                if REGISTRY.enabled:
+                    WRITTEN_BYTES.inc(_file_size(self.storage_path))
+                if self.shared:
+                    self._fingerprint = stat_fingerprint(self.storage_path)
+                self.logger.info("Accounts saved successfully")
+            except IOError as e:
+                with self._lock:
+                    self._dirty |= dirty
+                self.logger.error("Error saving accounts: %s", e)
+
+    def _changed(self):
+        """
+        Persist a mutation now, or within the group commit window
+        """
+        if self._committer is not None:
+            self._committer.request()
+        else:
+            self._commit()
+
+    def flush(self):
+        """
+        Save accounts to the storage file, committing any pending window
+        """
+        if self._committer is not None:
+            self._committer.flush()
+        else:
+            self._commit()
+
+    def close(self):
+        """
+        Commit pending changes, stop the group commit thread and unmap the index
+        """
+        if self._committer is not None:
+            self._committer.close()
+        if isinstance(self.accounts, IndexedAccounts):
+            self.accounts.close()
+        if self._file_lock is not None:
+            self._file_lock.close()
+
+    def __getitem__(self, email):
+        # Lazily loaded reads go through a mapped index that a save swaps and closes under _lock
+        with self._lock:
+            return self.accounts[email]
+
+    def _current(self, email):
+        """
+        Current record of an account without caching a lazily parsed one, or None
+        """
+        with self._lock:
+            return self.accounts.peek(email) if self.lazy else self.accounts.get(email)
+
+    def _stamp(self, email):
+        """
+        Give a record the next version; call with _lock held
+        """
+        self._sequence += 1
+        self._versions[email] = self._sequence
+        self._versions.move_to_end(email)
+
+    def _set_record(self, email, account):
+        """
+        Store a record, keeping the query indexes and versions current; call with _lock held
+        """
+        if self._indexes is not None:
+            self._indexes.replace(email, self._current(email), account)
+        self.accounts[email] = account
+        self._stamp(email)
+
+    def _drop_record(self, email, *default):
+        """
+        Remove and return a record, keeping the query indexes and versions current; call with _lock held
+        """
+        if self._indexes is not None:
+            self._indexes.replace(email, self._current(email), None)
+        self._stamp(email)
+        return self.accounts.pop(email, *default)
+
+    def capture(self, since=None):
+        """
+        Copy the records changed since an earlier capture, for backups
+
+        Writers wait only while references are copied under _lock; records
+        are replaced rather than mutated, so the copy is consistent. Changes
+        are found by walking the versions from the newest, so an incremental
+        capture costs O(changes). A full capture of lazily loaded accounts
+        parses the mapped file under _save_lock, which keeps a save from
+        unmapping it without blocking writers.
+
+        Args:
+            since (tuple, optional): Token returned by an earlier capture
+
+        Returns:
+            tuple: (token, records, complete); records maps emails to
+            records, or to None for deletions, and complete is True when it
+            holds the whole store rather than the changes since `since`
+        """
+        with self._lock:
+            token = (self._epoch, self._sequence)
+            if since is not None and since[0] == self._epoch:
+                changes = {}
+                for email, version in reversed(self._versions.items()):
+                    if version <= since[1]:
+                        break
+                    account = self._current(email)
+                    changes[email] = None if account is None else dict(account)
+                return token, changes, False
+            if not self.lazy:
+                return token, self._snapshot(), True
+
+        with self._save_lock:
+            with self._lock:
+                token = (self._epoch, self._sequence)
+                index, overlay, deleted = self.accounts.snapshot()
+            records = {}
+            if index is not None:
+                for email, raw in index.raw_items():
+                    if email not in overlay and email not in deleted:
+                        records[email] = json.loads(raw)
+            records.update(overlay)
+        return token, records, True
+
+    def _query_indexes(self):
+        """
+        Secondary indexes, built from every account on first use; call with _lock held
+        """
+        if self._indexes is None:
+            self._indexes = SecondaryIndexes(self.iter_accounts())
+        return self._indexes
+
+    def get_by_id(self, account_id):
+        """
+        Find the account with a given id through the id index
+
+        Args:
+            account_id (str): Account id, as returned by login
+
+        Returns:
+            tuple or None: (email, account record), or None if no account has that id
+        """
+        with self._lock:
+            email = self._query_indexes().email_for_id(account_id)
+            account = None if email is None else self._current(email)
+        return None if account is None else (email, account)
+
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        List accounts created in [start, end), oldest first, through the
+        creation-time index
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of accounts
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        with self._lock:
+            emails = self._query_indexes().created_between(start, end, limit)
+            return [(email, self._current(email)) for email in emails]
+
+    def locked_accounts(self, now=None):
+        """
+        List accounts whose persisted lock has not expired, through the lock index
+
+        Args:
+            now (datetime, optional): Reference time, defaults to the current local time
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        now = time_key(now or datetime.now())
+        with self._lock:
+            candidates = [(email, self._current(email)) for email in self._query_indexes().locked_emails()]
+        return [(email, account) for email, account in candidates if _lock_active(account, now)]
+
+    def __setitem__(self, email, account):
+        with self._lock:
+            self._set_record(email, account)
+            self._touch(email)
+        self._changed()
+
+    def __delitem__(self, email):
+        with self._lock:
+            self._drop_record(email)
+            self._touch(email)
+        self._changed()
+
+    def __contains__(self, email):
+        with self._lock:
+            return email in self.accounts
+
+    def __iter__(self):
+        if not self.lazy:
+            return iter(self.accounts)
+        # The emails are listed before a save can close the index they come from
+        with self._lock:
+            return iter(list(self.accounts))
+
+    def __len__(self):
+        return len(self.accounts)
+
+    def update_fields(self, email, **fields):
+        """
+        Update selected fields of an existing account
+
+        Args:
+            email (str): Email of the account to update
+            **fields: Field names and their new values
+        """
+        with self._lock:
+            self._set_record(email, {**self.accounts[email], **fields})
+            self._touch(email)
+        self._changed()
+
+    def put_many(self, accounts):
+        """
+        Store several accounts with a single save
+
+        Args:
+            accounts (dict): Account records keyed by email
+        """
+        with self._lock:
+            for email, account in accounts.items():
+                self._set_record(email, account)
+            self._touch(*accounts)
+        self._changed()
+
+    def iter_accounts(self):
+        """
+        Iterate over (email, account) pairs; lazily loaded accounts are
+        parsed for the caller without being cached
+
+        Yields:
+            tuple: (email, account record)
+        """
+        if not self.lazy:
+            yield from super().iter_accounts()
+            return
+        for email in self:
+            account = self._current(email)
+            if account is not None:
+                yield email, account
+
+    def rename(self, old_email, new_email, **fields):
+        """
+        Move an account to a new email with a single save
+
+        Args:
+            old_email (str): Current email of the account
+            new_email (str): Email to store the account under
+            **fields: Field names and their new values
+        """
+        with self._lock:
+            account = self._drop_record(old_email)
+            self._set_record(new_email, {**account, **fields})
+            self._touch(old_email, new_email)
+        self._changed()
+
+
+def create_account_store(storage_type="json", storage_path="accounts.json", options=None):
+    """
+    Create the account store configured by `database.type`
+
+    Args:
+        storage_type (str): Storage engine name ("json" or "sqlite")
+        storage_path (str): Path to the storage file; for sqlite, a `.json`
+            path is replaced by the `.db` path next to it, and an existing
+            JSON store there is migrated into a new database
+        options (dict, optional): Engine settings from the `database` section
+
+    Returns:
+        AccountStore: Unloaded store instance
+
+    Raises:
+        ValueError: If the storage type is unknown or the options conflict
+    """
+    options = options or {}
+    durability = options.get("durability", "flush")
+    commit_interval = options.get("commit_interval_ms", 0) / 1000
+    index = options.get("index", False)
+    lazy = options.get("lazy", False)
+    compact_table = options.get("compact_table", False)
+    shared = options.get("shared", False)
+    shards = options.get("shards", 0)
+    codec_options = {
+        "serializer": options.get("serializer", "json"),
+        "compression": options.get("compression", "none"),
+        "compression_level": options.get("compression_level"),
+    }
+
+    if storage_type == "json":
+        if not shards and os.path.exists(os.path.join(f"{storage_path}.shards", "manifest.json")):
+            raise ValueError(f"{storage_path} was split into shards; set database.shards to load it")
+        if shards:
+            if options.get("journal", False):
+                raise ValueError("Journaled account storage cannot be sharded")
+            from .sharded_account_store import ShardedAccountStore
+
+            return ShardedAccountStore(
+                storage_path,
+                shards=shards,
+                durability=durability,
+                commit_interval=commit_interval,
+                workers=options.get("shard_workers"),
+                index=index,
+                lazy=lazy,
+                compact_table=compact_table,
+                shared=shared,
+                **codec_options,
+            )
+        if options.get("journal", False):
+            from .journaled_account_store import JournaledAccountStore
+
+            return JournaledAccountStore(
+                storage_path,
+                compact_threshold=options.get(
+                    "compact_threshold", JournaledAccountStore.DEFAULT_COMPACT_THRESHOLD
+                ),
+                durability=durability,
+                commit_interval=commit_interval,
+                index=index,
+                lazy=lazy,
+                compact_table=compact_table,
+                shared=shared,
+                **codec_options,
+            )
+        return JsonAccountStore(
+            storage_path,
+            durability=durability,
+            commit_interval=commit_interval,
+            index=index,
+            lazy=lazy,
+            compact_table=compact_table,
+            shared=shared,
+            **codec_options,
+        )
+
+    if storage_type == "sqlite":
+        from .sqlite_account_store import SqliteAccountStore
+
+        # A JSON path, like the default, names the store to migrate from; the database sits next to it
+        migrate_from = None
+        if storage_path.endswith(".json"):
+            json_path, storage_path = storage_path, f"{storage_path[:-len('.json')]}.db"
+            if os.path.exists(json_path) and not os.path.exists(storage_path):
+                migrate_from = create_account_store("json", json_path, options)
+        return SqliteAccountStore(storage_path, durability=durability, migrate_from=migrate_from)
+
+    raise ValueError(f"Unknown account storage type: {storage_type}")
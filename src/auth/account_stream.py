@@ -0,0 +1,262 @@
+import re
+import json
+import mmap
+
+_OBJECT_START = re.compile(r"[ \t\n\r]*\{[ \t\n\r]*")
+_MEMBER_HEAD = re.compile(r'("(?:[^"\\]|\\.)*")[ \t\n\r]*:[ \t\n\r]*')
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])[ \t\n\r]*")
+
+# Bytes read from the accounts file per refill of the parse buffer
+DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def decode_key(raw):
+    """
+    Decode a JSON string key, skipping the parser when it has no escapes
+
+    Args:
+        raw (bytes): Encoded JSON string including its quotes
+
+    Returns:
+        str: Decoded key
+    """
+    if b"\\" in raw or not raw.isascii():
+        return json.loads(raw)
+    return raw[1:-1].decode("ascii")
+
+
+class _ParseBuffer:
+    """
+    Sliding window over a binary file for incremental JSON scanning.
+
+    Bytes are decoded as latin-1 so that string positions equal file
+    offsets; structural JSON characters are ASCII and UTF-8 multi-byte
+    sequences never contain them, so the layout is found correctly even
+    though non-ASCII text is decoded wrongly. Keys are re-decoded from the
+    original bytes.
+    """
+
+    def __init__(self, f, buffer_size):
+        self.f = f
+        self.buffer_size = buffer_size
+        self.text = ""
+        self.base = 0
+        self.eof = False
+
+    def fill(self):
+        """
+        Append the next chunk of the file
+
+        Returns:
+            bool: False once the end of the file is reached
+        """
+        chunk = self.f.read(self.buffer_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.text += chunk.decode("latin-1")
+        return True
+
+    def discard(self, pos):
+        """
+        Drop consumed text once it outgrows the chunk size, keeping the
+        buffer bounded without copying it for every member
+
+        Args:
+            pos (int): Buffer position still needed
+
+        Returns:
+            int: The same position after any drop
+        """
+        if pos < self.buffer_size:
+            return pos
+        self.text = self.text[pos:]
+        self.base += pos
+        return 0
+
+    def match(self, pattern, pos):
+        """
+        Match a pattern at `pos`, reading more of the file while the match
+        is missing or runs into the end of the buffer
+
+        Args:
+            pattern (re.Pattern): Pattern to match
+            pos (int): Buffer position
+
+        Returns:
+            re.Match: The match
+
+        Raises:
+            ValueError: If the pattern does not match before the end of the file
+        """
+        while True:
+            match = pattern.match(self.text, pos)
+            if match is not None and match.end() < len(self.text):
+                return match
+            if not self.fill():
+                if match is None:
+                    raise ValueError(f"Malformed accounts file at offset {self.base + pos}")
+                return match
+
+    def decode_value(self, decoder, pos):
+        """
+        Find the end of the JSON value starting at `pos`
+
+        Args:
+            decoder (json.JSONDecoder): Decoder used to skip the value
+            pos (int): Buffer position of the value
+
+        Returns:
+            int: Buffer position just after the value
+        """
+        while True:
+            try:
+                _, end = decoder.raw_decode(self.text, pos)
+                # A value ending exactly at the buffer edge may continue
+                if end < len(self.text) or self.eof:
+                    return end
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill()
+
+
+def iter_member_spans(f, buffer_size=DEFAULT_BUFFER_SIZE):
+    """
+    Stream the members of a top-level JSON object from a binary file
+
+    Only a window of about `buffer_size` bytes (plus the member being
+    scanned) is held in memory, and member values are not kept.
+
+    Args:
+        f: File opened in binary mode, positioned at the start
+        buffer_size (int): Bytes to read per refill
+
+    Yields:
+        tuple: (key, key_offset, key_length, value_offset, value_length) in bytes
+
+    Raises:
+        ValueError: If the file is not a JSON object
+    """
+    decoder = json.JSONDecoder()
+    buffer = _ParseBuffer(f, buffer_size)
+    pos = buffer.match(_OBJECT_START, 0).end()
+    if buffer.text[pos:pos + 1] == "}":
+        return
+
+    while True:
+        pos = buffer.discard(pos)
+        head = buffer.match(_MEMBER_HEAD, pos)
+        key_start, key_end = head.span(1)
+        key_raw = buffer.text[key_start:key_end].encode("latin-1")
+
+        value_start = head.end()
+        value_end = buffer.decode_value(decoder, value_start)
+        yield (
+            decode_key(key_raw),
+            buffer.base + key_start,
+            len(key_raw),
+            buffer.base + value_start,
+            value_end - value_start,
+        )
+
+        separator = buffer.match(_SEPARATOR, value_end)
+        if separator.group(1) == "}":
+            return
+        pos = separator.end()
+
+
+class AccountOffsets:
+    """
+    In-memory map from email to the byte range of its record in an
+    accounts JSON file.
+
+    Offsets are packed into one integer per account; the file is mapped
+    read-only and a record is parsed only when asked for.
+    """
+
+    def __init__(self, json_path, spans):
+        """
+        Build the offset map
+
+        Args:
+            json_path (str): Accounts JSON file the spans refer to
+            spans: (email, key_offset, key_length, value_offset, value_length) per account
+        """
+        self.json_path = json_path
+        self._offsets = {
+            email: value_offset << 32 | value_length
+            for email, _, _, value_offset, value_length in spans
+        }
+        with open(json_path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    def scan(cls, json_path, buffer_size=DEFAULT_BUFFER_SIZE):
+        """
+        Stream an accounts JSON file and map its records
+
+        Args:
+            json_path (str): Accounts JSON file
+            buffer_size (int): Parse buffer size in bytes
+
+        Returns:
+            AccountOffsets: Offsets of every account in the file
+        """
+        with open(json_path, "rb") as f:
+            return cls(json_path, iter_member_spans(f, buffer_size))
+
+    def close(self):
+        """
+        Unmap the JSON file
+        """
+        self._data.close()
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, email):
+        return email in self._offsets
+
+    def __iter__(self):
+        return iter(self._offsets)
+
+    def _raw(self, packed):
+        offset = packed >> 32
+        return self._data[offset:offset + (packed & 0xFFFFFFFF)]
+
+    def raw_value(self, email):
+        """
+        Raw JSON bytes of an account
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            bytes or None: Encoded account record, or None if not in the file
+        """
+        packed = self._offsets.get(email)
+        return None if packed is None else self._raw(packed)
+
+    def get(self, email):
+        """
+        Parse a single account from the JSON file
+
+        Args:
+            email (str): Email to look up
+
+        Returns:
+            dict or None: Account record, or None if not in the file
+        """
+        raw = self.raw_value(email)
+        return None if raw is None else json.loads(raw)
+
+    def raw_items(self):
+        """
+        Iterate over (email, raw JSON bytes) in file order
+
+        Yields:
+            tuple: (email, bytes)
+        """
+        for email, packed in self._offsets.items():
+            yield email, self._raw(packed)
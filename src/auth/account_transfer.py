@@ -0,0 +1,349 @@
+import os
+import csv
+import json
+import time
+import uuid
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from .password_hasher import is_legacy_hash, parse_hash
+
+FORMATS = ("jsonl", "csv")
+EXPORT_FIELDS = ("email", "id", "password_hash", "created_at", "login_attempts", "locked_until")
+
+# Rows validated, hashed and committed together during an import
+DEFAULT_BATCH_SIZE = 10000
+
+
+def check_format(format):
+    """
+    Validate a transfer format
+
+    Args:
+        format (str): One of FORMATS
+
+    Returns:
+        str: The validated format
+
+    Raises:
+        ValueError: If the format is unknown
+    """
+    if format not in FORMATS:
+        raise ValueError(f"Unknown account format: {format}. Expected one of {FORMATS}")
+    return format
+
+
+class ImportReport:
+    """
+    Outcome of a bulk import: counts, per-row errors and throughput.
+
+    Only the first `max_errors` errors are kept, so a bad file cannot make
+    the report grow with the input.
+    """
+
+    def __init__(self, max_errors=1000):
+        """
+        Initialize an empty report
+
+        Args:
+            max_errors (int): Per-row errors to keep
+        """
+        self.max_errors = max_errors
+        self.rows = 0
+        self.imported = 0
+        self.failed = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.errors = []
+
+    def add_error(self, row_number, email, reason):
+        """
+        Record a rejected row
+
+        Args:
+            row_number (int): 1-based position of the row in the input
+            email (str or None): Email of the row, if it had one
+            reason (str): Why the row was rejected
+        """
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append((row_number, email, reason))
+
+    @property
+    def rows_per_second(self):
+        """
+        Rows processed per second
+        """
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return (
+            f"{self.imported} imported, {self.failed} failed "
+            f"in {self.elapsed:.1f}s ({self.rows_per_second:.0f} rows/s)"
+        )
+
+
+def read_accounts(stream, format="jsonl"):
+    """
+    Stream account rows from a JSONL or CSV text stream
+
+    Malformed JSON lines are passed through as the raw line, so the
+    importer reports them as errors with their row number.
+
+    Args:
+        stream: Text stream to read from
+        format (str): "jsonl" or "csv"
+
+    Yields:
+        dict or str: One row per account
+    """
+    if check_format(format) == "csv":
+        yield from csv.DictReader(stream)
+        return
+
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield line
+
+
+def _valid_hash(value):
+    """
+    Whether an imported password hash is one login can verify
+    """
+    if not isinstance(value, str):
+        return False
+    if is_legacy_hash(value):
+        return True
+    try:
+        parse_hash(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _valid_time(value):
+    """
+    Whether an imported timestamp parses as the ISO format the service writes
+    """
+    if not isinstance(value, str):
+        return False
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _build_record(service, row, pending, pending_ids, email_valid, password_valid):
+    """
+    Validate one import row and build its account record
+
+    Args:
+        service (AuthService): Service providing existing accounts
+        row: Row from the input
+        pending (dict): Records already accepted in the current batch
+        pending_ids (set): Ids of those records
+        email_valid (bool): Result of the batched email check
+        password_valid (bool): Result of the batched password check
+
+    Returns:
+        tuple: (email, record, plaintext password or None); record is None
+            and the last item is the rejection reason when the row is invalid
+    """
+    if not isinstance(row, dict):
+        return None, None, "Row is not an account object"
+
+    email = row.get("email")
+    if not email_valid:
+        return email, None, "Invalid email format"
+    if email in pending or service.email_exists(email):
+        return email, None, "Email already registered"
+
+    password = row.get("password")
+    password_hash = row.get("password_hash")
+    if password_hash:
+        if not _valid_hash(password_hash):
+            return email, None, "Invalid password_hash"
+        password = None
+    elif not password:
+        return email, None, "Missing password"
+    elif not password_valid:
+        return email, None, "Password does not meet strength requirements"
+
+    try:
+        login_attempts = int(row.get("login_attempts") or 0)
+    except (TypeError, ValueError):
+        return email, None, "Invalid login_attempts"
+    if login_attempts < 0:
+        return email, None, "Invalid login_attempts"
+
+    for field in ("created_at", "locked_until"):
+        if row.get(field) and not _valid_time(row[field]):
+            return email, None, f"Invalid {field}"
+
+    account_id = row.get("id")
+    if account_id:
+        if not isinstance(account_id, str):
+            return email, None, "Invalid id"
+        if account_id in pending_ids or service.get_by_id(account_id) is not None:
+            return email, None, "Account id already in use"
+
+    record = {
+        "id": account_id or None,
+        "password": password_hash,
+        "created_at": row.get("created_at") or datetime.now().isoformat(),
+        "login_attempts": login_attempts,
+        "locked_until": row.get("locked_until") or None,
+    }
+    return email, record, password
+
+
+def _text(row, field):
+    value = row.get(field) if isinstance(row, dict) else None
+    return value if isinstance(value, str) else ""
+
+
+def _import_batch(service, batch, executor, workers, report):
+    """
+    Validate, hash and commit one batch of rows
+
+    Args:
+        service (AuthService): Service to import into
+        batch (list): (row number, row) pairs
+        executor (ThreadPoolExecutor): Pool used for password hashing
+        workers (int): Threads in the pool
+        report (ImportReport): Report to update
+    """
+    # Check the whole batch in one call, bypassing the policy's keystroke cache
+    emails = [_text(row, "email") for _, row in batch]
+    passwords = [_text(row, "password") for _, row in batch]
+    email_checks = service.policy.validate_many(emails, "email")
+    password_checks = service.policy.validate_many(passwords, "password")
+
+    accounts = {}
+    ids = set()
+    rows = {}
+    plaintext = []
+    for (row_number, row), email_valid, password_valid in zip(batch, email_checks, password_checks):
+        email, record, detail = _build_record(service, row, accounts, ids, email_valid, password_valid)
+        if record is None:
+            report.add_error(row_number, email, detail)
+            continue
+        accounts[email] = record
+        if record["id"]:
+            ids.add(record["id"])
+        rows[email] = row_number
+        if detail is not None:
+            plaintext.append((email, detail))
+
+    # Draw random ids for the whole batch at once instead of one uuid4() each
+    missing = [record for record in accounts.values() if not record["id"]]
+    entropy = os.urandom(16 * len(missing))
+    for position, record in enumerate(missing):
+        record["id"] = str(uuid.UUID(bytes=entropy[position * 16:position * 16 + 16], version=4))
+
+    # One task per worker keeps pool overhead negligible next to the hashing
+    passwords = [password for _, password in plaintext]
+    size = -(-len(passwords) // workers) or 1
+    chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+    hashed_chunks = executor.map(service.hasher.hash_many, chunks)
+    hashes = (hashed_password for chunk in hashed_chunks for hashed_password in chunk)
+    for (email, _), hashed_password in zip(plaintext, hashes):
+        accounts[email]["password"] = hashed_password
+
+    if not accounts:
+        return
+    try:
+        service.store.put_many(accounts)
+        report.imported += len(accounts)
+    except (OSError, ValueError) as e:
+        for email in accounts:
+            report.add_error(rows[email], email, f"Could not store account: {e}")
+
+
+def import_accounts(service, rows, batch_size=DEFAULT_BATCH_SIZE, workers=None, max_errors=1000):
+    """
+    Register accounts in bulk
+
+    Rows are consumed lazily and handled `batch_size` at a time: each batch
+    is validated, its passwords are hashed on a thread pool, and it is
+    committed with a single store write, so memory stays bounded by the
+    batch size regardless of the input length.
+
+    Args:
+        service (AuthService): Service to import into
+        rows: Iterable of dicts with "email" and either "password" or "password_hash"
+        batch_size (int): Rows per batch
+        workers (int, optional): Hashing threads, defaults to the CPU count
+        max_errors (int): Per-row errors kept in the report
+
+    Returns:
+        ImportReport: Counts, per-row errors and throughput
+    """
+    logger = logging.getLogger(__name__)
+    report = ImportReport(max_errors)
+    start = time.perf_counter()
+
+    workers = workers or os.cpu_count() or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        batch = []
+        for row_number, row in enumerate(rows, 1):
+            batch.append((row_number, row))
+            if len(batch) >= batch_size:
+                _import_batch(service, batch, executor, workers, report)
+                report.rows = row_number
+                report.batches += 1
+                report.elapsed = time.perf_counter() - start
+                logger.info("Import progress: %s", report)
+                batch = []
+        if batch:
+            _import_batch(service, batch, executor, workers, report)
+            report.rows = batch[-1][0]
+            report.batches += 1
+
+    report.elapsed = time.perf_counter() - start
+    logger.info("Import finished: %s", report)
+    return report
+
+
+def export_accounts(store, stream, format="jsonl"):
+    """
+    Stream every account to a JSONL or CSV text stream
+
+    Passwords are exported as their hashes under "password_hash", which
+    import_accounts stores as-is.
+
+    Args:
+        store (AccountStore): Store to export
+        stream: Text stream to write to
+        format (str): "jsonl" or "csv"
+
+    Returns:
+        int: Number of accounts written
+    """
+    writer = None
+    if check_format(format) == "csv":
+        writer = csv.writer(stream)
+        writer.writerow(EXPORT_FIELDS)
+
+    count = 0
+    for email, account in store.iter_accounts():
+        values = (
+            email,
+            account.get("id"),
+            account.get("password"),
+            account.get("created_at"),
+            account.get("login_attempts", 0),
+            account.get("locked_until"),
+        )
+        if writer is not None:
+            writer.writerow(["" if value is None else value for value in values])
+        else:
+            stream.write(json.dumps(dict(zip(EXPORT_FIELDS, values))) + "\n")
+        count += 1
+    return count
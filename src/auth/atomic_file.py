@@ -0,0 +1,206 @@
+import os
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+
+# Durability levels, weakest first:
+#   none      - leave data in Python's buffers until the file is closed
+#   flush     - hand data to the operating system (survives a process crash)
+#   fsync     - force data to disk (survives a power loss)
+#   fsync+dir - also sync the directory so renames and new files are durable
+DURABILITY_LEVELS = ("none", "flush", "fsync", "fsync+dir")
+
+
+def check_durability(durability):
+    """
+    Validate a durability level
+
+    Args:
+        durability (str): One of DURABILITY_LEVELS
+
+    Returns:
+        str: The validated level
+
+    Raises:
+        ValueError: If the level is unknown
+    """
+    if durability not in DURABILITY_LEVELS:
+        raise ValueError(
+            f"Unknown durability level: {durability}. Expected one of {DURABILITY_LEVELS}"
+        )
+    return durability
+
+
+def sync_file(f, durability):
+    """
+    Push a file's written data as far as the durability level requires
+
+    Args:
+        f: Open file object
+        durability (str): One of DURABILITY_LEVELS
+    """
+    if durability == "none":
+        return
+    f.flush()
+    if durability in ("fsync", "fsync+dir"):
+        os.fsync(f.fileno())
+
+
+def sync_directory(directory):
+    """
+    Sync a directory so recent renames and file creations are durable
+
+    Args:
+        directory (str): Directory to sync
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        # Directories cannot be opened for syncing on Windows
+        return
+    fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def atomic_open(path, mode="w", durability="flush", **kwargs):
+    """
+    Open a temporary file that atomically replaces `path` on success
+
+    Readers see either the old file or the complete new one, never a
+    truncated write. If the block raises, the temporary file is removed
+    and `path` is left untouched.
+
+    Args:
+        path (str): Destination file
+        mode (str): Write mode ("w" or "wb")
+        durability (str): One of DURABILITY_LEVELS
+        **kwargs: Extra arguments for the file object (e.g. encoding)
+
+    Yields:
+        File object to write the new contents to
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+            sync_file(f, durability)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if durability == "fsync+dir":
+        sync_directory(directory)
+
+
+def atomic_write(path, data, durability="flush"):
+    """
+    Atomically replace a file with new contents
+
+    Args:
+        path (str): Destination file
+        data (str or bytes): New file contents
+        durability (str): One of DURABILITY_LEVELS
+    """
+    mode = "wb" if isinstance(data, bytes) else "w"
+    with atomic_open(path, mode, durability) as f:
+        f.write(data)
+
+
+class GroupCommitter:
+    """
+    Merge many commit requests into one write per commit interval.
+
+    The first request after a quiet period opens a window of `interval`
+    seconds; every request arriving inside that window is served by the
+    single commit that runs when it closes. Disk writes are therefore
+    bounded by the interval rather than by the request rate.
+    """
+
+    def __init__(self, commit, interval, name="group-commit"):
+        """
+        Initialize the group committer
+
+        Args:
+            commit (callable): Function performing one commit
+            interval (float): Commit window in seconds
+            name (str): Name of the background thread
+        """
+        self.logger = logging.getLogger(__name__)
+        self.interval = interval
+        self.commits = 0
+        self.requests = 0
+
+        self._commit = commit
+        self._name = name
+        self._condition = threading.Condition()
+        self._commit_lock = threading.Lock()
+        self._dirty = False
+        self._closed = False
+        self._thread = None
+
+    def request(self):
+        """
+        Ask for the pending changes to be committed within one interval
+        """
+        with self._condition:
+            self.requests += 1
+            self._dirty = True
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def flush(self):
+        """
+        Commit pending changes immediately on the calling thread
+        """
+        with self._commit_lock:
+            with self._condition:
+                if not self._dirty:
+                    return
+                self._dirty = False
+            try:
+                self._commit()
+                self.commits += 1
+            except Exception as e:
+                self.logger.error("Group commit failed: %s", e)
+
+    def close(self):
+        """
+        Stop the background thread after committing pending changes
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self):
+        """
+        Background loop: wait for a request, hold the window open, commit
+        """
+        while True:
+            with self._condition:
+                while not self._dirty and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+
+                deadline = time.monotonic() + self.interval
+                remaining = self.interval
+                while remaining > 0 and not self._closed:
+                    self._condition.wait(remaining)
+                    remaining = deadline - time.monotonic()
+
+            self.flush()
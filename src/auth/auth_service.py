@@ -1,62 +1,269 @@
-import os
-import json
-import re
-import hashlib
+import time
 import uuid
 import logging
-from datetime import datetime, timedelta
+import functools
+import threading
+from datetime import datetime
+
+from .account_backup import AccountBackup
+from .account_store import create_account_store
+from .account_transfer import DEFAULT_BATCH_SIZE, export_accounts, import_accounts
+from .credential_policy import CredentialPolicy
+from .lockout_tracker import LockoutTracker
+from .metrics import REGISTRY, MetricsExporter
+from .password_hasher import PasswordHasher
+from .rate_limiter import RateLimiter
+
+
+def _after_load(method):
+    """
+    Make a store operation wait until the accounts are loaded, for
+    services loading them in the background (see start_loading)
+
+    Raises:
+        RuntimeError: If loading the accounts failed
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if not self.ready.is_set():
+            self.ready.wait()
+        if self.load_error is not None:
+            raise RuntimeError("Accounts failed to load") from self.load_error
+        return method(self, *args, **kwargs)
+    return wrapper
 
 
 class AuthService:
     """ handles userauth """
-    def __init__(self, storage_path="accounts.json", max_login_attempts=5):
+    def __init__(
+        self,
+        storage_path="accounts.json",
+        max_login_attempts=5,
+        storage_type="json",
+        storage_options=None,
+        lockout_options=None,
+        hashing_options=None,
+        rate_limit_options=None,
+        policy_options=None,
+        backup_options=None,
+        metrics_options=None,
+        defer_load=False,
+    ):
         """
-        Initialize theauth service with a file-based storage
+        Initialize theauth service with a pluggable account store
 
         Args:
             storage_path (str): Path to the accounts storage file
             max_login_attempts (int): Maximum failed login attempts before lockout
+            storage_type (str): Storage engine from `database.type` ("json" or "sqlite")
+            storage_options (dict, optional): Engine settings from the `database` section
+            lockout_options (dict, optional): Settings from `authentication.lockout`
+            hashing_options (dict, optional): Settings from `authentication.password_hashing`
+            rate_limit_options (dict, optional): Settings from `authentication.rate_limit`
+            policy_options (dict, optional): Settings from `authentication.password_policy`
+            backup_options (dict, optional): Settings from `database.backup`
+            metrics_options (dict, optional): Settings from `metrics`
+            defer_load (bool): Leave loading the accounts to start_loading();
+                store operations wait until they are loaded
         """
         # Setup logging
         self.logger = logging.getLogger(__name__)
 
+        # Metrics are recorded only when enabled, and exported if configured;
+        # close() restores the registry's previous state
+        metrics_options = metrics_options or {}
+        self.metrics_exporter = None
+        self._metrics_were_enabled = REGISTRY.enabled
+        if metrics_options.get("enabled", False):
+            REGISTRY.enabled = True
+            self.metrics_exporter = MetricsExporter.from_options(metrics_options)
+            self.metrics_exporter.start()
+
         # Configuration
         self.storage_path = storage_path
         self.MAX_LOGIN_ATTEMPTS = max_login_attempts
 
-        # Load accounts
+        # Failed attempts are counted in memory; only locks reach the store
+        lockout_options = lockout_options or {}
+        self.lockout = LockoutTracker(
+            max_attempts=max_login_attempts,
+            lock_duration=lockout_options.get("lock_duration_seconds", 900),
+            attempt_ttl=lockout_options.get("attempt_ttl_seconds", 900),
+            checkpoint_path=f"{storage_path}.lockout",
+            checkpoint_interval=lockout_options.get("checkpoint_interval_ms", 5000) / 1000,
+        )
+
+        # Email and password rules, compiled once
+        self.policy = CredentialPolicy.from_options(policy_options)
+
+        # Login attempts are rate limited before any lookup or hashing
+        rate_limit_options = rate_limit_options or {}
+        self.rate_limiter = None
+        if rate_limit_options.get("enabled", True):
+            self.rate_limiter = RateLimiter(
+                account_rate=rate_limit_options.get("account_rate_per_second", 1.0),
+                account_burst=rate_limit_options.get("account_burst", 10),
+                global_rate=rate_limit_options.get("global_rate_per_second", 100.0),
+                global_burst=rate_limit_options.get("global_burst", 200),
+                max_tracked=rate_limit_options.get("max_tracked_accounts", 100000),
+            )
+            if self.rate_limiter.account_rate and self.rate_limiter.account_burst <= max_login_attempts:
+                self.logger.warning(
+                    "Rate limit account_burst %s does not exceed max_login_attempts %s; "
+                    "repeated failures are rate limited before the account locks",
+                    self.rate_limiter.account_burst, max_login_attempts
+                )
+
+        # Salted KDF hashing; a target latency calibrates the cost on this machine
+        hashing_options = hashing_options or {}
+        scheme = hashing_options.get("scheme", "scrypt")
+        workers = hashing_options.get("workers", 2)
+        if hashing_options.get("target_ms"):
+            self.hasher = PasswordHasher.calibrate(scheme, hashing_options["target_ms"], max_workers=workers)
+        else:
+            self.hasher = PasswordHasher(scheme, hashing_options.get("cost"), max_workers=workers)
+
+        # Account store, loaded now or in the background by start_loading()
+        self.store = create_account_store(storage_type, storage_path, storage_options)
+        self.accounts = self.store
+        self.ready = threading.Event()
+        self.load_error = None
+        self._loader = None
+        self._accounts_gauge = REGISTRY.gauge("auth_accounts", "Stored accounts", function=self.store.__len__)
+
+        # Incremental backups of the loaded store
+        backup_options = backup_options or {}
+        self.backup = AccountBackup(
+            self.store,
+            backup_options.get("directory") or f"{storage_path}.backups",
+            max_deltas=backup_options.get("max_deltas", 24),
+            keep_chains=backup_options.get("keep_chains", 2),
+            compression=backup_options.get("compression", "gzip"),
+        )
+        self._backup_interval = 0
+        if backup_options.get("enabled", False):
+            self._backup_interval = backup_options.get("interval_minutes", 60) * 60
+
+        if not defer_load:
+            self._finish_loading()
+            self.ready.set()
+
+    def start_loading(self, on_ready=None):
+        """
+        Load the accounts on a background thread, for services created with
+        defer_load; store operations called meanwhile wait until it is done
+
+        Args:
+            on_ready (callable, optional): Called from the loading thread once
+                loading ends, with None or the exception that stopped it
+        """
+        if self.ready.is_set():
+            if on_ready is not None:
+                on_ready(self.load_error)
+            return
+        if self._loader is not None:
+            return
+        self._loader = threading.Thread(
+            target=self._load_in_background, args=(on_ready,), name="account-loader", daemon=True
+        )
+        self._loader.start()
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Wait for the accounts to be loaded
+
+        Args:
+            timeout (float, optional): Seconds to wait, forever if None
+
+        Returns:
+            bool: True once loading has ended, False on timeout
+        """
+        return self.ready.wait(timeout)
+
+    def _load_in_background(self, on_ready):
+        """Body of the loading thread."""
+        started = time.perf_counter()
+        try:
+            self._finish_loading()
+        except Exception as e:
+            self.load_error = e
+            self.logger.error("Error loading accounts: %s", e)
+        finally:
+            self.ready.set()
+        self.logger.info("Accounts ready after %.1f ms in the background", (time.perf_counter() - started) * 1000)
+        if on_ready is not None:
+            on_ready(self.load_error)
+
+    def _finish_loading(self):
+        """Load the accounts, then start the scheduled backups of them."""
         self.accounts = self.load_accounts()
+        if self._backup_interval > 0:
+            self.backup.start(self._backup_interval)
 
+    @REGISTRY.timed("auth_load_accounts", "loading the account store")
     def load_accounts(self):
         """
-        Load accounts from the storage file
+        Load accounts from the configured account store
 
         Returns:
-            dict: Loaded accounts or empty dictionary
+            AccountStore: Dict-like view of the stored accounts
         """
-        try:
-            if not os.path.exists(self.storage_path):
-                self.logger.info("No existing accounts file. Creating new.")
-                return {}
-
-            with open(self.storage_path, "r") as f:
-                accounts = json.load(f)
-                self.logger.info(f"Loaded {len(accounts)} accounts")
-                return accounts
-        except (IOError, json.JSONDecodeError) as e:
-            self.logger.error(f"Error loading accounts: {e}")
-            return {}
+        self.store.load()
+        self.lockout.load()
+        self.logger.info("Loaded %s accounts", len(self.store))
+        return self.store
 
+    @_after_load
+    @REGISTRY.timed("auth_save_accounts", "flushing the account store")
     def save_accounts(self):
         """
-        Save accounts to the storage file with error handling
+        Flush pending account changes to the account store
         """
-        try:
-            with open(self.storage_path, "w") as f:
-                json.dump(self.accounts, f, indent=4)
-            self.logger.info("Accounts saved successfully")
-        except IOError as e:
-            self.logger.error(f"Error saving accounts: {e}")
+        self.store.flush()
+        self.lockout.checkpoint()
+
+    @_after_load
+    def refresh_accounts(self):
+        """
+        Merge account changes other processes saved to a shared store
+
+        Returns:
+            set: Emails whose records changed, were added or were removed
+        """
+        return self.store.refresh()
+
+    @_after_load
+    def backup_accounts(self, full=False):
+        """
+        Back up the accounts changed since the previous backup
+
+        Args:
+            full (bool): Write every account and start a new backup chain
+
+        Returns:
+            dict or None: Manifest entry of the backup, or None if nothing changed
+        """
+        return self.backup.backup(full)
+
+    def close(self):
+        """
+        Stop backups, checkpoint the lockout state, close the account store
+        and stop exporting metrics. The account gauge is removed, unless a
+        later service took it over, so the registry no longer holds the
+        closed store
+        """
+        if self._loader is not None:
+            self._loader.join()
+        self.backup.close()
+        self.lockout.close()
+        self.store.close()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        if self._accounts_gauge.function == self.store.__len__:
+            REGISTRY.unregister("auth_accounts")
+        REGISTRY.enabled = self._metrics_were_enabled
+        if self.rate_limiter is not None and self.rate_limiter.rejected:
+            self.logger.info("Rate limiter: %s", self.rate_limiter.stats())
 
     def validate_email(self, email):
         """
@@ -68,8 +275,7 @@ class AuthService:
         Returns:
             bool: True if email is valid, False otherwise
         """
-        email_regex = r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$"
-        return re.match(email_regex, email) is not None
+        return bool(self.policy.check_email(email))
 
     def validate_password(self, password):
         """
@@ -81,20 +287,21 @@ class AuthService:
         Returns:
             bool: True if password meets requirements, False otherwise
         """
-        # Check length
-        if len(password) < 8:
-            return False
+        return bool(self.policy.check_password(password))
 
-        # Check for complexity
-        criteria = [
-            re.search(r"[A-Z]", password),  # Uppercase
-            re.search(r"[a-z]", password),  # Lowercase
-            re.search(r"\d", password),  # Digit
-            re.search(r'[!@#$%^&*(),.?":{}|<>]', password),  # Special character
-        ]
+    def check_password(self, password):
+        """
+        Check password strength rule by rule
+
+        Args:
+            password (str): Password to check
 
-        return all(criteria)
+        Returns:
+            ValidationResult: Truthy when valid; `failures` and `message` describe the failed rules
+        """
+        return self.policy.check_password(password)
 
+    @_after_load
     def email_exists(self, email):
         """
         Check if email already exists in accounts
@@ -105,8 +312,48 @@ class AuthService:
         Returns:
             bool: True if email exists, False otherwise
         """
-        return email in self.accounts
+        return email in self.store
+
+    @_after_load
+    def get_by_id(self, account_id):
+        """
+        Find an account by its id
+
+        Args:
+            account_id (str): Account id, as returned by register_account or login
+
+        Returns:
+            tuple or None: (email, account record), or None if no account has that id
+        """
+        return self.store.get_by_id(account_id)
+
+    @_after_load
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        List accounts created in [start, end), oldest first
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of accounts
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        return self.store.created_between(start, end, limit)
+
+    @_after_load
+    def locked_accounts(self):
+        """
+        List accounts that are currently locked out
 
+        Returns:
+            list: (email, account record) pairs
+        """
+        return self.store.locked_accounts()
+
+    @_after_load
+    @REGISTRY.timed("auth_register_account", "account registrations")
     def register_account(self, email, password):
         """
         Register a new account
@@ -120,7 +367,7 @@ class AuthService:
         """
         # Validate email and password
         if not self.validate_email(email):
-            self.logger.warning(f"Invalid email format: {email}")
+            self.logger.warning("Invalid email format: %s", email)
             return False, "Invalid email format"
 
         if not self.validate_password(password):
@@ -129,7 +376,7 @@ class AuthService:
 
         # Check if email already exists
         if self.email_exists(email):
-            self.logger.warning(f"Email already registered: {email}")
+            self.logger.warning("Email already registered: %s", email)
             return False, "Email already registered"
 
         # Generate unique ID and hash password
@@ -137,7 +384,7 @@ class AuthService:
         hashed_password = self._hash_password(password)
 
         # Store account
-        self.accounts[email] = {
+        self.store[email] = {
             "id": account_id,
             "password": hashed_password,
             "created_at": datetime.now().isoformat(),
@@ -145,12 +392,41 @@ class AuthService:
             "locked_until": None,
         }
 
-        # Save accounts
-        self.save_accounts()
-
-        self.logger.info(f"Account registered: {email}")
+        self.logger.info("Account registered: %s", email)
         return True, account_id
 
+    @_after_load
+    def import_accounts(self, rows, batch_size=DEFAULT_BATCH_SIZE, workers=None, max_errors=1000):
+        """
+        Register accounts in bulk, validating and committing one batch at a time
+
+        Args:
+            rows: Iterable of dicts with "email" and either "password" or "password_hash"
+            batch_size (int): Rows validated, hashed and committed together
+            workers (int, optional): Password hashing threads, defaults to the CPU count
+            max_errors (int): Per-row errors kept in the report
+
+        Returns:
+            ImportReport: Counts, per-row errors and throughput
+        """
+        return import_accounts(self, rows, batch_size, workers, max_errors)
+
+    @_after_load
+    def export_accounts(self, stream, format="jsonl"):
+        """
+        Write every account to a text stream
+
+        Args:
+            stream: Text stream to write to
+            format (str): "jsonl" or "csv"
+
+        Returns:
+            int: Number of accounts written
+        """
+        return export_accounts(self.store, stream, format)
+
+    @_after_load
+    @REGISTRY.timed("auth_login", "login attempts")
     def login(self, email, password):
         """
         Attempt to log in with email and password
@@ -162,50 +438,67 @@ class AuthService:
         Returns:
             tuple: (Success boolean, Message or Account ID)
         """
+        # A lock already known in memory is reported as such, not as rate limiting
+        locked_until = self.lockout.locked_until(email)
+        if locked_until is not None:
+            self.logger.warning("Login attempt on locked account: %s", email)
+            return False, f"Account locked. Try again after {datetime.fromtimestamp(locked_until)}"
+
+        # Fail fast on floods, before touching the store or the hasher
+        if self.rate_limiter is not None and not self.rate_limiter.acquire(email):
+            self.logger.debug("Rate limited login attempt: %s", email)
+            return False, "Too many login attempts. Try again later."
+
         # Check if email exists
-        if not self.email_exists(email):
-            self.logger.warning(f"Login attempt with non-existent email: {email}")
+        account = self.store.get(email)
+        if account is None:
+            self.logger.warning("Login attempt with non-existent email: %s", email)
             return False, "Email not found"
 
-        account = self.accounts[email]
-
         # Check if account is locked
-        if account.get("locked_until"):
-            locked_until = datetime.fromisoformat(account["locked_until"])
-            if datetime.now() < locked_until:
-                self.logger.warning(f"Login attempt on locked account: {email}")
-                return False, f"Account locked. Try again after {locked_until}"
+        locked_until = self._locked_until(email, account)
+        if locked_until is not None:
+            self.logger.warning("Login attempt on locked account: %s", email)
+            return False, f"Account locked. Try again after {datetime.fromtimestamp(locked_until)}"
 
         # Verify password
         stored_hashed_password = account["password"]
-        input_hashed_password = self._hash_password(password)
-
-        if stored_hashed_password != input_hashed_password:
-            # Increment login attempts
-            account["login_attempts"] = account.get("login_attempts", 0) + 1
-
-            # Lock account after max attempts
-            if account["login_attempts"] >= self.MAX_LOGIN_ATTEMPTS:
-                lock_duration = timedelta(minutes=15)
-                account["locked_until"] = (datetime.now() + lock_duration).isoformat()
+        if not self.hasher.verify(password, stored_hashed_password):
+            # Count the attempt in memory; persist only an applied lock
+            login_attempts, locked_until = self.lockout.record_failure(email)
+            if locked_until is not None:
+                self.store.update_fields(
+                    email,
+                    login_attempts=login_attempts,
+                    locked_until=datetime.fromtimestamp(locked_until).isoformat(),
+                )
                 self.logger.warning(
-                    f"Account locked due to multiple failed attempts: {email}"
+                    "Account locked due to multiple failed attempts: %s", email
                 )
-                self.save_accounts()
-                return False, "Too many failed attempts. Account locked for 15 minutes."
+                minutes = round(self.lockout.lock_duration / 60)
+                return False, f"Too many failed attempts. Account locked for {minutes} minutes."
 
-            self.save_accounts()
-            self.logger.warning(f"Incorrect password for email: {email}")
+            self.logger.warning("Incorrect password for email: %s", email)
             return False, "Incorrect password"
 
-        # Reset login attempts on successful login
-        account["login_attempts"] = 0
-        account["locked_until"] = None
-        self.save_accounts()
+        # Reset login attempts on successful login, writing only to clear a persisted lock
+        self.lockout.clear(email)
+        fields = {}
+        if account.get("login_attempts") or account.get("locked_until"):
+            fields.update(login_attempts=0, locked_until=None)
 
-        self.logger.info(f"Successful login: {email}")
+        # Upgrade legacy SHA-256 hashes and hashes made with an older cost
+        if self.hasher.needs_rehash(stored_hashed_password):
+            fields["password"] = self._hash_password(password)
+            self.logger.info("Upgraded password hash: %s", email)
+        if fields:
+            self.store.update_fields(email, **fields)
+
+        self.logger.info("Successful login: %s", email)
         return True, account["id"]
 
+    @_after_load
+    @REGISTRY.timed("auth_update_account", "account updates")
     def update_account(self, old_email, new_email, new_password):
         """
         Update account details
@@ -220,7 +513,7 @@ class AuthService:
         """
         # Validate new email and password
         if not self.validate_email(new_email):
-            self.logger.warning(f"Invalid new email format: {new_email}")
+            self.logger.warning("Invalid new email format: %s", new_email)
             return False, "Invalid email format"
 
         if not self.validate_password(new_password):
@@ -229,34 +522,45 @@ class AuthService:
 
         # Check if new email is already in use (by a different account)
         if new_email != old_email and self.email_exists(new_email):
-            self.logger.warning(f"Email already registered: {new_email}")
+            self.logger.warning("Email already registered: %s", new_email)
             return False, "Email already registered"
 
-        # Remove old email entry if changed
-        if old_email != new_email:
-            account_data = self.accounts.pop(old_email)
-        else:
-            account_data = self.accounts[old_email]
-
-        # Update with new details
+        # Update with new details, storing under the new email
         hashed_password = self._hash_password(new_password)
-        account_data["password"] = hashed_password
+        self.store.rename(old_email, new_email, password=hashed_password)
+        account_data = self.store[new_email]
 
-        # Store under new email
-        self.accounts[new_email] = account_data
-        self.save_accounts()
-
-        self.logger.info(f"Account updated: {old_email} -> {new_email}")
+        self.logger.info("Account updated: %s -> %s", old_email, new_email)
         return True, account_data["id"]
 
+    def _locked_until(self, email, account):
+        """
+        Deadline of an active lock, from the tracker or, for locks persisted
+        by an earlier run, from the account record
+
+        Args:
+            email (str): Account email
+            account (dict): Account record
+
+        Returns:
+            float or None: Lock deadline as epoch seconds, None if not locked
+        """
+        locked_until = self.lockout.locked_until(email)
+        if locked_until is None and account.get("locked_until"):
+            persisted = datetime.fromisoformat(account["locked_until"]).timestamp()
+            if persisted > time.time():
+                self.lockout.lock(email, persisted)
+                locked_until = persisted
+        return locked_until
+
     def _hash_password(self, password):
         """
-        Hash password using SHA-256
+        Hash password with the configured salted KDF
 
         Args:
             password (str): Password to hash
 
         Returns:
-            str: Hashed password
+            str: Versioned password hash
         """
-        return hashlib.sha256(password.encode()).hexdigest()
+        return self.hasher.hash(password)
@@ -9,9 +9,10 @@ from PyQt6.QtWidgets import (
     QMessageBox,
 )
 from PyQt6.QtCore import Qt
+from src.mixins.submit_button_mixin import SubmitButtonMixin
 
 
-class BaseAuthForm(QWidget):
+class BaseAuthForm(QWidget, SubmitButtonMixin):
     """
     Base widget forauth-related pages.
 
@@ -45,14 +46,12 @@ class BaseAuthForm(QWidget):
 
         # Email input
         self.email_input = QLineEdit()
-        self.email_input.textChanged.connect(self.validate_email)
         self.email_error = QLabel()
         self.email_error.setStyleSheet("color: red")
 
         # Password input
         self.password_input = QLineEdit()
         self.password_input.setEchoMode(QLineEdit.EchoMode.Password)
-        self.password_input.textChanged.connect(self.validate_password)
         self.password_error = QLabel()
         self.password_error.setStyleSheet("color: red")
 
@@ -76,70 +75,75 @@ class BaseAuthForm(QWidget):
         # Storeauth service
         self.auth_service =auth_service
 
-    def validate_email(self) -> None:
+        # Debounced validation; labels and the button change only with results
+        self._setup_validation()
+
+    def _validated_fields(self):
         """
-        Validate email input and update UI accordingly.
+        Validate both fields, showing errors next to them.
         """
-        email = self.email_input.text()
-        is_valid = self.auth_service.validate_email(email)
+        return (
+            ("email", self.email_input, self._check_email, self.show_email_result),
+            ("password", self.password_input, self._check_password, self.show_password_result),
+        )
 
-        if not email:
-            self.email_error.setText("")
-            self.email_input.setStyleSheet("")
-        elif not is_valid:
+    def _check_email(self, email):
+        # Empty fields show no error yet
+        return self.auth_service.validate_email(email) if email else None
+
+    def _check_password(self, password):
+        return self.auth_service.check_password(password) if password else None
+
+    def show_email_result(self, is_valid) -> None:
+        """
+        Update the email field for a new validation result.
+
+        Args:
+            is_valid (bool or None): Validation result, None for an empty field
+        """
+        if is_valid is False:
             self.email_error.setText("Invalid email format")
             self.email_input.setStyleSheet("border: 2px solid red")
         else:
             self.email_error.setText("")
             self.email_input.setStyleSheet("")
 
-        self.update_submit_button()
-
-    def validate_password(self) -> None:
-        """
-        Validate password input and update UI accordingly.
+    def show_password_result(self, result) -> None:
         """
-        password = self.password_input.text()
-        is_valid = self.auth_service.validate_password(password)
+        Update the password field for a new validation result.
 
-        if not password:
-            self.password_error.setText("")
-            self.password_input.setStyleSheet("")
-        elif not is_valid:
-            self.password_error.setText(
-                "Weak password. Requires 8+ chars, 1 upper, 1 lower, 1 digit, 1 special char"
-            )
+        Args:
+            result (ValidationResult or None): Validation result, None for an empty field
+        """
+        if result is not None and not result:
+            # Lists only the rules this password fails, as configured
+            self.password_error.setText(f"Weak password. {result.message}")
             self.password_input.setStyleSheet("border: 2px solid red")
         else:
             self.password_error.setText("")
             self.password_input.setStyleSheet("")
 
-        self.update_submit_button()
-
-    def update_submit_button(self) -> None:
+    def submit_form(self) -> None:
         """
-        Enable/disable submit button based on input validity.
+        Submit the form through the SubmitButtonMixin engine.
         """
-        email = self.email_input.text()
-        password = self.password_input.text()
-
-        email_valid = self.auth_service.validate_email(email)
-        password_valid = self.auth_service.validate_password(password)
+        self._submit_clicked()
 
-        self.submit_button.setEnabled(email_valid and password_valid)
-
-    def submit_form(self) -> None:
+    async def _on_submit(self) -> None:
         """
         Handle form submission based on mode (register or login).
+
+        The auth call runs as a QRunnable; the window keeps painting
+        while it is awaited.
         """
         email = self.email_input.text()
         password = self.password_input.text()
 
         try:
             if self.is_register:
-                success, message = self.auth_service.register_account(email, password)
+                success, message = await self.submit(self.auth_service.register_account, email, password)
             else:
-                success, message = self.auth_service.login(email, password)
+                success, message = await self.submit(self.auth_service.login, email, password)
 
             if success:
                 # Success message
@@ -157,7 +161,7 @@ class BaseAuthForm(QWidget):
 
         except Exception as e:
             # Log and show unexpected errors
-            self.logger.error(f"Authentication error: {e}")
+            self.logger.error("Authentication error: %s", e)
             QMessageBox.critical(
                 self, "Critical Error", f"An unexpected error occurred: {e}"
             )
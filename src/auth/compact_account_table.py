@@ -0,0 +1,477 @@
+import sys
+from array import array
+from datetime import datetime, timedelta
+from collections.abc import Mapping, MutableMapping
+
+from .password_hasher import join_hash, split_hash
+
+# Fixed account fields, in the order AuthService creates them
+FIELDS = ("id", "password", "created_at", "login_attempts", "locked_until")
+_FIELD_BITS = {field: 1 << position for position, field in enumerate(FIELDS)}
+# Set in a row's field bitmask while the row holds an account
+_LIVE = 0x80
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_NO_TIME = -(2 ** 63)
+_NO_DOMAIN = 2 ** 32 - 1
+
+_EMPTY = 0
+_DELETED = -1
+
+
+def _encode_time(value):
+    """
+    Pack a naive ISO timestamp into microseconds since the epoch
+
+    Args:
+        value (str): Timestamp from datetime.isoformat()
+
+    Returns:
+        int: Microseconds since 1970-01-01
+
+    Raises:
+        ValueError: If the value would not round-trip exactly
+    """
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None or moment.isoformat() != value:
+        raise ValueError(value)
+    return (moment - _EPOCH) // _MICROSECOND
+
+
+def _decode_time(value):
+    return (_EPOCH + value * _MICROSECOND).isoformat()
+
+
+def _format_uuid(raw):
+    digits = raw.hex()
+    return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+class AccountRecord(Mapping):
+    """
+    Read-only dict-style view of one row of a CompactAccountTable.
+
+    A view becomes invalid (raises KeyError) once its account is deleted,
+    even if the row is later reused (the row generation wraps after 65536
+    deletions).
+    """
+
+    __slots__ = ("_table", "_row", "_generation")
+
+    def __init__(self, table, row):
+        self._table = table
+        self._row = row
+        self._generation = table._generations[row]
+
+    def _check(self):
+        if self._table._generations[self._row] != self._generation:
+            raise KeyError("Account was removed from the table")
+
+    def __getitem__(self, field):
+        self._check()
+        return self._table._get_field(self._row, field)
+
+    def __iter__(self):
+        self._check()
+        return iter(self._table._row_fields(self._row))
+
+    def __len__(self):
+        self._check()
+        return len(self._table._row_fields(self._row))
+
+    def __repr__(self):
+        return f"AccountRecord({dict(self)!r})"
+
+
+class CompactAccountTable(MutableMapping):
+    """
+    Memory-compact account table stored as parallel typed arrays.
+
+    Each account is one row: a 16-byte binary id, a 32-byte raw password
+    digest with its 16-byte salt and a one-byte interned hash parameter
+    prefix (none for legacy SHA-256 hex digests), an epoch-microsecond
+    creation time, a one-byte attempt counter and an email split into
+    local-part bytes plus an interned domain. Lock deadlines, set on few
+    accounts at a time, live in a dict keyed by row. An open-addressing
+    table of row numbers replaces the dict of dicts.
+    Values that do not pack exactly (non-UUID ids, other hash formats,
+    extra fields) are kept per row in a small overflow dict, so every
+    record round-trips unchanged.
+
+    Lookups return AccountRecord views; assigning a dict replaces a row.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty table
+        """
+        # Email columns
+        self._locals = bytearray()
+        self._local_offsets = array("I")
+        self._local_lengths = array("H")
+        self._domain_ids = array("I")
+        self._domains = []
+        self._domain_numbers = {}
+        self._dead_bytes = 0
+
+        # Account columns
+        self._ids = bytearray()
+        self._digests = bytearray()
+        self._salts = bytearray()
+        self._hash_format_ids = array("B")
+        # Format 0 is a legacy SHA-256 hex digest
+        self._hash_formats = [None]
+        self._hash_format_numbers = {}
+        self._created = array("q")
+        self._attempts = array("B")
+        self._locks = {}
+        self._fields = bytearray()
+        self._overflow = {}
+
+        # Row bookkeeping
+        self._generations = array("H")
+        self._free_rows = array("I")
+        self._slots = array("i", [_EMPTY] * 8)
+        self._used_slots = 0
+        self._count = 0
+
+    # -- email handling -------------------------------------------------
+
+    def _split(self, email):
+        """
+        Split an email into local-part bytes and an interned domain number
+
+        Args:
+            email (str): Email to split
+
+        Returns:
+            tuple: (local bytes, domain number)
+        """
+        local, at, domain = email.rpartition("@")
+        if not at:
+            return email.encode("utf-8"), _NO_DOMAIN
+        number = self._domain_numbers.get(domain)
+        if number is None:
+            number = len(self._domains)
+            self._domains.append(sys.intern(domain))
+            self._domain_numbers[domain] = number
+        return local.encode("utf-8"), number
+
+    def _email_at(self, row):
+        """
+        Rebuild the email stored in a row
+
+        Args:
+            row (int): Row number
+
+        Returns:
+            str: Email
+        """
+        offset = self._local_offsets[row]
+        local = self._locals[offset:offset + self._local_lengths[row]].decode("utf-8")
+        domain = self._domain_ids[row]
+        if domain == _NO_DOMAIN:
+            return local
+        return f"{local}@{self._domains[domain]}"
+
+    # -- hash table -----------------------------------------------------
+
+    def _probe(self, email):
+        """
+        Find an email's slot
+
+        Args:
+            email (str): Email to find
+
+        Returns:
+            tuple: (slot of the email or None, first reusable slot)
+        """
+        mask = len(self._slots) - 1
+        slot = hash(email) & mask
+        reusable = None
+        while True:
+            entry = self._slots[slot]
+            if entry == _EMPTY:
+                return None, slot if reusable is None else reusable
+            if entry == _DELETED:
+                if reusable is None:
+                    reusable = slot
+            elif self._email_at(entry - 1) == email:
+                return slot, slot
+            slot = (slot + 1) & mask
+
+    def _resize(self):
+        """
+        Rebuild the hash table at a load factor of at most one half
+        """
+        size = 8
+        while size < self._count * 2:
+            size *= 2
+        old_slots = self._slots
+        self._slots = array("i", [_EMPTY]) * size
+        mask = size - 1
+        for entry in old_slots:
+            if entry > 0:
+                slot = hash(self._email_at(entry - 1)) & mask
+                while self._slots[slot] != _EMPTY:
+                    slot = (slot + 1) & mask
+                self._slots[slot] = entry
+        self._used_slots = self._count
+
+    def _row_of(self, email):
+        slot, _ = self._probe(email)
+        return None if slot is None else self._slots[slot] - 1
+
+    # -- row encoding ---------------------------------------------------
+
+    def _allocate_row(self):
+        """
+        Reuse a freed row or append a new one
+
+        Returns:
+            int: Row number
+        """
+        if self._free_rows:
+            return self._free_rows.pop()
+        row = len(self._generations)
+        self._local_offsets.append(0)
+        self._local_lengths.append(0)
+        self._domain_ids.append(_NO_DOMAIN)
+        self._ids.extend(bytes(16))
+        self._digests.extend(bytes(32))
+        self._salts.extend(bytes(16))
+        self._hash_format_ids.append(0)
+        self._created.append(_NO_TIME)
+        self._attempts.append(0)
+        self._fields.append(0)
+        self._generations.append(0)
+        return row
+
+    def _store_email(self, row, email):
+        local, domain = self._split(email)
+        if len(local) > 0xFFFF or len(self._locals) > 0xFFFFFFFF - len(local):
+            raise ValueError("Email local part too long")
+        self._local_offsets[row] = len(self._locals)
+        self._local_lengths[row] = len(local)
+        self._domain_ids[row] = domain
+        self._locals.extend(local)
+
+    def _write_row(self, row, account):
+        """
+        Pack an account record into a row
+
+        Args:
+            row (int): Row number
+            account (Mapping): Account record
+        """
+        overflow = {}
+        present = _LIVE
+        self._locks.pop(row, None)
+        for field, value in account.items():
+            if field not in _FIELD_BITS:
+                overflow[field] = value
+                continue
+            present |= _FIELD_BITS[field]
+            try:
+                self._pack(row, field, value)
+            except (ValueError, TypeError, AttributeError):
+                overflow[field] = value
+
+        self._fields[row] = present
+        if overflow:
+            self._overflow[row] = overflow
+        else:
+            self._overflow.pop(row, None)
+
+    def _pack(self, row, field, value):
+        """
+        Pack one field value into its column
+
+        Raises:
+            ValueError: If the value cannot be packed exactly
+        """
+        if field == "id":
+            packed = bytes.fromhex(value.replace("-", ""))
+            if len(packed) != 16 or _format_uuid(packed) != value:
+                raise ValueError(value)
+            self._ids[row * 16:row * 16 + 16] = packed
+        elif field == "password":
+            if value.startswith("$"):
+                prefix, salt, digest = split_hash(value)
+                if len(salt) != 16 or join_hash(prefix, salt, digest) != value:
+                    raise ValueError(value)
+                hash_format = self._hash_format_numbers.get(prefix)
+                if hash_format is None:
+                    if len(self._hash_formats) > 0xFF:
+                        raise ValueError(value)
+                    hash_format = self._hash_format_numbers[prefix] = len(self._hash_formats)
+                    self._hash_formats.append(prefix)
+                self._salts[row * 16:row * 16 + 16] = salt
+            else:
+                hash_format, digest = 0, bytes.fromhex(value)
+                if digest.hex() != value:
+                    raise ValueError(value)
+            if len(digest) != 32:
+                raise ValueError(value)
+            self._digests[row * 32:row * 32 + 32] = digest
+            self._hash_format_ids[row] = hash_format
+        elif field == "created_at":
+            self._created[row] = _encode_time(value)
+        elif field == "login_attempts":
+            if type(value) is not int or not 0 <= value <= 255:
+                raise ValueError(value)
+            self._attempts[row] = value
+        elif field == "locked_until":
+            if value is not None:
+                self._locks[row] = _encode_time(value)
+
+    def _get_field(self, row, field):
+        """
+        Unpack one field of a row
+
+        Raises:
+            KeyError: If the row has no such field
+        """
+        overflow = self._overflow.get(row)
+        if overflow is not None and field in overflow:
+            return overflow[field]
+        bit = _FIELD_BITS.get(field)
+        if bit is None or not self._fields[row] & bit:
+            raise KeyError(field)
+
+        if field == "id":
+            return _format_uuid(self._ids[row * 16:row * 16 + 16])
+        if field == "password":
+            digest = self._digests[row * 32:row * 32 + 32]
+            prefix = self._hash_formats[self._hash_format_ids[row]]
+            if prefix is None:
+                return digest.hex()
+            return join_hash(prefix, self._salts[row * 16:row * 16 + 16], digest)
+        if field == "created_at":
+            return _decode_time(self._created[row])
+        if field == "login_attempts":
+            return self._attempts[row]
+        locked = self._locks.get(row)
+        return None if locked is None else _decode_time(locked)
+
+    def _row_fields(self, row):
+        """
+        Field names of a row, fixed fields first
+
+        Returns:
+            list: Field names
+        """
+        present = self._fields[row]
+        fields = [field for field in FIELDS if present & _FIELD_BITS[field]]
+        overflow = self._overflow.get(row)
+        if overflow:
+            fields.extend(field for field in overflow if field not in _FIELD_BITS)
+        return fields
+
+    # -- mapping interface ----------------------------------------------
+
+    def __getitem__(self, email):
+        row = self._row_of(email)
+        if row is None:
+            raise KeyError(email)
+        return AccountRecord(self, row)
+
+    def __contains__(self, email):
+        return self._row_of(email) is not None
+
+    def __setitem__(self, email, account):
+        slot, free_slot = self._probe(email)
+        if slot is not None:
+            self._write_row(self._slots[slot] - 1, dict(account))
+            return
+
+        row = self._allocate_row()
+        self._store_email(row, email)
+        self._write_row(row, account)
+        if self._slots[free_slot] == _EMPTY:
+            self._used_slots += 1
+        self._slots[free_slot] = row + 1
+        self._count += 1
+        if self._used_slots * 2 > len(self._slots):
+            self._resize()
+
+    def __delitem__(self, email):
+        slot, _ = self._probe(email)
+        if slot is None:
+            raise KeyError(email)
+        row = self._slots[slot] - 1
+        self._slots[slot] = _DELETED
+        self._count -= 1
+
+        self._dead_bytes += self._local_lengths[row]
+        self._overflow.pop(row, None)
+        self._locks.pop(row, None)
+        self._fields[row] = 0
+        self._generations[row] = (self._generations[row] + 1) & 0xFFFF
+        self._free_rows.append(row)
+        if self._dead_bytes > len(self._locals) // 2 > 4096:
+            self._compact_locals()
+
+    def pop(self, email, *default):
+        """
+        Remove an account and return it as a plain dict, since a view of
+        the removed row is no longer valid
+
+        Args:
+            email (str): Email to remove
+            *default: Value returned when the email is missing
+
+        Returns:
+            dict: The removed account record
+        """
+        if email not in self and default:
+            return default[0]
+        account = dict(self[email])
+        del self[email]
+        return account
+
+    def popitem(self):
+        for email in self:
+            return email, self.pop(email)
+        raise KeyError("popitem(): table is empty")
+
+    def __iter__(self):
+        # Row order is insertion order until deleted rows are reused
+        fields = self._fields
+        for row in range(len(fields)):
+            if fields[row] & _LIVE:
+                yield self._email_at(row)
+
+    def __len__(self):
+        return self._count
+
+    def _compact_locals(self):
+        """
+        Drop local-part bytes of deleted rows
+        """
+        locals_ = bytearray()
+        for row, present in enumerate(self._fields):
+            if present & _LIVE:
+                offset = self._local_offsets[row]
+                self._local_offsets[row] = len(locals_)
+                locals_.extend(self._locals[offset:offset + self._local_lengths[row]])
+        self._locals = locals_
+        self._dead_bytes = 0
+
+    def copy(self):
+        """
+        Copy the table; costs a few array copies, not one object per account
+
+        Returns:
+            CompactAccountTable: Independent copy
+        """
+        table = CompactAccountTable.__new__(CompactAccountTable)
+        for name, value in self.__dict__.items():
+            if isinstance(value, (bytearray, array, list)):
+                value = value[:]
+            elif isinstance(value, dict):
+                value = {key: dict(item) if isinstance(item, dict) else item for key, item in value.items()}
+            setattr(table, name, value)
+        return table
+
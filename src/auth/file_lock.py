@@ -0,0 +1,115 @@
+import os
+import logging
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def stat_fingerprint(path):
+    """
+    Identity of a file's current contents from a single stat call
+
+    Atomic replaces change the inode, appends change the size, and
+    in-place rewrites change the modification time.
+
+    Args:
+        path (str): File to fingerprint
+
+    Returns:
+        tuple or None: (inode, size, mtime_ns), or None if the file is missing
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+class FileLock:
+    """
+    Advisory lock shared by every process using the same lock file.
+
+    Readers take the lock shared and read-modify-write sequences take it
+    exclusive (`fcntl.flock`). Within a process the lock is reentrant per
+    thread and also serializes threads, so nested store calls can take it
+    again freely; only the outermost acquisition touches the file lock.
+
+    Without `fcntl` (Windows) only the in-process serialization remains.
+    """
+
+    def __init__(self, path):
+        """
+        Initialize the lock
+
+        Args:
+            path (str): Lock file, created on first use
+        """
+        self.logger = logging.getLogger(__name__)
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._fd = None
+        self._depth = 0
+        self._exclusive = False
+
+        if fcntl is None:
+            self.logger.warning("fcntl is unavailable; account file locking is limited to this process")
+
+    def _flock(self, exclusive):
+        if fcntl is None:
+            return
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    @contextmanager
+    def _hold(self, exclusive):
+        with self._thread_lock:
+            # Nested shared requests ride on whatever is held; a nested
+            # exclusive request upgrades a shared hold for its duration
+            upgrade = self._depth > 0 and exclusive and not self._exclusive
+            if self._depth == 0 or upgrade:
+                self._flock(exclusive)
+                previous, self._exclusive = self._exclusive, exclusive
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if upgrade:
+                    self._flock(False)
+                    self._exclusive = previous
+                elif self._depth == 0:
+                    if fcntl is not None:
+                        fcntl.flock(self._fd, fcntl.LOCK_UN)
+                    self._exclusive = False
+
+    def shared(self):
+        """
+        Hold the lock for reading
+
+        Returns:
+            Context manager holding the lock shared
+        """
+        return self._hold(False)
+
+    def exclusive(self):
+        """
+        Hold the lock for a read-modify-write sequence
+
+        Returns:
+            Context manager holding the lock exclusively
+        """
+        return self._hold(True)
+
+    def close(self):
+        """
+        Close the lock file
+        """
+        with self._thread_lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
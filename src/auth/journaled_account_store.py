@@ -0,0 +1,435 @@
+import os
+import json
+import threading
+from contextlib import contextmanager
+
+from .account_index import IndexedAccounts
+from .account_store import SAVE_SECONDS, WRITTEN_BYTES, JsonAccountStore, _file_size
+from .atomic_file import sync_directory, sync_file
+from .file_lock import stat_fingerprint
+
+
+def _entry_emails(entry):
+    if entry["op"] == "rename":
+        return entry["old"], entry["new"]
+    return (entry["email"],)
+
+
+class JournaledAccountStore(JsonAccountStore):
+    """
+    JSON account store that records mutations in an append-only log.
+
+    Every register, attempt counter bump, lock, unlock or email rename is
+    appended to `<storage_path>.wal` as one compact JSON line, so a write
+    costs the size of the change instead of the size of the store. On load
+    the log is replayed on top of the last JSON snapshot, and once the log
+    passes `compact_threshold` bytes a background thread folds it into a
+    new snapshot.
+
+    Log entries always carry absolute values (whole records or the new
+    value of each changed field), so replaying a log over a snapshot that
+    already contains some of its entries is harmless.
+
+    The durability level applies to each log append; with a commit
+    interval, appends are group-committed and the log is synced once per
+    window.
+
+    With `shared` enabled the log doubles as the change feed between
+    processes: each append holds the exclusive file lock, first applies
+    whatever other processes appended since our last read position and
+    then writes through to the file, and refresh() applies only the new
+    entries. A compaction by another process is detected by the log's
+    inode changing; the rest of the rotated log is read if it is still
+    there, otherwise the new snapshot is reloaded. Compactions hold the
+    lock until the snapshot is written.
+    """
+
+    DEFAULT_COMPACT_THRESHOLD = 1024 * 1024
+
+    def __init__(
+        self,
+        storage_path="accounts.json",
+        compact_threshold=DEFAULT_COMPACT_THRESHOLD,
+        durability="flush",
+        commit_interval=0,
+        index=False,
+        lazy=False,
+        compact_table=False,
+        shared=False,
+        **codec_options,
+    ):
+        """
+        Initialize the journaled account store
+
+        Args:
+            storage_path (str): Path to the accounts JSON snapshot
+            compact_threshold (int): Log size in bytes that triggers compaction
+            durability (str): "none", "flush", "fsync" or "fsync+dir"
+            commit_interval (float): Group commit window in seconds, 0 to sync every append
+            index (bool): Keep a memory-mapped sidecar index next to the snapshot
+            lazy (bool): Stream snapshot offsets at startup and parse accounts on first access
+            compact_table (bool): Keep accounts in a CompactAccountTable
+            shared (bool): Coordinate with other processes using the same files
+            **codec_options: serializer, compression and compression_level of snapshots
+        """
+        super().__init__(
+            storage_path,
+            durability=durability,
+            commit_interval=commit_interval,
+            index=index,
+            lazy=lazy,
+            compact_table=compact_table,
+            shared=shared,
+            **codec_options,
+        )
+        self.journal_path = f"{storage_path}.wal"
+        self.compacting_path = f"{storage_path}.wal.compacting"
+        self.compact_threshold = compact_threshold
+
+        self._journal = None
+        self._journal_size = 0
+        self._journal_inode = None
+        self._compactor = None
+
+    @property
+    def journal_size(self):
+        """
+        Size in bytes of the active log
+        """
+        return self._journal_size
+
+    def load(self):
+        """
+        Load the last snapshot and replay pending log entries on top of it
+        """
+        with self._locked(exclusive=False), self._lock:
+            replayed = self._reload()
+            if replayed:
+                self.logger.info("Replayed %s journal entries", replayed)
+
+            self._open_journal()
+            pending = os.path.exists(self.compacting_path)
+
+        if pending or self._journal_size >= self.compact_threshold:
+            self._start_compaction()
+
+    def _reload(self):
+        """
+        Load the snapshot and replay both logs on top of it; call with _lock held
+
+        Returns:
+            int: Number of log entries applied
+        """
+        if isinstance(self.accounts, IndexedAccounts):
+            self.accounts.close()
+        super().load()
+        return sum(self._replay(path) for path in (self.compacting_path, self.journal_path))
+
+    def _tail(self, path, offset, changed):
+        """
+        Apply the complete entries of a log from `offset` on
+
+        Args:
+            path (str): Log file
+            offset (int): Byte offset to read from
+            changed (set): Receives the emails the entries touched
+
+        Returns:
+            int: Bytes consumed
+        """
+        consumed = 0
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    entry = json.loads(line)
+                    self._apply(entry)
+                except (ValueError, KeyError) as e:
+                    self.logger.error("Stopping read of %s at corrupt entry: %s", path, e)
+                    break
+                changed.update(_entry_emails(entry))
+                consumed += len(line)
+        return consumed
+
+    def _sync_journal(self):
+        """
+        Apply entries other processes logged since our last read; call
+        with the file lock held
+
+        Returns:
+            set: Emails the applied entries touched
+        """
+        changed = set()
+        with self._lock:
+            current = stat_fingerprint(self.journal_path)
+            if current is not None and current[0] == self._journal_inode:
+                if current[1] > self._journal_size:
+                    self._journal_size += self._tail(self.journal_path, self._journal_size, changed)
+                return changed
+
+            # Another process rotated the log to compact it
+            self._journal.close()
+            rotated = stat_fingerprint(self.compacting_path)
+            if rotated is not None and rotated[0] == self._journal_inode:
+                self._tail(self.compacting_path, self._journal_size, changed)
+                self._tail(self.journal_path, 0, changed)
+            else:
+                # Already folded into a new snapshot
+                changed.update(self.accounts)
+                self._reload()
+                changed.update(self.accounts)
+            self._open_journal()
+
+        if changed:
+            self.logger.info("Applied %s account changes from another process", len(changed))
+        return changed
+
+    def refresh(self):
+        """
+        Apply log entries other processes appended since our last read
+
+        Returns:
+            set: Emails whose records changed, were added or were removed
+        """
+        if not self.shared:
+            return set()
+        with self._locked(exclusive=False):
+            return self._sync_journal()
+
+    @contextmanager
+    def _writing(self):
+        """
+        Hold the file lock and _lock for a mutation, after catching up
+        with other processes' log entries
+        """
+        with self._locked():
+            if self.shared:
+                self._sync_journal()
+            with self._lock:
+                yield
+
+    def _replay(self, path):
+        """
+        Apply every complete entry of a log file to the in-memory accounts
+
+        A torn final line left by a crash is dropped and cut off the file,
+        so later appends start on a clean line.
+
+        Args:
+            path (str): Log file to replay
+
+        Returns:
+            int: Number of entries applied
+        """
+        if not os.path.exists(path):
+            return 0
+
+        applied = 0
+        good_offset = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    self._apply(json.loads(line))
+                except (ValueError, KeyError) as e:
+                    self.logger.error("Stopping replay of %s at corrupt entry: %s", path, e)
+                    break
+                good_offset += len(line)
+                applied += 1
+
+        if good_offset != os.path.getsize(path):
+            self.logger.warning("Truncating incomplete journal tail in %s", path)
+            with open(path, "r+b") as f:
+                f.truncate(good_offset)
+        return applied
+
+    def _apply(self, entry):
+        """
+        Apply one log entry to the in-memory accounts
+
+        Args:
+            entry (dict): Decoded log entry
+        """
+        op = entry["op"]
+        if op == "put":
+            self._set_record(entry["email"], entry["account"])
+        elif op == "update":
+            account = self.accounts.get(entry["email"])
+            if account is not None:
+                self._set_record(entry["email"], {**account, **entry["fields"]})
+        elif op == "delete":
+            self._drop_record(entry["email"], None)
+        elif op == "rename":
+            self._drop_record(entry["old"], None)
+            self._set_record(entry["new"], entry["account"])
+        else:
+            raise KeyError(f"Unknown journal operation: {op}")
+
+    def _append(self, *entries):
+        """
+        Apply entries in memory and append them to the log as one commit
+
+        Args:
+            *entries (dict): Log entries to record
+        """
+        lines = "".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries)
+        with self._writing():
+            for entry in entries:
+                self._apply(entry)
+            self._journal.write(lines)
+            WRITTEN_BYTES.inc(len(lines))
+            if self.shared:
+                # Other processes read the log as soon as the lock is released
+                self._journal.flush()
+            self._journal_size += len(lines)
+            over_threshold = self._journal_size >= self.compact_threshold
+
+        self._changed()
+        if over_threshold:
+            self._start_compaction()
+
+    def _commit(self):
+        """
+        Sync appended log entries as far as the durability level requires
+        """
+        with self._lock, SAVE_SECONDS.time():
+            if self._journal is not None:
+                sync_file(self._journal, self.durability)
+
+    def close(self):
+        """
+        Wait for a running compaction, commit pending entries and close the log
+        """
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        super().close()
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def __setitem__(self, email, account):
+        self._append({"op": "put", "email": email, "account": dict(account)})
+
+    def __delitem__(self, email):
+        with self._writing():
+            if email not in self.accounts:
+                raise KeyError(email)
+            self._append({"op": "delete", "email": email})
+
+    def put_many(self, accounts):
+        """
+        Record several new or replaced accounts with one log commit
+
+        Args:
+            accounts (dict): Account records keyed by email
+        """
+        self._append(*(
+            {"op": "put", "email": email, "account": dict(account)}
+            for email, account in accounts.items()
+        ))
+
+    def update_fields(self, email, **fields):
+        """
+        Record a change to selected fields of an account
+
+        Args:
+            email (str): Email of the account to update
+            **fields: Field names and their new values
+        """
+        with self._writing():
+            if email not in self.accounts:
+                raise KeyError(email)
+            self._append({"op": "update", "email": email, "fields": fields})
+
+    def rename(self, old_email, new_email, **fields):
+        """
+        Record an account moving to a new email
+
+        Args:
+            old_email (str): Current email of the account
+            new_email (str): Email to store the account under
+            **fields: Field names and their new values
+        """
+        with self._writing():
+            account = {**self.accounts[old_email], **fields}
+            self._append({"op": "rename", "old": old_email, "new": new_email, "account": account})
+
+    def _start_compaction(self):
+        """
+        Start a background compaction unless one is already running
+        """
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(
+                target=self._compact_pending, name="account-journal-compactor", daemon=True
+            )
+            self._compactor.start()
+
+    def _compact_pending(self):
+        """
+        Compact unless another process already did while we waited for the lock
+        """
+        with self._locked():
+            if self.shared:
+                self._sync_journal()
+                if self._journal_size < self.compact_threshold and not os.path.exists(self.compacting_path):
+                    return
+            self.compact()
+
+    def compact(self):
+        """
+        Fold the log into a new snapshot
+
+        The active log is rotated aside and the accounts are captured under
+        the lock; the snapshot itself is written without blocking writers.
+        """
+        with self._locked(), self._save_lock:
+            with self._lock:
+                if self.shared:
+                    self._sync_journal()
+                sync_file(self._journal, self.durability)
+                self._rotate_journal()
+                snapshot = self._snapshot()
+                count = len(self.accounts)
+
+            try:
+                self._write_snapshot(snapshot)
+                WRITTEN_BYTES.inc(_file_size(self.storage_path))
+                os.remove(self.compacting_path)
+                self.logger.info("Compacted account journal into snapshot of %s accounts", count)
+            except OSError as e:
+                self.logger.error("Error compacting account journal: %s", e)
+
+    def _rotate_journal(self):
+        """
+        Move the active log aside and start an empty one
+        """
+        self._journal.close()
+        if os.path.exists(self.compacting_path):
+            # A previous compaction failed; keep its entries ahead of ours
+            with open(self.compacting_path, "ab") as pending, open(self.journal_path, "rb") as current:
+                pending.write(current.read())
+            os.remove(self.journal_path)
+        else:
+            os.replace(self.journal_path, self.compacting_path)
+        self._open_journal()
+
+    def _open_journal(self):
+        """
+        Open the active log for appending
+        """
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal_size = self._journal.tell()
+        self._journal_inode = os.fstat(self._journal.fileno()).st_ino
+        if self.durability == "fsync+dir":
+            sync_directory(os.path.dirname(os.path.abspath(self.journal_path)))
@@ -0,0 +1,76 @@
+import sys
+import importlib
+import importlib.util
+import threading
+
+_lock = threading.Lock()
+
+
+def lazy_module(name):
+    """
+    Module whose code runs on first attribute access.
+
+    The module is found and registered in sys.modules now, so a later
+    `import name` gets the same object, but its body only executes when
+    an attribute is first read (importlib.util.LazyLoader). Parent
+    packages are imported normally.
+
+    Args:
+        name (str): Absolute module name
+
+    Returns:
+        module: Lazily loading module, or the module itself if already imported
+
+    Raises:
+        ModuleNotFoundError: If the module does not exist
+    """
+    with _lock:
+        module = sys.modules.get(name)
+        if module is not None:
+            return module
+        spec = importlib.util.find_spec(name)
+        if spec is None:
+            raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+        loader = importlib.util.LazyLoader(spec.loader)
+        spec.loader = loader
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        loader.exec_module(module)
+        return module
+
+
+def optional_module(name):
+    """
+    Lazily loading module if it is installed, without importing it yet
+
+    Replaces `try: import name / except ImportError: name = None` for
+    optional dependencies that are only used by some configurations.
+
+    Args:
+        name (str): Absolute module name
+
+    Returns:
+        module or None: Lazily loading module, None if not installed
+    """
+    try:
+        return lazy_module(name)
+    except ModuleNotFoundError:
+        return None
+
+
+def lazy_factory(module_name, attribute):
+    """
+    Callable that imports `module_name` on its first call and calls its
+    `attribute`, e.g. a page class built only when the page is shown
+
+    Args:
+        module_name (str): Absolute module name
+        attribute (str): Callable in that module
+
+    Returns:
+        callable: Forwards its arguments to the imported callable
+    """
+    def factory(*args, **kwargs):
+        return getattr(importlib.import_module(module_name), attribute)(*args, **kwargs)
+    factory.__qualname__ = f"{module_name}.{attribute}"
+    return factory
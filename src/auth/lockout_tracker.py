@@ -0,0 +1,259 @@
+import os
+import json
+import time
+import heapq
+import logging
+import threading
+
+from .atomic_file import GroupCommitter, atomic_write
+
+
+class LockoutTracker:
+    """
+    In-memory failed-login counters and account locks.
+
+    Counters expire `attempt_ttl` seconds after the last failure and locks
+    expire at their deadline. Both are checked on access, so lookups are a
+    single dict probe; a min-heap of deadlines lets expired entries be
+    swept without scanning every tracked email.
+
+    The state is checkpointed to a sidecar file at most once per
+    `checkpoint_interval`, so a brute-force loop costs one small write per
+    interval instead of one store write per attempt, and counters survive
+    a restart.
+    """
+
+    def __init__(
+        self,
+        max_attempts=5,
+        lock_duration=900,
+        attempt_ttl=900,
+        checkpoint_path=None,
+        checkpoint_interval=5.0,
+        clock=time.time,
+    ):
+        """
+        Initialize the lockout tracker
+
+        Args:
+            max_attempts (int): Failed attempts that lock an account
+            lock_duration (float): Lock length in seconds
+            attempt_ttl (float): Seconds after the last failure before a counter resets
+            checkpoint_path (str, optional): Sidecar file for checkpoints, None to keep state in memory only
+            checkpoint_interval (float): Minimum seconds between checkpoints, 0 to checkpoint only on close
+            clock (callable): Returns the current time as epoch seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.max_attempts = max_attempts
+        self.lock_duration = lock_duration
+        self.attempt_ttl = attempt_ttl
+        self.checkpoint_path = checkpoint_path
+        self.clock = clock
+
+        self._attempts = {}     # email -> (failed attempts, expiry)
+        self._locks = {}        # email -> lock deadline
+        self._expiries = []     # heap of (earliest deadline, email)
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._checkpoint_lock = threading.Lock()
+        self._dirty = False
+
+        self._committer = None
+        if checkpoint_path is not None and checkpoint_interval > 0:
+            self._committer = GroupCommitter(
+                self.checkpoint, checkpoint_interval, name="lockout-checkpoint"
+            )
+
+    def _schedule(self, email, deadline):
+        """
+        Make sure an email with state has an entry in the expiry heap
+        """
+        if email not in self._scheduled:
+            self._scheduled.add(email)
+            heapq.heappush(self._expiries, (deadline, email))
+
+    def _expire(self, now):
+        """
+        Drop counters and locks whose deadline has passed; call with _lock held
+
+        Args:
+            now (float): Current epoch time
+        """
+        expiries = self._expiries
+        while expiries and expiries[0][0] <= now:
+            _, email = heapq.heappop(expiries)
+            self._scheduled.discard(email)
+
+            remaining = []
+            counter = self._attempts.get(email)
+            if counter is not None:
+                if counter[1] <= now:
+                    del self._attempts[email]
+                else:
+                    remaining.append(counter[1])
+            deadline = self._locks.get(email)
+            if deadline is not None:
+                if deadline <= now:
+                    del self._locks[email]
+                else:
+                    remaining.append(deadline)
+            if remaining:
+                self._schedule(email, min(remaining))
+
+    def _changed(self):
+        self._dirty = True
+        if self._committer is not None:
+            self._committer.request()
+
+    def locked_until(self, email):
+        """
+        Deadline of an active lock
+
+        Args:
+            email (str): Account email
+
+        Returns:
+            float or None: Lock deadline as epoch seconds, None if not locked
+        """
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            deadline = self._locks.get(email)
+        if deadline is not None and deadline > now:
+            return deadline
+        return None
+
+    def attempts(self, email):
+        """
+        Failed attempts counted since the last reset
+
+        Args:
+            email (str): Account email
+
+        Returns:
+            int: Number of live failed attempts
+        """
+        now = self.clock()
+        with self._lock:
+            counter = self._attempts.get(email)
+        if counter is None or counter[1] <= now:
+            return 0
+        return counter[0]
+
+    def lock(self, email, deadline):
+        """
+        Track a lock that was applied elsewhere (e.g. persisted by a previous run)
+
+        Args:
+            email (str): Account email
+            deadline (float): Lock deadline as epoch seconds
+        """
+        with self._lock:
+            self._attempts.pop(email, None)
+            self._locks[email] = deadline
+            self._schedule(email, deadline)
+        self._changed()
+
+    def record_failure(self, email):
+        """
+        Count a failed login, locking the account once the limit is reached
+
+        Args:
+            email (str): Account email
+
+        Returns:
+            tuple: (attempts counted, lock deadline or None if no lock was applied)
+        """
+        now = self.clock()
+        with self._lock:
+            counter = self._attempts.get(email)
+            attempts = 1 if counter is None or counter[1] <= now else counter[0] + 1
+
+            deadline = None
+            if attempts >= self.max_attempts:
+                deadline = now + self.lock_duration
+                self._attempts.pop(email, None)
+                self._locks[email] = deadline
+                self._schedule(email, deadline)
+            else:
+                expiry = now + self.attempt_ttl
+                self._attempts[email] = (attempts, expiry)
+                self._schedule(email, expiry)
+        self._changed()
+        return attempts, deadline
+
+    def clear(self, email):
+        """
+        Forget the counter and lock of an account
+
+        Args:
+            email (str): Account email
+
+        Returns:
+            bool: True if there was state to clear
+        """
+        with self._lock:
+            had_state = self._attempts.pop(email, None) is not None
+            had_state = self._locks.pop(email, None) is not None or had_state
+        if had_state:
+            self._changed()
+        return had_state
+
+    def __len__(self):
+        with self._lock:
+            return len(self._attempts) + len(self._locks)
+
+    def load(self):
+        """
+        Restore unexpired state from the checkpoint file
+        """
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return
+        try:
+            with open(self.checkpoint_path, "r") as f:
+                state = json.load(f)
+        except (IOError, ValueError) as e:
+            self.logger.error("Error loading lockout checkpoint: %s", e)
+            return
+
+        now = self.clock()
+        with self._lock:
+            for email, (attempts, expiry) in state.get("attempts", {}).items():
+                if expiry > now:
+                    self._attempts[email] = (attempts, expiry)
+                    self._schedule(email, expiry)
+            for email, deadline in state.get("locks", {}).items():
+                if deadline > now:
+                    self._locks[email] = deadline
+                    self._schedule(email, deadline)
+        self.logger.info("Restored lockout state for %s accounts", len(self))
+
+    def checkpoint(self):
+        """
+        Write the unexpired state to the checkpoint file
+        """
+        if self.checkpoint_path is None:
+            return
+        with self._checkpoint_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                self._expire(self.clock())
+                state = {
+                    "attempts": {email: list(counter) for email, counter in self._attempts.items()},
+                    "locks": dict(self._locks),
+                }
+                self._dirty = False
+            try:
+                atomic_write(self.checkpoint_path, json.dumps(state))
+            except IOError as e:
+                self._dirty = True
+                self.logger.error("Error writing lockout checkpoint: %s", e)
+
+    def close(self):
+        """
+        Write a final checkpoint and stop the checkpoint thread
+        """
+        if self._committer is not None:
+            self._committer.close()
+        self.checkpoint()
@@ -0,0 +1,578 @@
+import json
+import time
+import logging
+import threading
+from functools import wraps
+
+from .atomic_file import atomic_write
+
+# Values below SUB_BUCKETS are exact; above, each power of two is split
+# into SUB_BUCKETS / 2 buckets, so values are kept to within 1/64 (~1.6%)
+SUB_BUCKET_BITS = 7
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+HALF_BUCKETS = SUB_BUCKETS // 2
+
+# Bucket bounds in seconds of the exported Prometheus histograms
+DEFAULT_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Percentiles reported by Histogram.summary
+SUMMARY_PERCENTILES = (50, 90, 99, 99.9)
+
+
+def bucket_index(value):
+    """
+    HDR bucket of a non-negative integer
+
+    Args:
+        value (int): Value to bucket
+
+    Returns:
+        int: Bucket index, increasing with the value
+    """
+    if value < SUB_BUCKETS:
+        return value
+    shift = value.bit_length() - SUB_BUCKET_BITS
+    return SUB_BUCKETS + (shift - 1) * HALF_BUCKETS + (value >> shift) - HALF_BUCKETS
+
+
+def bucket_upper(index):
+    """
+    Largest value falling into a bucket
+
+    Args:
+        index (int): Bucket index from bucket_index
+
+    Returns:
+        int: Highest value equivalent to the bucket
+    """
+    if index < SUB_BUCKETS:
+        return index
+    shift, offset = divmod(index - SUB_BUCKETS, HALF_BUCKETS)
+    return ((offset + HALF_BUCKETS + 1) << (shift + 1)) - 1
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Monotonic count, e.g. of calls or bytes written
+    """
+
+    def __init__(self, registry, labels):
+        self._registry = registry
+        self.labels = labels
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        """
+        Add to the count; does nothing while the registry is disabled
+
+        Args:
+            amount (int or float): Non-negative increment
+        """
+        if self._registry.enabled:
+            with self._lock:
+                self.value += amount
+
+    def samples(self, name):
+        yield name, self.labels, self.value
+
+
+class Gauge:
+    """
+    Value that goes up and down, set directly or read from a function
+    at collection time
+    """
+
+    def __init__(self, registry, labels, function=None):
+        self._registry = registry
+        self.labels = labels
+        self.function = function
+        self._value = 0
+        self._lock = threading.Lock()
+
+    @property
+    def value(self):
+        return self.function() if self.function is not None else self._value
+
+    def set(self, value):
+        """
+        Set the value; does nothing while the registry is disabled
+
+        Args:
+            value (int or float): New value
+        """
+        if self._registry.enabled:
+            self._value = value
+
+    def inc(self, amount=1):
+        """
+        Add to the value; does nothing while the registry is disabled
+
+        Args:
+            amount (int or float): Increment, negative to decrease
+        """
+        if self._registry.enabled:
+            with self._lock:
+                self._value += amount
+
+    def samples(self, name):
+        yield name, self.labels, self.value
+
+
+class _Timer:
+    """
+    Context manager observing its duration into a histogram
+    """
+
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Histogram:
+    """
+    Latency distribution with HDR-style buckets.
+
+    Durations are recorded in microseconds into log-linear buckets (exact
+    below 128 µs, then 64 buckets per power of two), so any percentile is
+    known to within 1.6% whatever the range, with memory proportional to
+    the number of distinct buckets hit. Exported to Prometheus as a
+    cumulative histogram over `bounds`.
+    """
+
+    # Recorded units per second
+    SCALE = 1_000_000
+
+    def __init__(self, registry, labels, bounds=DEFAULT_BOUNDS):
+        self._registry = registry
+        self.labels = labels
+        self.bounds = tuple(bounds)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        """
+        Record one duration; does nothing while the registry is disabled
+
+        Args:
+            seconds (float): Non-negative duration
+        """
+        if not self._registry.enabled:
+            return
+        index = bucket_index(int(seconds * self.SCALE))
+        with self._lock:
+            self._counts[index] = self._counts.get(index, 0) + 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def time(self):
+        """
+        Time a block: `with histogram.time(): ...`
+
+        Returns:
+            Context manager observing the block's duration
+        """
+        return _Timer(self) if self._registry.enabled else _NULL_TIMER
+
+    def percentile(self, percentile):
+        """
+        Value at a percentile, to within the bucket precision
+
+        Args:
+            percentile (float): 0 to 100
+
+        Returns:
+            float: Seconds, 0.0 if nothing was recorded
+        """
+        with self._lock:
+            counts = sorted(self._counts.items())
+            total = self.count
+        if not total:
+            return 0.0
+        target = max(1, -(-total * percentile // 100))
+        seen = 0
+        for index, count in counts:
+            seen += count
+            if seen >= target:
+                return min(bucket_upper(index) / self.SCALE, self.max)
+        return self.max
+
+    def summary(self):
+        """
+        Returns:
+            dict: count, sum, max and the SUMMARY_PERCENTILES as "p50" etc.
+        """
+        summary = {"count": self.count, "sum": self.sum, "max": self.max}
+        for percentile in SUMMARY_PERCENTILES:
+            summary[f"p{percentile:g}"] = self.percentile(percentile)
+        return summary
+
+    def samples(self, name):
+        with self._lock:
+            counts = sorted(self._counts.items())
+            total, value_sum = self.count, self.sum
+        cumulative = 0
+        position = 0
+        for bound in self.bounds:
+            limit = bound * self.SCALE
+            while position < len(counts) and bucket_upper(counts[position][0]) <= limit:
+                cumulative += counts[position][1]
+                position += 1
+            yield f"{name}_bucket", self.labels + (("le", _number(bound)),), cumulative
+        yield f"{name}_bucket", self.labels + (("le", "+Inf"),), total
+        yield f"{name}_sum", self.labels, value_sum
+        yield f"{name}_count", self.labels, total
+
+
+class MetricsRegistry:
+    """
+    Named counters, gauges and histograms of the running application.
+
+    Metrics are created once, typically at import time, and shared:
+    asking for the same name and labels again returns the same object.
+    While the registry is disabled every update returns after one
+    attribute check and timers are a shared no-op, so instrumented code
+    costs next to nothing until metrics are turned on.
+    """
+
+    KINDS = {"counter": Counter, "gauge": Gauge, "histogram": Histogram}
+
+    def __init__(self, enabled=False):
+        """
+        Initialize an empty registry
+
+        Args:
+            enabled (bool): Whether updates are recorded
+        """
+        self.enabled = enabled
+        self._families = {}
+        self._lock = threading.Lock()
+
+    def _metric(self, kind, name, description, labels, **options):
+        """
+        Get or create the metric of a family for a label set
+
+        Raises:
+            ValueError: If the name is registered as another kind
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is None:
+                family = self._families[name] = {"kind": kind, "help": description, "metrics": {}}
+            elif family["kind"] != kind:
+                raise ValueError(f"Metric {name} is already registered as a {family['kind']}")
+            metric = family["metrics"].get(key)
+            if metric is None:
+                metric = family["metrics"][key] = self.KINDS[kind](self, key, **options)
+            return metric
+
+    def counter(self, name, description, **labels):
+        """
+        Args:
+            name (str): Metric name, e.g. "auth_login_total"
+            description (str): Help text
+            **labels: Label values identifying this series
+
+        Returns:
+            Counter: Shared counter for the name and labels
+        """
+        return self._metric("counter", name, description, labels)
+
+    def gauge(self, name, description, function=None, **labels):
+        """
+        Args:
+            name (str): Metric name
+            description (str): Help text
+            function (callable, optional): Called at collection time for the value
+            **labels: Label values identifying this series
+
+        Returns:
+            Gauge: Shared gauge for the name and labels
+        """
+        gauge = self._metric("gauge", name, description, labels)
+        if function is not None:
+            gauge.function = function
+        return gauge
+
+    def histogram(self, name, description, **labels):
+        """
+        Args:
+            name (str): Metric name, e.g. "auth_login_seconds"
+            description (str): Help text
+            **labels: Label values identifying this series
+
+        Returns:
+            Histogram: Shared histogram for the name and labels
+        """
+        return self._metric("histogram", name, description, labels)
+
+    def unregister(self, name, **labels):
+        """
+        Remove the series of a family for a label set, and the family once it is empty
+
+        Args:
+            name (str): Metric name
+            **labels: Label values identifying the series
+        """
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            family = self._families.get(name)
+            if family is not None:
+                family["metrics"].pop(key, None)
+                if not family["metrics"]:
+                    del self._families[name]
+
+    def timed(self, name, description):
+        """
+        Decorator recording a call's duration in `<name>_seconds` and its
+        outcome in `<name>_total`, labelled result="ok", "failed" (the call
+        returned a (False, ...) tuple) or "error" (it raised)
+
+        Args:
+            name (str): Metric name prefix, e.g. "auth_login"
+            description (str): What the call does, for the help texts
+
+        Returns:
+            callable: Decorator
+        """
+        latency = self.histogram(f"{name}_seconds", f"Duration of {description}")
+        outcomes = {
+            result: self.counter(f"{name}_total", f"Calls of {description} by result", result=result)
+            for result in ("ok", "failed", "error")
+        }
+
+        def decorate(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    result = function(*args, **kwargs)
+                except BaseException:
+                    outcomes["error"].inc()
+                    raise
+                finally:
+                    latency.observe(time.perf_counter() - start)
+                failed = isinstance(result, tuple) and result and result[0] is False
+                outcomes["failed" if failed else "ok"].inc()
+                return result
+            return wrapper
+        return decorate
+
+    def render(self):
+        """
+        Format every metric in the Prometheus text exposition format
+
+        Returns:
+            str: Exposition text
+        """
+        with self._lock:
+            families = [(name, dict(family, metrics=list(family["metrics"].values())))
+                        for name, family in sorted(self._families.items())]
+        lines = []
+        for name, family in families:
+            lines.append(f"# HELP {name} {family['help']}")
+            lines.append(f"# TYPE {name} {family['kind']}")
+            for metric in family["metrics"]:
+                for sample, labels, value in metric.samples(name):
+                    lines.append(f"{sample}{_label_text(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """
+        Current values as plain data: counters and gauges as numbers,
+        histograms as their summary
+
+        Returns:
+            dict: Metric name to a list of {"labels": dict, "value": ...}
+        """
+        with self._lock:
+            families = {name: list(family["metrics"].values()) for name, family in self._families.items()}
+        snapshot = {}
+        for name, metrics in sorted(families.items()):
+            snapshot[name] = [
+                {
+                    "labels": dict(metric.labels),
+                    "value": metric.summary() if isinstance(metric, Histogram) else metric.value,
+                }
+                for metric in metrics
+            ]
+        return snapshot
+
+
+# Registry the application is instrumented against
+REGISTRY = MetricsRegistry()
+
+
+def _request_handler():
+    """
+    Handler class serving /metrics as Prometheus text and /metrics.json as
+    a snapshot; defined on first use so http.server is only imported when
+    the endpoint is enabled
+    """
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            registry = self.server.registry
+            if self.path == "/metrics":
+                body = registry.render().encode()
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif self.path == "/metrics.json":
+                body = json.dumps(registry.snapshot()).encode()
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logging.getLogger(__name__).debug("Metrics request: " + format, *args)
+
+    return MetricsRequestHandler
+
+
+class MetricsExporter:
+    """
+    Publishes a registry as a Prometheus text file, rewritten atomically
+    every `interval` seconds for node_exporter's textfile collector, and
+    over HTTP on localhost. Both are optional and run on daemon threads.
+    """
+
+    def __init__(self, registry=REGISTRY, textfile=None, interval=15.0, port=None):
+        """
+        Initialize the exporter
+
+        Args:
+            registry (MetricsRegistry): Metrics to publish
+            textfile (str, optional): Path of the Prometheus text file
+            interval (float): Seconds between text file writes
+            port (int, optional): Port of the HTTP endpoint on 127.0.0.1, 0 for any free port
+        """
+        self.logger = logging.getLogger(__name__)
+        self.registry = registry
+        self.textfile = textfile
+        self.interval = interval
+        self.port = port
+
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    @classmethod
+    def from_options(cls, options, registry=REGISTRY):
+        """
+        Build an exporter from the `metrics` settings
+
+        Args:
+            options (dict): Settings with textfile, textfile_interval_seconds and http_port
+            registry (MetricsRegistry): Metrics to publish
+
+        Returns:
+            MetricsExporter: Unstarted exporter
+        """
+        return cls(
+            registry,
+            textfile=options.get("textfile"),
+            interval=options.get("textfile_interval_seconds", 15),
+            port=options.get("http_port"),
+        )
+
+    def start(self):
+        """
+        Start the HTTP endpoint and the text file writer that are configured
+        """
+        self._stop.clear()
+        if self.port is not None:
+            from http.server import ThreadingHTTPServer
+
+            self.server = ThreadingHTTPServer(("127.0.0.1", self.port), _request_handler())
+            self.server.daemon_threads = True
+            self.server.registry = self.registry
+            self.port = self.server.server_address[1]
+            self._spawn(self.server.serve_forever, "metrics-http")
+            self.logger.info("Serving metrics on http://127.0.0.1:%s/metrics", self.port)
+        if self.textfile:
+            self._spawn(self._write_periodically, "metrics-textfile")
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def write_textfile(self):
+        """
+        Atomically rewrite the Prometheus text file
+        """
+        try:
+            atomic_write(self.textfile, self.registry.render(), "none")
+        except OSError as e:
+            self.logger.error("Error writing metrics file: %s", e)
+
+    def _write_periodically(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def close(self):
+        """
+        Stop the HTTP endpoint and write the text file a last time
+        """
+        self._stop.set()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.textfile:
+            self.write_textfile()
+
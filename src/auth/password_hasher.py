@@ -0,0 +1,307 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import threading
+
+# Version of the encoded hash layout; bump when the layout changes
+HASH_VERSION = 1
+
+# Cost per scheme: log2 of the scrypt work factor N, or PBKDF2 iterations
+DEFAULT_COSTS = {"scrypt": 14, "pbkdf2-sha256": 600_000}
+SCHEMES = tuple(DEFAULT_COSTS)
+
+
+def b64encode(data):
+    """
+    Unpadded base64, as used by the PHC string format
+    """
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4), validate=True)
+
+
+def is_legacy_hash(encoded):
+    """
+    Check for an unsalted SHA-256 hex digest from before versioned hashes
+
+    Args:
+        encoded (str): Stored password hash
+
+    Returns:
+        bool: True for a legacy hash
+    """
+    if len(encoded) != 64:
+        return False
+    try:
+        return bytes.fromhex(encoded).hex() == encoded
+    except ValueError:
+        return False
+
+
+def split_hash(encoded):
+    """
+    Split a versioned hash into its parameter prefix, salt and digest
+
+    The layout is `$<scheme>$v=<version>$<params>$<salt>$<digest>` with
+    unpadded base64 salt and digest, e.g.
+    `$scrypt$v=1$ln=14,r=8,p=1$<salt>$<digest>`.
+
+    Args:
+        encoded (str): Stored password hash
+
+    Returns:
+        tuple: (prefix, salt bytes, digest bytes)
+
+    Raises:
+        ValueError: If the hash is not in the versioned format
+    """
+    parts = encoded.split("$")
+    if len(parts) != 6 or parts[0] or parts[1] not in SCHEMES or parts[2] != f"v={HASH_VERSION}":
+        raise ValueError("Not a versioned password hash")
+    return "$".join(parts[:4]), b64decode(parts[4]), b64decode(parts[5])
+
+
+def join_hash(prefix, salt, digest):
+    """
+    Inverse of split_hash
+
+    Returns:
+        str: Encoded password hash
+    """
+    return f"{prefix}${b64encode(salt)}${b64encode(digest)}"
+
+
+def _parse_params(text):
+    return {key: int(value) for key, value in (item.split("=") for item in text.split(","))}
+
+
+# Parameter ranges accepted in stored hashes; anything else is treated as corrupt
+PARAM_BOUNDS = {
+    "scrypt": {"ln": (1, 24), "r": (1, 64), "p": (1, 16)},
+    "pbkdf2-sha256": {"i": (1, 10_000_000)},
+}
+
+
+def parse_hash(encoded):
+    """
+    Split a versioned hash and check its parameters
+
+    Args:
+        encoded (str): Stored password hash
+
+    Returns:
+        tuple: (scheme, params dict, salt bytes, digest bytes)
+
+    Raises:
+        ValueError: If the hash is malformed or its parameters are missing or out of range
+    """
+    prefix, salt, digest = split_hash(encoded)
+    scheme, _, text = prefix[1:].split("$")
+    try:
+        params = _parse_params(text)
+    except ValueError:
+        raise ValueError(f"Unreadable {scheme} parameters: {text}") from None
+    bounds = PARAM_BOUNDS[scheme]
+    if params.keys() != bounds.keys() or any(
+        not low <= params[name] <= high for name, (low, high) in bounds.items()
+    ):
+        raise ValueError(f"Unsupported {scheme} parameters: {text}")
+    if not salt or not digest:
+        raise ValueError("Empty salt or digest")
+    return scheme, params, salt, digest
+
+
+def _derive(scheme, params, password, salt, key_size):
+    """
+    Run the key derivation function
+
+    Args:
+        scheme (str): One of SCHEMES
+        params (dict): Scheme parameters (ln, r, p for scrypt; i for PBKDF2)
+        password (str): Password to derive from
+        salt (bytes): Salt
+        key_size (int): Derived key length in bytes
+
+    Returns:
+        bytes: Derived key
+    """
+    secret = password.encode("utf-8")
+    if scheme == "scrypt":
+        n, r, p = 1 << params["ln"], params["r"], params["p"]
+        return hashlib.scrypt(
+            secret, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20), dklen=key_size
+        )
+    return hashlib.pbkdf2_hmac("sha256", secret, salt, params["i"], dklen=key_size)
+
+
+class PasswordHasher:
+    """
+    Salted, versioned password hashing with scrypt or PBKDF2.
+
+    Hashing and verification run on the caller's thread and own no
+    threads. The app calls them from its Qt worker threads; direct callers
+    such as the benchmarks and scripts block their own thread for the KDF. Both KDFs release the GIL, and a semaphore caps how many CPU
+    cores logins can occupy at once. Bulk imports use hash_many(), which
+    is not capped, from a pool sized for the import. Hashes record their
+    scheme and cost, so raising the cost only affects new hashes, and
+    needs_rehash() tells callers when a stored hash is out of date.
+    Legacy unsalted SHA-256 hex digests still verify.
+    """
+
+    def __init__(self, scheme="scrypt", cost=None, r=8, p=1, salt_size=16, key_size=32, max_workers=2):
+        """
+        Initialize the password hasher
+
+        Args:
+            scheme (str): "scrypt" or "pbkdf2-sha256"
+            cost (int, optional): log2(N) for scrypt or iterations for PBKDF2; scheme default if None
+            r (int): scrypt block size
+            p (int): scrypt parallelism
+            salt_size (int): Salt length in bytes
+            key_size (int): Derived key length in bytes
+            max_workers (int): Calls of hash() and verify() running concurrently
+
+        Raises:
+            ValueError: If the scheme is unknown
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme: {scheme}. Expected one of {SCHEMES}")
+        self.logger = logging.getLogger(__name__)
+        self.scheme = scheme
+        self.cost = DEFAULT_COSTS[scheme] if cost is None else cost
+        self.salt_size = salt_size
+        self.key_size = key_size
+
+        if scheme == "scrypt":
+            self.params = {"ln": self.cost, "r": r, "p": p}
+        else:
+            self.params = {"i": self.cost}
+        params = ",".join(f"{key}={value}" for key, value in self.params.items())
+        self.prefix = f"${scheme}$v={HASH_VERSION}${params}"
+
+        self._slots = threading.BoundedSemaphore(max_workers)
+
+    @classmethod
+    def calibrate(cls, scheme="scrypt", target_ms=50, **kwargs):
+        """
+        Pick the cost that makes one hash take about `target_ms` on this machine
+
+        scrypt costs are powers of two, so the closest one is chosen;
+        PBKDF2 iterations are scaled linearly from a measurement.
+
+        Args:
+            scheme (str): "scrypt" or "pbkdf2-sha256"
+            target_ms (float): Target hash/verify latency in milliseconds
+            **kwargs: Other PasswordHasher arguments
+
+        Returns:
+            PasswordHasher: Hasher using the calibrated cost
+        """
+        target = target_ms / 1000
+        salt = os.urandom(16)
+
+        def measure(cost):
+            if scheme == "scrypt":
+                params = {"ln": cost, "r": kwargs.get("r", 8), "p": kwargs.get("p", 1)}
+            else:
+                params = {"i": cost}
+            timings = []
+            for _ in range(3):
+                start = time.perf_counter()
+                _derive(scheme, params, "calibration", salt, kwargs.get("key_size", 32))
+                timings.append(time.perf_counter() - start)
+            return sorted(timings)[1]
+
+        if scheme == "scrypt":
+            cost, elapsed = 10, measure(10)
+            while elapsed < target and cost < 24:
+                previous = elapsed
+                cost += 1
+                elapsed = measure(cost)
+                if elapsed >= target and target - previous < elapsed - target:
+                    cost, elapsed = cost - 1, previous
+                    break
+        else:
+            cost = 10_000
+            for _ in range(2):
+                cost = max(1000, int(cost * target / measure(cost)))
+            elapsed = measure(cost)
+
+        hasher = cls(scheme, cost, **kwargs)
+        hasher.logger.info("Calibrated %s cost %s: %.1f ms per hash", scheme, cost, elapsed * 1000)
+        return hasher
+
+    def _hash(self, password):
+        salt = os.urandom(self.salt_size)
+        return join_hash(self.prefix, salt, _derive(self.scheme, self.params, password, salt, self.key_size))
+
+    def _verify(self, password, encoded):
+        if is_legacy_hash(encoded):
+            legacy = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(legacy, encoded)
+        try:
+            scheme, params, salt, digest = parse_hash(encoded)
+            derived = _derive(scheme, params, password, salt, len(digest))
+        except ValueError as e:
+            self.logger.error("Stored password hash is unusable: %s", e)
+            return False
+        return hmac.compare_digest(derived, digest)
+
+    def hash(self, password):
+        """
+        Hash a password, waiting while `max_workers` other calls are running
+
+        Args:
+            password (str): Password to hash
+
+        Returns:
+            str: Encoded, salted hash
+        """
+        with self._slots:
+            return self._hash(password)
+
+    def hash_many(self, passwords):
+        """
+        Hash passwords on the calling thread without the concurrency cap,
+        for bulk imports running their own pool
+
+        Args:
+            passwords (list): Passwords to hash
+
+        Returns:
+            list: Encoded, salted hashes in the same order
+        """
+        return [self._hash(password) for password in passwords]
+
+    def verify(self, password, encoded):
+        """
+        Check a password against a stored hash, waiting while `max_workers`
+        other calls are running
+
+        Args:
+            password (str): Password to check
+            encoded (str): Stored hash, versioned or legacy SHA-256
+
+        Returns:
+            bool: True if the password matches
+        """
+        with self._slots:
+            return self._verify(password, encoded)
+
+    def needs_rehash(self, encoded):
+        """
+        Check whether a stored hash uses an older scheme or cost
+
+        Args:
+            encoded (str): Stored hash
+
+        Returns:
+            bool: True if the hash should be replaced by hash(password)
+        """
+        return not encoded.startswith(self.prefix + "$")
+
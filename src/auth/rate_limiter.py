@@ -0,0 +1,129 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+
+
+class RateLimiter:
+    """
+    Token-bucket limits on login attempts, per account and overall.
+
+    Each account gets a bucket of `account_burst` tokens refilled at
+    `account_rate` per second, and all attempts share one global bucket.
+    An attempt is allowed only if both buckets hold a token, and is
+    decided before any account lookup or password hashing, so a flood of
+    attempts - on one account or sprayed across many - costs a dict probe
+    each instead of a KDF run.
+
+    Per-account buckets live in an LRU of at most `max_tracked` entries.
+    Evicting a bucket forgets only partial depletion: the least recently
+    used buckets are the ones most likely to have refilled already.
+    """
+
+    def __init__(
+        self,
+        account_rate=1.0,
+        account_burst=10,
+        global_rate=100.0,
+        global_burst=200,
+        max_tracked=100_000,
+        clock=time.monotonic,
+    ):
+        """
+        Initialize the rate limiter
+
+        Args:
+            account_rate (float): Tokens per second per account, 0 to disable the per-account limit
+            account_burst (int): Per-account bucket size
+            global_rate (float): Tokens per second shared by all accounts, 0 to disable the global limit
+            global_burst (int): Global bucket size
+            max_tracked (int): Per-account buckets kept in memory
+            clock (callable): Returns monotonic seconds
+        """
+        self.logger = logging.getLogger(__name__)
+        self.account_rate = account_rate
+        self.account_burst = account_burst
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.max_tracked = max_tracked
+        self.clock = clock
+
+        self._buckets = OrderedDict()   # key -> (tokens, last refill time)
+        self._global = (float(global_burst), clock())
+        self._lock = threading.Lock()
+
+        self.allowed = 0
+        self.rejected_account = 0
+        self.rejected_global = 0
+
+    @staticmethod
+    def _refill(bucket, rate, burst, now):
+        tokens, last = bucket
+        return min(burst, tokens + (now - last) * rate)
+
+    def acquire(self, key):
+        """
+        Take a token for one attempt on `key`
+
+        Args:
+            key (str): Account the attempt targets, e.g. the email
+
+        Returns:
+            bool: True if the attempt may proceed, False if it is rate limited
+        """
+        with self._lock:
+            now = self.clock()
+
+            account_tokens = None
+            if self.account_rate > 0:
+                bucket = self._buckets.get(key)
+                if bucket is None:
+                    account_tokens = float(self.account_burst)
+                else:
+                    account_tokens = self._refill(bucket, self.account_rate, self.account_burst, now)
+                    self._buckets.move_to_end(key)
+                if account_tokens < 1:
+                    self._buckets[key] = (account_tokens, now)
+                    self.rejected_account += 1
+                    return False
+
+            if self.global_rate > 0:
+                global_tokens = self._refill(self._global, self.global_rate, self.global_burst, now)
+                if global_tokens < 1:
+                    self._global = (global_tokens, now)
+                    self.rejected_global += 1
+                    return False
+                self._global = (global_tokens - 1, now)
+
+            if account_tokens is not None:
+                self._buckets[key] = (account_tokens - 1, now)
+                if len(self._buckets) > self.max_tracked:
+                    self._buckets.popitem(last=False)
+            self.allowed += 1
+            return True
+
+    @property
+    def rejected(self):
+        """
+        Attempts rejected by either limit
+        """
+        return self.rejected_account + self.rejected_global
+
+    def stats(self):
+        """
+        Counters for monitoring
+
+        Returns:
+            dict: Allowed and rejected attempt counts and tracked buckets
+        """
+        with self._lock:
+            return {
+                "allowed": self.allowed,
+                "rejected": self.rejected,
+                "rejected_account": self.rejected_account,
+                "rejected_global": self.rejected_global,
+                "tracked_accounts": len(self._buckets),
+            }
+
+    def __len__(self):
+        return len(self._buckets)
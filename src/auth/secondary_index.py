@@ -0,0 +1,206 @@
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def time_key(value):
+    """
+    Sort key of a timestamp: microseconds since the epoch
+
+    Naive values are taken as they are, aware ones are converted to UTC,
+    matching how ISO strings written by AuthService order.
+
+    Args:
+        value (str or datetime): ISO timestamp
+
+    Returns:
+        int: Microseconds since 1970-01-01
+
+    Raises:
+        ValueError, TypeError: If the value is not a timestamp
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def time_text(value):
+    """
+    ISO form of a timestamp that orders like time_key, for text comparisons
+
+    Args:
+        value (str or datetime): ISO timestamp
+
+    Returns:
+        str: Naive ISO timestamp
+
+    Raises:
+        ValueError, TypeError: If the value is not a timestamp
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value.isoformat()
+
+
+class SecondaryIndexes:
+    """
+    In-memory indexes over account records, kept in step with every write.
+
+    - id: dict from account id to email
+    - created_at: a sorted array('q') of creation times in epoch
+      microseconds with a parallel list of emails, searched with bisect
+    - lock state: the set of emails whose record has a `locked_until`
+
+    Callers report each write as replace(email, old record, new record).
+    Records are only read, never kept, so the indexes cost about two
+    pointers and eight bytes per account beyond the id map. Shifting the
+    sorted arrays is the one O(n) step, and it is skipped when a write
+    leaves `created_at` alone, as logins and lockouts do.
+    """
+
+    def __init__(self, items=()):
+        """
+        Build the indexes
+
+        Args:
+            items: (email, account) pairs to index
+        """
+        self._by_id = {}
+        self._locked = set()
+
+        created = []
+        for email, account in items:
+            self._index_keys(email, account)
+            key = self._created_key(account)
+            if key is not None:
+                created.append((key, email))
+        created.sort()
+        self._created_keys = array("q", (key for key, _ in created))
+        self._created_emails = [email for _, email in created]
+
+    @staticmethod
+    def _created_key(account):
+        try:
+            return time_key(account.get("created_at"))
+        except (TypeError, ValueError):
+            return None
+
+    def _index_keys(self, email, account):
+        account_id = account.get("id")
+        if account_id is not None:
+            self._by_id[account_id] = email
+        if account.get("locked_until"):
+            self._locked.add(email)
+
+    def _unindex_keys(self, email, account):
+        account_id = account.get("id")
+        if account_id is not None and self._by_id.get(account_id) == email:
+            del self._by_id[account_id]
+        self._locked.discard(email)
+
+    def _find_created(self, key, email):
+        """
+        Position of (key, email) in the creation-time arrays, or None
+        """
+        position = bisect_left(self._created_keys, key)
+        while position < len(self._created_keys) and self._created_keys[position] == key:
+            if self._created_emails[position] == email:
+                return position
+            position += 1
+        return None
+
+    def replace(self, email, old, new):
+        """
+        Reindex one write
+
+        Args:
+            email (str): Account email
+            old (Mapping or None): Record being replaced, None for an insert
+            new (Mapping or None): Record being stored, None for a delete
+        """
+        key = None if new is None else self._created_key(new)
+        if old is not None and key is not None and self._created_key(old) == key:
+            self._unindex_keys(email, old)
+            self._index_keys(email, new)
+            return
+        self.discard(email, old)
+        if new is not None:
+            self.add(email, new)
+
+    def add(self, email, account):
+        """
+        Index a new record
+
+        Args:
+            email (str): Account email
+            account (Mapping): Account record
+        """
+        self._index_keys(email, account)
+        key = self._created_key(account)
+        if key is None:
+            return
+        # Registration appends in time order, so this is usually the end
+        position = len(self._created_keys)
+        if position and self._created_keys[-1] > key:
+            position = bisect_left(self._created_keys, key)
+        self._created_keys.insert(position, key)
+        self._created_emails.insert(position, email)
+
+    def discard(self, email, account):
+        """
+        Remove a record about to be deleted
+
+        Args:
+            email (str): Account email
+            account (Mapping or None): Current record, None if there is none
+        """
+        if account is None:
+            return
+        self._unindex_keys(email, account)
+        key = self._created_key(account)
+        position = None if key is None else self._find_created(key, email)
+        if position is not None:
+            del self._created_keys[position]
+            del self._created_emails[position]
+
+    def email_for_id(self, account_id):
+        """
+        Args:
+            account_id (str): Account id
+
+        Returns:
+            str or None: Email of the account with that id
+        """
+        return self._by_id.get(account_id)
+
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        Emails of accounts created in [start, end), oldest first
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of emails
+
+        Returns:
+            list: Emails
+        """
+        low = 0 if start is None else bisect_left(self._created_keys, time_key(start))
+        high = len(self._created_keys) if end is None else bisect_left(self._created_keys, time_key(end))
+        if limit is not None:
+            high = min(high, low + limit)
+        return self._created_emails[low:high]
+
+    def locked_emails(self):
+        """
+        Returns:
+            set: Emails whose record carries a lock deadline, expired or not
+        """
+        return set(self._locked)
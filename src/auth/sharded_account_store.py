@@ -0,0 +1,492 @@
+import os
+import json
+import heapq
+import zlib
+import logging
+import threading
+from itertools import chain, islice
+from concurrent.futures import ThreadPoolExecutor
+
+from .account_store import AccountStore, JsonAccountStore
+from .atomic_file import GroupCommitter, atomic_write, check_durability
+from .file_lock import stat_fingerprint
+from .secondary_index import time_key
+
+MANIFEST_VERSION = 1
+DEFAULT_SHARDS = 16
+
+
+def shard_for(email, count):
+    """
+    Shard number of an email
+
+    CRC-32 is stable across processes and Python versions, unlike hash(),
+    and spreads emails sharing a domain evenly.
+
+    Args:
+        email (str): Account email
+        count (int): Number of shards
+
+    Returns:
+        int: Shard number in [0, count)
+    """
+    return zlib.crc32(email.encode("utf-8")) % count
+
+
+class _Shard(JsonAccountStore):
+    """
+    One shard file; its saves are scheduled by the owning ShardedAccountStore
+    """
+
+    def __init__(self, owner, storage_path, **options):
+        super().__init__(storage_path, **options)
+        self._owner = owner
+
+    def _changed(self):
+        self._owner._shard_changed(self)
+
+
+class ShardedAccountStore(AccountStore):
+    """
+    Account store that partitions accounts over N JSON files by a stable
+    hash of the email.
+
+    `<storage_path>.shards/manifest.json` names the shard count and files
+    of the current generation. Each shard is a JsonAccountStore, so a write
+    rewrites only the shard holding the account: about 1/N of the data.
+    With a commit interval, one group committer saves just the shards
+    marked dirty inside the window, in parallel. Shards load in parallel
+    on a thread pool at startup.
+
+    An existing unsharded `storage_path` is split into shards on first
+    load and then renamed to `<storage_path>.unsharded`, so no unsharded
+    configuration can load it as current data. reshard() changes the shard count while the store stays in use:
+    it writes a new generation, switches the manifest atomically and only
+    then deletes the old files, so a crash leaves one complete generation.
+    """
+
+    def __init__(
+        self,
+        storage_path="accounts.json",
+        shards=DEFAULT_SHARDS,
+        durability="flush",
+        commit_interval=0,
+        workers=None,
+        **shard_options,
+    ):
+        """
+        Initialize the sharded account store
+
+        Args:
+            storage_path (str): Unsharded accounts file; shards live next to it
+            shards (int): Shard count for a new store; an existing manifest wins
+            durability (str): "none", "flush", "fsync" or "fsync+dir"
+            commit_interval (float): Group commit window in seconds, 0 to save on every change
+            workers (int, optional): Threads for loading and saving shards, defaults to the CPU count
+            **shard_options: JsonAccountStore options passed to every shard (index, lazy,
+                compact_table, buffer_size, shared, serializer, compression, compression_level)
+        """
+        if shards < 1:
+            raise ValueError(f"Shard count must be positive: {shards}")
+        self.logger = logging.getLogger(__name__)
+        self.storage_path = storage_path
+        self.directory = f"{storage_path}.shards"
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self.durability = check_durability(durability)
+        self.shard_count = shards
+        self.generation = 0
+        self.shards = []
+        self._shard_options = shard_options
+        self._manifest_fingerprint = None
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers or os.cpu_count() or 1, thread_name_prefix="account-shard"
+        )
+
+        # Writes route through _lock so reshard() can swap the shard list;
+        # _dirty_shards collects the shards a group commit has to save
+        self._lock = threading.RLock()
+        self._dirty_lock = threading.Lock()
+        self._dirty_shards = {}
+        self._committer = None
+        if commit_interval > 0:
+            self._committer = GroupCommitter(
+                self._commit, commit_interval, name="account-shard-commit"
+            )
+
+    @staticmethod
+    def _shard_names(generation, count):
+        return [f"g{generation}-{number:04d}-of-{count:04d}.json" for number in range(count)]
+
+    def _open_shards(self, names):
+        """
+        Create (unloaded) shard stores
+
+        Args:
+            names (list): Shard file names in shard number order
+
+        Returns:
+            list: One _Shard per name
+        """
+        return [
+            _Shard(self, os.path.join(self.directory, name), durability=self.durability, **self._shard_options)
+            for name in names
+        ]
+
+    def _read_manifest(self):
+        """
+        Returns:
+            dict or None: Manifest contents, or None if there is no manifest
+        """
+        try:
+            with open(self.manifest_path, "r") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return None
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"Unsupported shard manifest version: {manifest.get('version')}")
+        return manifest
+
+    def _write_manifest(self, generation, shards):
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "hash": "crc32",
+            "generation": generation,
+            "shards": [os.path.basename(shard.storage_path) for shard in shards],
+        }
+        atomic_write(self.manifest_path, json.dumps(manifest, indent=2), self.durability)
+        self._manifest_fingerprint = stat_fingerprint(self.manifest_path)
+
+    def load(self):
+        """
+        Load every shard in parallel, creating the manifest (and splitting
+        an unsharded accounts file) on first use
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            manifest = self._read_manifest()
+            if manifest is None:
+                self._create()
+                return
+            self.generation = manifest["generation"]
+            self.shard_count = len(manifest["shards"])
+            self.shards = self._open_shards(manifest["shards"])
+            self._manifest_fingerprint = stat_fingerprint(self.manifest_path)
+            list(self._executor.map(_load_shard, self.shards))
+        self.logger.info("Loaded %s account shards", self.shard_count)
+
+    def _create(self):
+        """
+        Start generation 1, moving accounts over from an unsharded file; call with _lock held
+        """
+        split = os.path.exists(self.storage_path)
+        journal_path = f"{self.storage_path}.wal"
+        if split and os.path.exists(journal_path) and os.path.getsize(journal_path):
+            raise ValueError(
+                f"{self.storage_path} has journal entries not yet compacted into it; "
+                "open it once without shards before sharding"
+            )
+        self.generation = 1
+        self.shards = self._open_shards(self._shard_names(self.generation, self.shard_count))
+        list(self._executor.map(_load_shard, self.shards))
+        if split:
+            codec_options = {
+                name: self._shard_options[name]
+                for name in ("serializer", "compression", "compression_level")
+                if name in self._shard_options
+            }
+            source = JsonAccountStore(self.storage_path, lazy=True, **codec_options)
+            source.load()
+            self._distribute(source.iter_accounts(), self.shards)
+            source.close()
+            self.flush()
+        self._write_manifest(self.generation, self.shards)
+        if split:
+            # Only the shards hold current data from here on
+            os.replace(self.storage_path, f"{self.storage_path}.unsharded")
+            for path in (f"{self.storage_path}.idx", f"{self.storage_path}.lock", journal_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self.logger.info(
+                "Split %s into %s shards; the original is kept as %s.unsharded",
+                self.storage_path, self.shard_count, self.storage_path
+            )
+
+    def _distribute(self, accounts, shards):
+        """
+        Write (email, account) pairs into their shards with one save per shard
+
+        Args:
+            accounts: Iterable of (email, account) pairs
+            shards (list): Loaded target shards
+        """
+        buckets = [{} for _ in shards]
+        for email, account in accounts:
+            buckets[shard_for(email, len(shards))][email] = account
+        list(self._executor.map(
+            lambda pair: pair[0].put_many(pair[1]), [pair for pair in zip(shards, buckets) if pair[1]]
+        ))
+
+    def reshard(self, count):
+        """
+        Repartition the accounts over a new number of shards
+
+        Writes block for the duration; reads keep using the old shards
+        until the new manifest is in place.
+
+        Args:
+            count (int): New shard count
+        """
+        if count < 1:
+            raise ValueError(f"Shard count must be positive: {count}")
+        with self._lock:
+            self.flush()
+            old = self.shards
+            generation = self.generation + 1
+            shards = self._open_shards(self._shard_names(generation, count))
+            list(self._executor.map(_load_shard, shards))
+            self._distribute(chain.from_iterable(shard.iter_accounts() for shard in old), shards)
+            self.flush()
+            self._write_manifest(generation, shards)
+            self.shards, self.generation, self.shard_count = shards, generation, count
+        for shard in old:
+            shard.close()
+            for path in (shard.storage_path, f"{shard.storage_path}.idx", f"{shard.storage_path}.lock"):
+                if os.path.exists(path):
+                    os.remove(path)
+        self.logger.info("Resharded accounts into %s shards (generation %s)", count, generation)
+
+    def _shard(self, email):
+        shards = self.shards
+        return shards[shard_for(email, len(shards))]
+
+    def _shard_changed(self, shard):
+        """
+        Save a shard now, or mark it for the next group commit
+        """
+        if self._committer is None:
+            shard._commit()
+            return
+        with self._dirty_lock:
+            self._dirty_shards[shard.storage_path] = shard
+        self._committer.request()
+
+    def _commit(self):
+        """
+        Save every dirty shard, in parallel
+        """
+        with self._dirty_lock:
+            dirty, self._dirty_shards = self._dirty_shards, {}
+        list(self._executor.map(lambda shard: shard._commit(), dirty.values()))
+
+    def flush(self):
+        """
+        Save the shards changed inside a pending group commit window
+        """
+        if self._committer is not None:
+            self._committer.flush()
+
+    def refresh(self):
+        """
+        Pick up changes other processes made, reloading every shard when
+        another process resharded
+
+        Returns:
+            set: Emails whose records changed, were added or were removed
+        """
+        with self._lock:
+            if stat_fingerprint(self.manifest_path) != self._manifest_fingerprint:
+                before = set(self)
+                for shard in self.shards:
+                    shard.close()
+                self.load()
+                return before | set(self)
+            return set().union(*self._executor.map(lambda shard: shard.refresh(), self.shards))
+
+    def close(self):
+        """
+        Commit pending changes and close every shard
+        """
+        if self._committer is not None:
+            self._committer.close()
+        for shard in self.shards:
+            shard.close()
+        self._executor.shutdown()
+
+    def __getitem__(self, email):
+        return self._shard(email)[email]
+
+    def __setitem__(self, email, account):
+        with self._lock:
+            self._shard(email)[email] = account
+
+    def __delitem__(self, email):
+        with self._lock:
+            del self._shard(email)[email]
+
+    def __contains__(self, email):
+        return email in self._shard(email)
+
+    def __iter__(self):
+        return chain.from_iterable(self.shards)
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def update_fields(self, email, **fields):
+        """
+        Update selected fields of an existing account, saving only its shard
+
+        Args:
+            email (str): Email of the account to update
+            **fields: Field names and their new values
+        """
+        with self._lock:
+            self._shard(email).update_fields(email, **fields)
+
+    def put_many(self, accounts):
+        """
+        Store several accounts with one save per affected shard
+
+        Args:
+            accounts (dict): Account records keyed by email
+        """
+        with self._lock:
+            self._distribute(accounts.items(), self.shards)
+
+    def iter_accounts(self):
+        """
+        Iterate over (email, account) pairs shard by shard
+
+        Yields:
+            tuple: (email, account record)
+        """
+        for shard in self.shards:
+            yield from shard.iter_accounts()
+
+    def capture(self, since=None):
+        """
+        Capture every shard, incrementally while the shard layout and every
+        shard's versions are unchanged since `since`
+
+        Args:
+            since (tuple, optional): Token returned by an earlier capture
+
+        Returns:
+            tuple: (token, records, complete) as for JsonAccountStore.capture
+        """
+        with self._lock:
+            tokens = [None] * len(self.shards)
+            if since is not None and since[0] == self.generation:
+                tokens = since[1]
+            results = [shard.capture(token) for shard, token in zip(self.shards, tokens)]
+            complete = [result[2] for result in results]
+            if any(complete) and not all(complete):
+                results = [shard.capture() for shard in self.shards]
+            token = (self.generation, [result[0] for result in results])
+        records = {}
+        for _, part, _ in results:
+            if not isinstance(part, dict):
+                part = {email: dict(account) for email, account in part.items()}
+            records.update(part)
+        return token, records, results[0][2]
+
+    def rename(self, old_email, new_email, **fields):
+        """
+        Move an account to a new email; across shards the new record is
+        saved before the old one is removed, so a crash never loses it
+
+        Args:
+            old_email (str): Current email of the account
+            new_email (str): Email to store the account under
+            **fields: Field names and their new values
+        """
+        with self._lock:
+            source, target = self._shard(old_email), self._shard(new_email)
+            if source is target:
+                source.rename(old_email, new_email, **fields)
+                return
+            target[new_email] = {**source[old_email], **fields}
+            del source[old_email]
+
+    def get_by_id(self, account_id):
+        """
+        Find the account with a given id through each shard's id index
+
+        Args:
+            account_id (str): Account id, as returned by login
+
+        Returns:
+            tuple or None: (email, account record), or None if no account has that id
+        """
+        for shard in self.shards:
+            match = shard.get_by_id(account_id)
+            if match is not None:
+                return match
+        return None
+
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        List accounts created in [start, end), oldest first, merging the
+        shards' creation-time indexes
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of accounts
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        merged = heapq.merge(
+            *(shard.created_between(start, end, limit) for shard in self.shards),
+            key=lambda match: (time_key(match[1]["created_at"]), match[0]),
+        )
+        return list(islice(merged, limit))
+
+    def locked_accounts(self, now=None):
+        """
+        List accounts whose persisted lock has not expired
+
+        Args:
+            now (datetime, optional): Reference time, defaults to the current local time
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        return [match for shard in self.shards for match in shard.locked_accounts(now)]
+
+
+def _load_shard(shard):
+    shard.load()
+
+
+def main(argv=None):
+    """
+    Reshard an account store with the configured `database` options:
+    python -m auth.sharded_account_store SHARD_COUNT [--path STORAGE_PATH]
+    """
+    import argparse
+    from config.application_settings import ApplicationSettings
+    from .account_store import create_account_store
+
+    parser = argparse.ArgumentParser(description="Reshard the account store")
+    parser.add_argument("shards", type=int, help="New shard count")
+    parser.add_argument("--path", help="Storage path (default: database.path)")
+    args = parser.parse_args(argv)
+
+    settings = ApplicationSettings()
+    options = dict(settings.get("database", {}))
+    path = args.path or options.get("path") or "accounts.json"
+    # An existing manifest keeps its shard count until reshard() changes it
+    options["shards"] = options.get("shards") or args.shards
+    store = create_account_store("json", path, options)
+    store.load()
+    if store.shard_count != args.shards:
+        store.reshard(args.shards)
+    print(f"{len(store)} accounts in {store.shard_count} shards")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,428 @@
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+from .account_store import AccountStore
+from .atomic_file import check_durability
+from .secondary_index import time_text
+
+
+class SqliteAccountStore(AccountStore):
+    """
+    Account store backed by SQLite.
+
+    Each account is a single row keyed by email, so reads and writes touch
+    only the affected record. The database runs in WAL mode and every
+    thread gets its own connection, closed once the thread has exited.
+    Indexes on id, created_at and (partially) locked_until serve the
+    account queries. Once backed up, writes are also logged for
+    incremental backups (see capture).
+    """
+
+    COLUMNS = ("id", "password", "created_at", "login_attempts", "locked_until")
+
+    # PRAGMA synchronous setting for each durability level
+    SYNCHRONOUS = {
+        "none": "OFF",
+        "flush": "NORMAL",
+        "fsync": "FULL",
+        "fsync+dir": "EXTRA",
+    }
+
+    # First bytes of every SQLite database file
+    HEADER = b"SQLite format 3\x00"
+
+    # Accounts inserted per transaction when migrating from another store
+    MIGRATE_BATCH_SIZE = 10000
+
+    # Emails of changed accounts, numbered in write order; created by the first capture
+    CHANGE_LOG = """
+        CREATE TABLE IF NOT EXISTS account_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT NOT NULL
+        );
+        CREATE TRIGGER IF NOT EXISTS account_inserted AFTER INSERT ON accounts BEGIN
+            INSERT INTO account_changes (email) VALUES (NEW.email);
+        END;
+        CREATE TRIGGER IF NOT EXISTS account_updated AFTER UPDATE ON accounts BEGIN
+            INSERT INTO account_changes (email) VALUES (OLD.email);
+            INSERT INTO account_changes (email) SELECT NEW.email WHERE NEW.email != OLD.email;
+        END;
+        CREATE TRIGGER IF NOT EXISTS account_deleted AFTER DELETE ON accounts BEGIN
+            INSERT INTO account_changes (email) VALUES (OLD.email);
+        END;
+    """
+
+    def __init__(self, storage_path="accounts.db", durability="flush", migrate_from=None):
+        """
+        Initialize the SQLite account store
+
+        Args:
+            storage_path (str): Path to the SQLite database file
+            durability (str): "none", "flush", "fsync" or "fsync+dir"
+            migrate_from (AccountStore, optional): Unloaded store whose
+                accounts are copied into the database on load
+        """
+        self.logger = logging.getLogger(__name__)
+        self.storage_path = storage_path
+        self.durability = check_durability(durability)
+        self.migrate_from = migrate_from
+
+        # Per-thread connections, keyed by thread so those of exited threads can be closed
+        self._local = threading.local()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
+
+    def _connection(self):
+        """
+        Get the connection owned by the calling thread, opening it on first use
+
+        Opening one closes the connections of threads that have exited, so
+        short-lived threads (e.g. one per metrics scrape) do not leak them.
+
+        Returns:
+            sqlite3.Connection: Connection for the current thread
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.storage_path, isolation_level=None, check_same_thread=False
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self.SYNCHRONOUS[self.durability]}")
+            connection.execute("PRAGMA busy_timeout=5000")
+            self._local.connection = connection
+            with self._connections_lock:
+                for thread in [thread for thread in self._connections if not thread.is_alive()]:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = connection
+        return connection
+
+    def load(self):
+        """
+        Open the database and create the accounts table if needed
+
+        Raises:
+            ValueError: If the file exists but is not a SQLite database
+        """
+        self._check_header()
+        self._connection().execute(
+            """
+            CREATE TABLE IF NOT EXISTS accounts (
+                email TEXT PRIMARY KEY,
+                id TEXT NOT NULL,
+                password TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                login_attempts INTEGER NOT NULL DEFAULT 0,
+                locked_until TEXT
+            ) WITHOUT ROWID
+            """
+        )
+        self._connection().executescript(
+            """
+            CREATE INDEX IF NOT EXISTS accounts_id ON accounts (id);
+            CREATE INDEX IF NOT EXISTS accounts_created_at ON accounts (created_at);
+            CREATE INDEX IF NOT EXISTS accounts_locked ON accounts (locked_until)
+                WHERE locked_until IS NOT NULL;
+            """
+        )
+        if self.migrate_from is not None:
+            self._migrate(self.migrate_from)
+            self.migrate_from = None
+
+    def _check_header(self):
+        """
+        Refuse to open another kind of file, e.g. a JSON account store, as a database
+        """
+        try:
+            with open(self.storage_path, "rb") as f:
+                header = f.read(len(self.HEADER))
+        except FileNotFoundError:
+            return
+        if header and header != self.HEADER:
+            raise ValueError(f"{self.storage_path} is not a SQLite database; set database.path to a .db file")
+
+    def _migrate(self, source):
+        """
+        Copy every account of another store into the database, in batches
+
+        Args:
+            source (AccountStore): Unloaded store to copy from; it is left unchanged
+        """
+        source.load()
+        try:
+            batch = {}
+            count = 0
+            for email, account in source.iter_accounts():
+                batch[email] = account
+                if len(batch) >= self.MIGRATE_BATCH_SIZE:
+                    self.put_many(batch)
+                    count += len(batch)
+                    batch = {}
+            if batch:
+                self.put_many(batch)
+                count += len(batch)
+        finally:
+            source.close()
+        self.logger.info("Migrated %s accounts from %s to %s", count, source.storage_path, self.storage_path)
+
+    def close(self):
+        """
+        Close every pooled connection
+        """
+        with self._connections_lock:
+            for connection in self._connections.values():
+                connection.close()
+            self._connections = {}
+        self._local = threading.local()
+
+    def _row_to_account(self, row):
+        """
+        Convert a database row into an account record
+
+        Args:
+            row (tuple): Values in COLUMNS order
+
+        Returns:
+            dict: Account record
+        """
+        return dict(zip(self.COLUMNS, row))
+
+    def __getitem__(self, email):
+        row = self._connection().execute(
+            "SELECT id, password, created_at, login_attempts, locked_until "
+            "FROM accounts WHERE email = ?",
+            (email,),
+        ).fetchone()
+        if row is None:
+            raise KeyError(email)
+        return self._row_to_account(row)
+
+    def __setitem__(self, email, account):
+        self._connection().execute(
+            "INSERT OR REPLACE INTO accounts "
+            "(email, id, password, created_at, login_attempts, locked_until) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (email,) + tuple(account.get(column) for column in self.COLUMNS),
+        )
+
+    def put_many(self, accounts):
+        """
+        Insert or replace several accounts in a single transaction
+
+        Args:
+            accounts (dict): Account records keyed by email
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.executemany(
+                "INSERT OR REPLACE INTO accounts "
+                "(email, id, password, created_at, login_attempts, locked_until) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (email,) + tuple(account.get(column) for column in self.COLUMNS)
+                    for email, account in accounts.items()
+                ),
+            )
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def __delitem__(self, email):
+        cursor = self._connection().execute(
+            "DELETE FROM accounts WHERE email = ?", (email,)
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(email)
+
+    def __contains__(self, email):
+        row = self._connection().execute(
+            "SELECT 1 FROM accounts WHERE email = ?", (email,)
+        ).fetchone()
+        return row is not None
+
+    def __iter__(self):
+        cursor = self._connection().execute("SELECT email FROM accounts")
+        for (email,) in cursor:
+            yield email
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+    def update_fields(self, email, **fields):
+        """
+        Update selected columns of a single account row
+
+        Args:
+            email (str): Email of the account to update
+            **fields: Column names and their new values
+
+        Raises:
+            KeyError: If the account or a column does not exist
+        """
+        unknown = set(fields) - set(self.COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown account fields: {sorted(unknown)}")
+
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        cursor = self._connection().execute(
+            f"UPDATE accounts SET {assignments} WHERE email = ?",
+            tuple(fields.values()) + (email,),
+        )
+        if cursor.rowcount == 0:
+            raise KeyError(email)
+
+    def rename(self, old_email, new_email, **fields):
+        """
+        Move an account to a new email in a single transaction
+
+        Args:
+            old_email (str): Current email of the account
+            new_email (str): Email to store the account under
+            **fields: Column names and their new values
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if old_email != new_email:
+                cursor = connection.execute(
+                    "UPDATE accounts SET email = ? WHERE email = ?",
+                    (new_email, old_email),
+                )
+                if cursor.rowcount == 0:
+                    raise KeyError(old_email)
+            if fields:
+                self.update_fields(new_email, **fields)
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def capture(self, since=None):
+        """
+        Copy the records changed since an earlier capture, for backups
+
+        Triggers log the email of every written account in account_changes;
+        the first capture creates them, so a store that is never backed up
+        pays nothing. The token is the number of the last logged change,
+        which survives restarts. An incremental capture reads only the
+        changed rows and drops the log entries up to `since`, which the
+        previous backup already covers, so the log holds the changes of
+        one backup interval. A full capture reads in one transaction and
+        does not block writers.
+
+        Args:
+            since (int, optional): Token returned by an earlier capture
+
+        Returns:
+            tuple: (token, records, complete); records maps emails to
+            records, or to None for deletions, and complete is True when it
+            holds the whole store rather than the changes since `since`
+        """
+        connection = self._connection()
+        connection.executescript(self.CHANGE_LOG)
+        if isinstance(since, int):
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                token = self._last_change(connection)
+                if since <= token:
+                    connection.execute("DELETE FROM account_changes WHERE seq <= ?", (since,))
+                    rows = connection.execute(
+                        "SELECT changed.email, id, password, created_at, login_attempts, locked_until "
+                        "FROM (SELECT DISTINCT email FROM account_changes) AS changed "
+                        "LEFT JOIN accounts ON accounts.email = changed.email"
+                    )
+                    changes = {row[0]: None if row[1] is None else self._row_to_account(row[1:]) for row in rows}
+                    connection.execute("COMMIT")
+                    return token, changes, False
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            self.logger.warning("Backup token %s is ahead of the change log; taking a full backup", since)
+
+        connection.execute("BEGIN")
+        try:
+            token = self._last_change(connection)
+            records = dict(self._select("1"))
+        finally:
+            connection.execute("COMMIT")
+        return token, records, True
+
+    @staticmethod
+    def _last_change(connection):
+        """
+        Returns:
+            int: Number of the last logged change, 0 if none was logged
+        """
+        row = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'account_changes'").fetchone()
+        return row[0] if row is not None else 0
+
+    def _select(self, where, parameters=()):
+        """
+        Fetch (email, account) pairs matching a WHERE clause
+
+        Args:
+            where (str): SQL following WHERE, e.g. with ORDER BY and LIMIT
+            parameters (tuple): Query parameters
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        rows = self._connection().execute(
+            "SELECT email, id, password, created_at, login_attempts, locked_until "
+            f"FROM accounts WHERE {where}",
+            parameters,
+        )
+        return [(row[0], self._row_to_account(row[1:])) for row in rows]
+
+    def get_by_id(self, account_id):
+        """
+        Find the account with a given id through the id index
+
+        Args:
+            account_id (str): Account id, as returned by login
+
+        Returns:
+            tuple or None: (email, account record), or None if no account has that id
+        """
+        matches = self._select("id = ? LIMIT 1", (account_id,))
+        return matches[0] if matches else None
+
+    def created_between(self, start=None, end=None, limit=None):
+        """
+        List accounts created in [start, end), oldest first, through the
+        created_at index
+
+        Args:
+            start (str or datetime, optional): Inclusive lower bound
+            end (str or datetime, optional): Exclusive upper bound
+            limit (int, optional): Maximum number of accounts
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        return self._select(
+            "created_at >= ? AND created_at < ? ORDER BY created_at, email LIMIT ?",
+            (
+                "" if start is None else time_text(start),
+                "\uffff" if end is None else time_text(end),
+                -1 if limit is None else limit,
+            ),
+        )
+
+    def locked_accounts(self, now=None):
+        """
+        List accounts whose persisted lock has not expired, through the
+        partial locked_until index
+
+        Args:
+            now (datetime, optional): Reference time, defaults to the current local time
+
+        Returns:
+            list: (email, account record) pairs
+        """
+        return self._select("locked_until > ?", (time_text(now or datetime.now()),))
@@ -0,0 +1,42 @@
+import json
+import time
+import argparse
+
+from auth.account_codec import (
+    COMPRESSIONS, SERIALIZERS, AccountCodec, decode_accounts, msgpack, orjson, zstandard
+)
+from benchmarks.synthetic_accounts import sample_accounts
+
+
+def main(argv=None):
+    """
+    Size and speed of every available serializer and compression
+    """
+    parser = argparse.ArgumentParser(description="Compare account store serializers and compressions")
+    parser.add_argument("counts", type=int, nargs="*", default=[100_000, 1_000_000],
+                        help="Store sizes (default: 100000 1000000)")
+    args = parser.parse_args(argv)
+
+    codecs = [("json-indent", None)] + [
+        (f"{serializer}+{compression}", AccountCodec(serializer, compression))
+        for serializer in SERIALIZERS
+        for compression in COMPRESSIONS
+        if (serializer != "orjson" or orjson is not None)
+        and (serializer != "msgpack" or msgpack is not None)
+        and (compression != "zstd" or zstandard is not None)
+    ]
+    for count in args.counts:
+        accounts = dict(sample_accounts(count))
+        print(f"Accounts: {count}")
+        for name, codec in codecs:
+            start = time.perf_counter()
+            data = json.dumps(accounts, indent=4).encode() if codec is None else codec.encode(accounts)
+            save = time.perf_counter() - start
+            start = time.perf_counter()
+            decode_accounts(data)
+            load = time.perf_counter() - start
+            print(f"  {name:20} {len(data) / 1e6:8.1f} MB   save {save * 1000:8.0f} ms   load {load * 1000:8.0f} ms")
+
+
+if __name__ == '__main__':
+    main()
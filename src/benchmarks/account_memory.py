@@ -0,0 +1,86 @@
+import os
+import gc
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from auth.compact_account_table import CompactAccountTable
+from benchmarks.synthetic_accounts import sample_accounts
+
+
+def _build_table(accounts):
+    table = CompactAccountTable()
+    for email, account in accounts:
+        table[email] = account
+    return table
+
+
+_BUILDERS = {"dict": dict, "table": _build_table}
+
+
+def _resident_bytes():
+    """
+    Returns:
+        int or None: Resident set size of this process, None without /proc
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def measure(kind, count):
+    """
+    Memory a container of `count` sample accounts adds to a fresh process:
+    resident memory where /proc is available, else traced allocations
+
+    Args:
+        kind (str): "dict" or "table"
+        count (int): Number of accounts
+
+    Returns:
+        tuple: (bytes, "RSS" or "tracemalloc")
+    """
+    build = _BUILDERS[kind]
+    before = _resident_bytes()
+    if before is None:
+        import tracemalloc
+
+        tracemalloc.start()
+        container = build(sample_accounts(count))
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return size, "tracemalloc"
+    container = build(sample_accounts(count))
+    gc.collect()
+    size = _resident_bytes() - before
+    del container
+    return size, "RSS"
+
+
+def main(argv=None):
+    """
+    Memory benchmark: dict-of-dicts accounts versus CompactAccountTable,
+    each built in its own process
+    """
+    parser = argparse.ArgumentParser(description="Compare the memory of account containers")
+    parser.add_argument("count", type=int, nargs="?", default=1_000_000, help="Accounts (default: %(default)s)")
+    args = parser.parse_args(argv)
+    count = args.count
+
+    context = multiprocessing.get_context("spawn")
+    sizes = {}
+    for kind in _BUILDERS:
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            sizes[kind], method = executor.submit(measure, kind, count).result()
+    dict_bytes, table_bytes = sizes["dict"], sizes["table"]
+
+    print(f"Accounts:              {count} (measured as {method} growth)")
+    print(f"dict of dicts:         {dict_bytes / 1e6:8.1f} MB ({dict_bytes / count:.0f} B/account)")
+    print(f"CompactAccountTable:   {table_bytes / 1e6:8.1f} MB ({table_bytes / count:.0f} B/account)")
+    print(f"Reduction:             {dict_bytes / table_bytes:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,318 @@
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import argparse
+import tempfile
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+from auth.auth_service import AuthService
+from benchmarks.synthetic_accounts import (
+    LOCKED_EVERY,
+    PASSWORD,
+    generate_store,
+    is_locked,
+    synthetic_email,
+)
+
+RESULTS_VERSION = 1
+
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+
+def peak_rss_mb():
+    """
+    Returns:
+        float or None: Peak resident set size of this process in MB, None where unsupported
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(latencies, elapsed):
+    """
+    Throughput and latency percentiles of one operation
+
+    Args:
+        latencies (list): Seconds per call
+        elapsed (float): Wall time of the whole run
+
+    Returns:
+        dict: calls, seconds, ops_per_second, mean/p50/p99/max in milliseconds
+    """
+    if not latencies:
+        return {"calls": 0, "seconds": elapsed}
+    ordered = sorted(latencies)
+
+    def rank(percentile):
+        return ordered[max(0, -(-len(ordered) * percentile // 100) - 1)] * 1000
+
+    return {
+        "calls": len(ordered),
+        "seconds": elapsed,
+        "ops_per_second": len(ordered) / sum(ordered) if sum(ordered) else None,
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": rank(50),
+        "p99_ms": rank(99),
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def measure(operation, calls, budget):
+    """
+    Time `operation(i)` for i in range(calls), stopping early once
+    `budget` seconds have passed
+
+    Returns:
+        dict: Result of summarize
+    """
+    latencies = []
+    started = time.perf_counter()
+    for number in range(calls):
+        call_started = time.perf_counter()
+        operation(number)
+        latencies.append(time.perf_counter() - call_started)
+        if time.perf_counter() - started >= budget:
+            break
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def _numbers(size, part, parts=3):
+    """
+    Unlocked account numbers of one slice of the store, so operations
+    that change accounts never touch each other's
+    """
+    start, stop = size * part // parts, size * (part + 1) // parts
+    return [number for number in range(start, stop) if not is_locked(number)]
+
+
+def _expect(result, success):
+    """
+    Stop the benchmark when a call took another path than the one measured
+
+    Raises:
+        RuntimeError: If the call's success flag is not `success`
+    """
+    if result[0] is not success:
+        raise RuntimeError(f"Unexpected auth result: {result}")
+
+
+def run_operations(path, size, config):
+    """
+    Benchmark every operation against a generated store; runs in a fresh
+    process so peak RSS belongs to this store size alone
+
+    Args:
+        path (str): Generated store
+        size (int): Accounts in the store
+        config (dict): Benchmark settings, see run_benchmarks
+
+    Returns:
+        dict: Operation name to its summary, plus peak_rss_mb
+    """
+    # Records are still created, as they are for the app's log queue, but not printed
+    logging.getLogger().addHandler(logging.NullHandler())
+    calls, repeats, budget = config["iterations"], config["repeats"], config["budget"]
+    auth = AuthService(
+        storage_path=path,
+        storage_type=config["storage_type"],
+        storage_options=config["storage_options"],
+        hashing_options=config["hashing_options"],
+        rate_limit_options={"enabled": False},
+    )
+    succeeding, failing, updating = (_numbers(size, part) for part in range(3))
+    locked = list(range(LOCKED_EVERY - 1, size, LOCKED_EVERY)) or [None]
+
+    def login(numbers, password, expected):
+        def operation(number):
+            email = synthetic_email(numbers[number % len(numbers)])
+            _expect(auth.login(email, password), expected)
+        return operation
+
+    def register(number):
+        _expect(auth.register_account(f"new{number:07d}@bench.example.com", PASSWORD), True)
+
+    def update(number):
+        email = synthetic_email(updating[number])
+        _expect(auth.update_account(email, f"updated-{email}", PASSWORD), True)
+
+    results = {}
+    try:
+        results["load_accounts"] = measure(lambda number: auth.load_accounts(), repeats, budget)
+        results["login_success"] = measure(login(succeeding, PASSWORD, True), calls, budget)
+        results["login_failure"] = measure(login(failing, "Wrong1!password", False), calls, budget)
+        if locked[0] is not None:
+            results["login_locked"] = measure(login(locked, PASSWORD, False), calls, budget)
+        results["register_account"] = measure(register, calls, budget)
+        results["update_account"] = measure(update, min(calls, len(updating)), budget)
+        results["save_accounts"] = measure(lambda number: auth.save_accounts(), repeats, budget)
+    finally:
+        auth.close()
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, config=None, log=None):
+    """
+    Generate a store of each size and benchmark it, each step in its own process
+
+    Args:
+        sizes (iterable): Store sizes in accounts
+        config (dict, optional): iterations, repeats (of loads and saves),
+            budget (seconds per operation), storage_type, storage_options
+            and hashing_options; missing keys use defaults
+        log (callable, optional): Progress callback taking a message
+
+    Returns:
+        dict: Results document with environment, config and per-size results
+    """
+    config = dict(
+        {
+            "iterations": 100,
+            "repeats": 3,
+            "budget": 30.0,
+            "storage_type": "json",
+            "storage_options": {},
+            "hashing_options": {},
+        },
+        **(config or {}),
+    )
+    log = log or (lambda message: None)
+    document = {
+        "version": RESULTS_VERSION,
+        "created_at": datetime.now().isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "config": config,
+        "sizes": [],
+    }
+    context = multiprocessing.get_context("spawn")
+    filename = "accounts.db" if config["storage_type"] == "sqlite" else "accounts.json"
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix="auth-benchmark-") as directory:
+            path = os.path.join(directory, filename)
+            log(f"Generating {size} accounts")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                generate_seconds = executor.submit(
+                    generate_store,
+                    path,
+                    size,
+                    config["storage_type"],
+                    config["storage_options"],
+                    config["hashing_options"],
+                ).result()
+            log(f"Benchmarking {size} accounts")
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                results = executor.submit(run_operations, path, size, config).result()
+        peak = results.pop("peak_rss_mb")
+        document["sizes"].append(
+            {"accounts": size, "generate_seconds": generate_seconds, "peak_rss_mb": peak, "operations": results}
+        )
+    return document
+
+
+def format_results(document):
+    """
+    Returns:
+        str: Results as a table, one row per size and operation
+    """
+    lines = [f"{'accounts':>9}  {'operation':16} {'calls':>6} {'ops/s':>10} {'p50 ms':>9} {'p99 ms':>9}"]
+    for entry in document["sizes"]:
+        for name, result in entry["operations"].items():
+            if not result["calls"]:
+                continue
+            lines.append(
+                f"{entry['accounts']:>9}  {name:16} {result['calls']:>6} {result['ops_per_second']:>10.1f} "
+                f"{result['p50_ms']:>9.3f} {result['p99_ms']:>9.3f}"
+            )
+        if entry["peak_rss_mb"] is not None:
+            lines.append(f"{entry['accounts']:>9}  peak RSS {entry['peak_rss_mb']:.1f} MB")
+    return "\n".join(lines)
+
+
+def compare_results(old, new):
+    """
+    Compare two results documents
+
+    Args:
+        old (dict): Baseline results
+        new (dict): Results to compare against the baseline
+
+    Returns:
+        str: Table of throughput and p99 ratios (new / old) for operations both measured
+    """
+    baseline = {
+        (entry["accounts"], name): result
+        for entry in old["sizes"]
+        for name, result in entry["operations"].items()
+    }
+    lines = [f"{'accounts':>9}  {'operation':16} {'ops/s':>8} {'p99':>8}"]
+    for entry in new["sizes"]:
+        for name, result in entry["operations"].items():
+            before = baseline.get((entry["accounts"], name))
+            if not before or not before["calls"] or not result["calls"]:
+                continue
+            throughput = result["ops_per_second"] / before["ops_per_second"]
+            p99 = result["p99_ms"] / before["p99_ms"] if before["p99_ms"] else float("inf")
+            lines.append(f"{entry['accounts']:>9}  {name:16} {throughput:>7.2f}x {p99:>7.2f}x")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Console entry point: benchmark AuthService against synthetic stores
+    of each size and write the results as JSON
+    """
+    parser = argparse.ArgumentParser(description="Benchmark AuthService against synthetic account stores")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma-separated store sizes (default: %(default)s)")
+    parser.add_argument("--iterations", type=int, default=100, help="Calls per auth operation")
+    parser.add_argument("--repeats", type=int, default=3, help="Calls of load_accounts and save_accounts")
+    parser.add_argument("--budget", type=float, default=30.0, help="Seconds after which an operation stops early")
+    parser.add_argument("--storage-type", default="json", choices=("json", "sqlite"))
+    parser.add_argument("--storage-options", default="{}", help="JSON object of `database` settings")
+    parser.add_argument("--scheme", default="scrypt", help="Password hash scheme")
+    parser.add_argument("--cost", type=int, help="Password hash cost; lower it to isolate storage costs")
+    parser.add_argument("--output", help="Results file (default: auth-benchmark-<time>.json)")
+    parser.add_argument("--compare", help="Earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    config = {
+        "iterations": args.iterations,
+        "repeats": args.repeats,
+        "budget": args.budget,
+        "storage_type": args.storage_type,
+        "storage_options": json.loads(args.storage_options),
+        "hashing_options": {"scheme": args.scheme, "cost": args.cost},
+    }
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    document = run_benchmarks(sizes, config, log=lambda message: print(message, file=sys.stderr))
+
+    output = args.output or f"auth-benchmark-{datetime.now():%Y%m%d-%H%M%S}.json"
+    with open(output, "w") as f:
+        json.dump(document, f, indent=2)
+    print(format_results(document))
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            print(compare_results(json.load(f), document))
+
+
+if __name__ == '__main__':
+    main()
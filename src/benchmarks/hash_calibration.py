@@ -0,0 +1,26 @@
+import time
+import argparse
+
+from auth.password_hasher import SCHEMES, PasswordHasher
+
+
+def main(argv=None):
+    """
+    Print the calibrated cost of each scheme for a range of target latencies
+    """
+    parser = argparse.ArgumentParser(description="Calibrate password hashing costs on this machine")
+    parser.add_argument("targets", type=int, nargs="*", default=[10, 50, 100],
+                        help="Target latencies in ms (default: 10 50 100)")
+    args = parser.parse_args(argv)
+
+    for scheme in SCHEMES:
+        for target_ms in args.targets:
+            hasher = PasswordHasher.calibrate(scheme, target_ms)
+            start = time.perf_counter()
+            encoded = hasher.hash("Calibration1!")
+            print(f"{scheme:14} target {target_ms:4} ms -> cost {hasher.cost:>8}, "
+                  f"measured {(time.perf_counter() - start) * 1000:6.1f} ms, {encoded[:40]}...")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(SRC_DIR)
+
+DEFAULT_BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "import_budget.json")
+
+# Written to stderr right before the measured imports, so interpreter
+# startup imports (site, encodings) are left out
+MARKER = "import-budget: start"
+
+
+def parse_importtime(text):
+    """
+    Parse `python -X importtime` output following MARKER
+
+    Args:
+        text (str): The interpreter's stderr
+
+    Returns:
+        list: (module, depth, self_us, cumulative_us) tuples in completion order
+    """
+    entries = []
+    started = False
+    for line in text.splitlines():
+        if line == MARKER:
+            started = True
+            continue
+        if not started or not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        entries.append((name.strip(), depth, int(fields[0]), int(fields[1])))
+    return entries
+
+
+def measure_imports(modules, python=sys.executable):
+    """
+    Import modules in a fresh interpreter under -X importtime
+
+    The app's root and src directories are on the path, as when started
+    through src/main.py, bytecode is cached, and the working directory is
+    empty so no config file is picked up.
+
+    Args:
+        modules (list): Module names imported in order
+        python (str): Interpreter to run
+
+    Returns:
+        list: Result of parse_importtime
+
+    Raises:
+        RuntimeError: If an import fails
+    """
+    script = f"import sys; sys.stderr.write({MARKER!r} + '\\n'); " + "; ".join(f"import {name}" for name in modules)
+    path = [ROOT_DIR, SRC_DIR] + [entry for entry in os.environ.get("PYTHONPATH", "").split(os.pathsep) if entry]
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+    # Measure with bytecode caches, as an installed app runs
+    environment.pop("PYTHONDONTWRITEBYTECODE", None)
+    with tempfile.TemporaryDirectory(prefix="import-budget-") as directory:
+        result = subprocess.run(
+            [python, "-X", "importtime", "-c", script],
+            capture_output=True,
+            text=True,
+            env=environment,
+            cwd=directory,
+        )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"Importing {', '.join(modules)} failed: {errors[-1] if errors else result.returncode}")
+    return parse_importtime(result.stderr)
+
+
+def import_profile(modules, runs=5, python=sys.executable):
+    """
+    Median import cost of every module over several runs, after one
+    discarded run that writes bytecode caches
+
+    Args:
+        modules (list): Startup modules
+        runs (int): Measured runs
+        python (str): Interpreter to run
+
+    Returns:
+        dict: total_ms (all measured imports) and modules, mapping each
+            imported module to its median cumulative and self time in ms
+    """
+    measure_imports(modules, python)
+    totals = []
+    cumulative = {}
+    own = {}
+    for _ in range(max(1, runs)):
+        entries = measure_imports(modules, python)
+        totals.append(sum(entry[3] for entry in entries if entry[1] == 0))
+        for name, depth, self_us, cumulative_us in entries:
+            cumulative.setdefault(name, []).append(cumulative_us)
+            own.setdefault(name, []).append(self_us)
+    return {
+        "total_ms": median(totals) / 1000,
+        "modules": {
+            name: {"cumulative_ms": median(values) / 1000, "self_ms": median(own[name]) / 1000}
+            for name, values in cumulative.items()
+        },
+    }
+
+
+def check_budget(profile, budget):
+    """
+    Compare an import profile with a budget
+
+    Args:
+        profile (dict): Result of import_profile
+        budget (dict): total_ms, module_ms (module to its cumulative
+            limit) and forbidden (modules that must not be imported)
+
+    Returns:
+        list: Violation messages, empty when within budget
+    """
+    violations = []
+    if budget.get("total_ms") is not None and profile["total_ms"] > budget["total_ms"]:
+        violations.append(f"startup imports take {profile['total_ms']:.1f} ms, budget {budget['total_ms']} ms")
+    for name, limit in budget.get("module_ms", {}).items():
+        timing = profile["modules"].get(name)
+        if timing is not None and timing["cumulative_ms"] > limit:
+            violations.append(f"{name} takes {timing['cumulative_ms']:.1f} ms, budget {limit} ms")
+    for name in budget.get("forbidden", ()):
+        if name in profile["modules"]:
+            violations.append(f"{name} is imported at startup")
+    return violations
+
+
+def main(argv=None):
+    """
+    Measure the app's startup imports and fail when they exceed the budget:
+    python -m benchmarks.import_budget [--budget FILE] [MODULE ...]
+    """
+    parser = argparse.ArgumentParser(description="Check startup import time against a budget")
+    parser.add_argument("modules", nargs="*", help="Startup modules (default: the budget file's modules)")
+    parser.add_argument("--budget", default=DEFAULT_BUDGET_FILE, help="Budget file (default: %(default)s)")
+    parser.add_argument("--runs", type=int, default=5, help="Measured runs; medians are reported")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list")
+    parser.add_argument("--output", help="Write the profile and violations as JSON")
+    args = parser.parse_args(argv)
+
+    with open(args.budget) as f:
+        budget = json.load(f)
+    modules = args.modules or budget["modules"]
+    try:
+        profile = import_profile(modules, args.runs)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    violations = check_budget(profile, budget)
+
+    slowest = sorted(profile["modules"].items(), key=lambda item: item[1]["cumulative_ms"], reverse=True)
+    print(f"{'cumulative ms':>13} {'self ms':>8}  module")
+    for name, timing in slowest[:args.top]:
+        print(f"{timing['cumulative_ms']:>13.1f} {timing['self_ms']:>8.1f}  {name}")
+    print(f"Startup imports of {', '.join(modules)}: {profile['total_ms']:.1f} ms "
+          f"(budget {budget.get('total_ms', 'none')} ms)")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"modules": modules, "profile": profile, "violations": violations}, f, indent=2)
+    for violation in violations:
+        print(f"Over budget: {violation}")
+    if violations:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
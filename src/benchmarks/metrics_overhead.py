@@ -0,0 +1,40 @@
+import time
+import argparse
+
+from auth.metrics import MetricsRegistry
+
+
+def main(argv=None):
+    """
+    Print the overhead of instrumented calls with metrics off and on
+    """
+    parser = argparse.ArgumentParser(description="Measure the overhead of metrics instrumentation")
+    parser.add_argument("calls", type=int, nargs="?", default=1_000_000, help="Calls per measurement")
+    calls = parser.parse_args(argv).calls
+    registry = MetricsRegistry()
+
+    def plain():
+        return True, None
+
+    instrumented = registry.timed("benchmark", "a no-op call")(plain)
+    counter = registry.counter("benchmark_events_total", "Events")
+    histogram = registry.histogram("benchmark_event_seconds", "Event durations")
+
+    def measure(function):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        return (time.perf_counter() - start) / calls * 1e9
+
+    baseline = measure(plain)
+    for enabled in (False, True):
+        registry.enabled = enabled
+        state = "on " if enabled else "off"
+        print(f"metrics {state}: timed call +{measure(instrumented) - baseline:6.0f} ns, "
+              f"counter.inc {measure(counter.inc):4.0f} ns, "
+              f"histogram.observe {measure(lambda: histogram.observe(0.0042)):4.0f} ns")
+    print(f"p50 {histogram.percentile(50) * 1000:.3f} ms over {histogram.count} observations")
+
+
+if __name__ == '__main__':
+    main()
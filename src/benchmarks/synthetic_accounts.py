@@ -0,0 +1,115 @@
+import time
+import uuid
+import hashlib
+from datetime import datetime, timedelta
+
+from auth.account_store import create_account_store
+from auth.password_hasher import PasswordHasher, join_hash
+
+# Password of every synthetic account
+PASSWORD = "Benchmark1!pass"
+
+# Every LOCKED_EVERY-th account is stored with an active lock
+LOCKED_EVERY = 100
+
+
+def synthetic_email(number):
+    """
+    Args:
+        number (int): Account number
+
+    Returns:
+        str: Email of the synthetic account
+    """
+    return f"user{number:07d}@bench.example.com"
+
+
+def is_locked(number):
+    """
+    Returns:
+        bool: Whether the synthetic account is generated locked
+    """
+    return number % LOCKED_EVERY == LOCKED_EVERY - 1
+
+
+def synthetic_accounts(count, password_hash):
+    """
+    Build account records the way AuthService.register_account stores them
+
+    All accounts share one password hash, since hashing a million
+    passwords would take hours; lookups and saves do not depend on it.
+    Creation times are spread over the past year and every
+    LOCKED_EVERY-th account carries a lock an hour into the future.
+
+    Args:
+        count (int): Number of accounts
+        password_hash (str): Encoded hash of PASSWORD
+
+    Returns:
+        dict: Account records keyed by email
+    """
+    start = datetime.now() - timedelta(days=365)
+    step = timedelta(days=365) / max(count, 1)
+    locked_until = (datetime.now() + timedelta(hours=1)).isoformat()
+    accounts = {}
+    for number in range(count):
+        locked = is_locked(number)
+        accounts[synthetic_email(number)] = {
+            "id": str(uuid.UUID(int=number + 1)),
+            "password": password_hash,
+            "created_at": (start + step * number).isoformat(),
+            "login_attempts": 5 if locked else 0,
+            "locked_until": locked_until if locked else None,
+        }
+    return accounts
+
+
+def sample_accounts(count):
+    """
+    Generate accounts shaped like AuthService.register_account creates them,
+    each with its own password hash, for layout and encoding benchmarks
+
+    Args:
+        count (int): Number of accounts
+
+    Yields:
+        tuple: (email, account record)
+    """
+    created_at = datetime(2024, 1, 1)
+    for number in range(count):
+        # Stand-in for a scrypt hash; these benchmarks measure layout, not hashing
+        salt = hashlib.md5(str(number).encode()).digest()
+        yield f"user{number}@example{number % 50}.com", {
+            "id": str(uuid.uuid4()),
+            "password": join_hash("$scrypt$v=1$ln=14,r=8,p=1", salt, hashlib.sha256(salt).digest()),
+            "created_at": (created_at + timedelta(seconds=number, microseconds=number % 999983)).isoformat(),
+            "login_attempts": 0,
+            "locked_until": None,
+        }
+
+
+def generate_store(path, count, storage_type="json", storage_options=None, hashing_options=None):
+    """
+    Write a synthetic store of `count` accounts with a single save
+
+    Args:
+        path (str): Storage path
+        count (int): Number of accounts
+        storage_type (str): Storage engine, as in `database.type`
+        storage_options (dict, optional): Engine settings, as in `database`
+        hashing_options (dict, optional): Scheme and cost of the shared password hash
+
+    Returns:
+        float: Seconds taken
+    """
+    started = time.perf_counter()
+    hashing_options = hashing_options or {}
+    hasher = PasswordHasher(hashing_options.get("scheme", "scrypt"), hashing_options.get("cost"))
+    password_hash = hasher.hash(PASSWORD)
+
+    store = create_account_store(storage_type, path, storage_options)
+    store.load()
+    store.put_many(synthetic_accounts(count, password_hash))
+    store.flush()
+    store.close()
+    return time.perf_counter() - started
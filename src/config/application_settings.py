@@ -1,14 +1,20 @@
 import os
 from typing import Dict, Any
-import yaml
 import logging
 
+from auth.lazy_import import lazy_module
+from config.logging_pipeline import LoggingPipeline
+
+# Only parsed when a config file exists
+yaml = lazy_module("yaml")
+
 class ApplicationSettings:
     """
     Centralized configuration management for the application
     """
     _instance = None
     _config: dict[str, Any] = {}
+    _logging_pipeline = None
 
     def __new__(cls):
         """
@@ -37,15 +43,85 @@ class ApplicationSettings:
             'version': '1.0.0',
             'logging': {
                 'level': 'INFO',
-                'file': 'app.log'
+                'file': 'app.log',
+                'format': 'json',
+                'max_bytes': 10485760,
+                'backup_count': 5,
+                'dedup': {
+                    'enabled': True,
+                    'window_seconds': 10
+                },
+                'sampling': {}
+            },
+            'metrics': {
+                'enabled': False,
+                'textfile': None,
+                'textfile_interval_seconds': 15,
+                'http_port': None
+            },
+            'ui': {
+                'prewarm_pages': True,
+                'prewarm_delay_ms': 50,
+                'background_load': True
             },
             'authentication': {
                 'max_login_attempts': 5,
-                'password_min_length': 8
+                'password_min_length': 8,
+                'password_policy': {
+                    'max_length': 0,
+                    'require_uppercase': True,
+                    'require_lowercase': True,
+                    'require_digit': True,
+                    'require_special': True,
+                    'special_characters': '!@#$%^&*(),.?":{}|<>',
+                    'cache_size': 256
+                },
+                'request_timeout_seconds': 30,
+                'lockout': {
+                    'lock_duration_seconds': 900,
+                    'attempt_ttl_seconds': 900,
+                    'checkpoint_interval_ms': 5000
+                },
+                'password_hashing': {
+                    'scheme': 'scrypt',
+                    'cost': None,
+                    'target_ms': 0,
+                    'workers': 2
+                },
+                'rate_limit': {
+                    'enabled': True,
+                    'account_rate_per_second': 1.0,
+                    'account_burst': 10,
+                    'global_rate_per_second': 100.0,
+                    'global_burst': 200,
+                    'max_tracked_accounts': 100000
+                }
             },
             'database': {
                 'type': 'json',
-                'path': 'accounts.json'
+                'path': 'accounts.json',
+                'journal': False,
+                'compact_threshold': 1048576,
+                'durability': 'flush',
+                'commit_interval_ms': 0,
+                'index': False,
+                'lazy': False,
+                'compact_table': False,
+                'shared': False,
+                'watch_debounce_ms': 250,
+                'shards': 0,
+                'shard_workers': None,
+                'serializer': 'json',
+                'compression': 'none',
+                'compression_level': None,
+                'backup': {
+                    'enabled': False,
+                    'directory': None,
+                    'interval_minutes': 60,
+                    'max_deltas': 24,
+                    'keep_chains': 2,
+                    'compression': 'gzip'
+                }
             }
         }
 
@@ -59,7 +135,7 @@ class ApplicationSettings:
                         cls._deep_merge(cls._config, file_config)
                     break
                 except (yaml.YAMLError, OSError) as e:
-                    logging.warning(f"Error loading config from {path}: {e}")
+                    logging.warning("Error loading config from %s: %s", path, e)
 
         # Configure logging based on config
         cls._configure_logging()
@@ -79,19 +155,12 @@ class ApplicationSettings:
     @classmethod
     def _configure_logging(cls):
         """
-        Configure application-wide logging
+        Configure application-wide logging through a non-blocking queue pipeline
         """
-        log_config = cls._config.get('logging', {})
-        log_level = getattr(logging, log_config.get('level', 'INFO').upper())
-        log_file = log_config.get('file', 'app.log')
-
-        # Configure logging
-        logging.basicConfig(
-            level=log_level,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            filename=log_file,
-            filemode='a'
-        )
+        if cls._logging_pipeline is not None:
+            cls._logging_pipeline.stop()
+        cls._logging_pipeline = LoggingPipeline.from_options(cls._config.get('logging', {}))
+        cls._logging_pipeline.start()
 
     @classmethod
     def get(cls, key: str, default=None):
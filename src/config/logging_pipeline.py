@@ -0,0 +1,256 @@
+import json
+import queue
+import atexit
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per line: time, level, logger, message, any `extra`
+    fields and the formatted exception
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry["stack"] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str)
+
+
+class DuplicateFilter(logging.Filter):
+    """
+    Drop repeats of a message within a time window.
+
+    Records from `min_level` to `max_level` are keyed by logger, level and
+    the unformatted message template, so a flood of "Incorrect password
+    for email: %s" collapses to one record per window however many emails
+    it names. Errors pass by default, since distinct failures often share
+    a template. The first record after a window carries the number
+    dropped in `suppressed`. Keys are kept in a bounded LRU.
+    """
+
+    def __init__(self, window=10.0, max_keys=1024, min_level=logging.WARNING, max_level=logging.WARNING, clock=None):
+        """
+        Initialize the filter
+
+        Args:
+            window (float): Seconds during which repeats are dropped
+            max_keys (int): Distinct messages tracked at once
+            min_level (int): Lowest level deduplicated; lower records always pass
+            max_level (int): Highest level deduplicated; higher records always pass
+            clock (callable, optional): Time source, defaults to record creation times
+        """
+        super().__init__()
+        self.window = window
+        self.min_level = min_level
+        self.max_level = max_level
+        self.max_keys = max_keys
+        self._clock = clock
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if not self.min_level <= record.levelno <= self.max_level:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = self._clock() if self._clock is not None else record.created
+        with self._lock:
+            seen = self._seen.get(key)
+            if seen is not None and now - seen[0] < self.window:
+                seen[1] += 1
+                return False
+            if seen is not None and seen[1]:
+                record.suppressed = seen[1]
+            self._seen[key] = [now, 0]
+            self._seen.move_to_end(key)
+            if len(self._seen) > self.max_keys:
+                self._seen.popitem(last=False)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fixed fraction of a logger's records below WARNING.
+
+    Rates are per logger name and apply to its children, the most
+    specific name winning. Sampling is deterministic: with rate 0.25 every
+    fourth record passes. Warnings and errors always pass.
+    """
+
+    def __init__(self, rates):
+        """
+        Initialize the filter
+
+        Args:
+            rates (dict): Logger name to the fraction of records to keep
+        """
+        super().__init__()
+        self.rates = dict(rates)
+        self._credit = {}
+        self._resolved = {}
+        self._lock = threading.Lock()
+
+    def _rate(self, name):
+        rate = self._resolved.get(name)
+        if rate is None:
+            prefix = name
+            while prefix and prefix not in self.rates:
+                prefix = prefix.rpartition(".")[0]
+            rate = self.rates.get(prefix, 1.0)
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        if rate >= 1:
+            return True
+        with self._lock:
+            credit = self._credit.get(record.name, 0.0) + rate
+            keep = credit >= 1
+            self._credit[record.name] = credit - 1 if keep else credit
+        return keep
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records untouched.
+
+    The stock prepare() formats the message on the calling thread so the
+    record can cross processes; this queue stays in the process, so
+    message and traceback formatting happen on the listener thread.
+    """
+
+    def prepare(self, record):
+        return record
+
+
+class LoggingPipeline:
+    """
+    Non-blocking logging for the application.
+
+    The root logger gets a single handler that only filters and enqueues
+    records on an unbounded SimpleQueue, so logging never waits for disk,
+    even on the GUI thread. A QueueListener thread formats the records
+    (as JSON lines or text) and writes them to a size-rotated file.
+    Sampling and duplicate suppression run before enqueueing, so dropped
+    records cost only the filter.
+    """
+
+    def __init__(
+        self,
+        path="app.log",
+        level=logging.INFO,
+        fmt="json",
+        max_bytes=10 * 1024 * 1024,
+        backup_count=5,
+        dedup_window=10.0,
+        dedup_max_keys=1024,
+        sampling=None,
+    ):
+        """
+        Initialize the pipeline; call start() to install it
+
+        Args:
+            path (str): Log file
+            level (int): Root logger level
+            fmt (str): "json" or "text"
+            max_bytes (int): Size at which the file rotates, 0 to never rotate
+            backup_count (int): Rotated files kept
+            dedup_window (float): Seconds repeats are suppressed, 0 to disable
+            dedup_max_keys (int): Distinct messages the duplicate filter tracks
+            sampling (dict, optional): Logger name to the fraction of records kept
+
+        Raises:
+            ValueError: If the format is unknown
+        """
+        if fmt not in ("json", "text"):
+            raise ValueError(f"Unknown log format: {fmt}")
+        self.level = level
+        self.queue = queue.SimpleQueue()
+
+        self.file_handler = RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        self.file_handler.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+        self.handler = _InProcessQueueHandler(self.queue)
+        if sampling:
+            self.handler.addFilter(SamplingFilter(sampling))
+        if dedup_window > 0:
+            self.handler.addFilter(DuplicateFilter(dedup_window, dedup_max_keys))
+
+        self.listener = QueueListener(self.queue, self.file_handler, respect_handler_level=True)
+        self._started = False
+
+    @classmethod
+    def from_options(cls, options=None):
+        """
+        Build a pipeline from the `logging` settings
+
+        Args:
+            options (dict, optional): Logging settings; missing keys use defaults
+
+        Returns:
+            LoggingPipeline: Unstarted pipeline
+        """
+        options = options or {}
+        dedup = options.get("dedup", {})
+        return cls(
+            path=options.get("file", "app.log"),
+            level=getattr(logging, str(options.get("level", "INFO")).upper()),
+            fmt=options.get("format", "json"),
+            max_bytes=options.get("max_bytes", 10 * 1024 * 1024),
+            backup_count=options.get("backup_count", 5),
+            dedup_window=dedup.get("window_seconds", 10.0) if dedup.get("enabled", True) else 0,
+            dedup_max_keys=dedup.get("max_keys", 1024),
+            sampling=options.get("sampling"),
+        )
+
+    def start(self):
+        """
+        Replace the root logger's handlers with the queue handler and
+        start the writer thread
+        """
+        if self._started:
+            return
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+            handler.close()
+        root.addHandler(self.handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        self._started = True
+        atexit.register(self.stop)
+
+    def stop(self):
+        """
+        Write every queued record, stop the writer thread and close the file
+        """
+        if not self._started:
+            return
+        self._started = False
+        logging.getLogger().removeHandler(self.handler)
+        self.listener.stop()
+        self.file_handler.close()
+        atexit.unregister(self.stop)
@@ -8,11 +8,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 print("PYTHONPATH:", sys.path)
 
 from src.app_main_window import AppMainWindow
+from src.app_async_util import AppAsyncUtil
 
 def main():
     """Main function to run the application."""
     app = QApplication(sys.argv)
     
+    # Run asyncio on the Qt event loop so pages can await auth calls
+    async_util = AppAsyncUtil(app)
+    
     # Check if running in headless mode
     if not QApplication.screens():
         print("This application requires a display. Exiting.")
@@ -30,7 +34,7 @@ def main():
     # Show the main window
     main_window.show()
 
-    sys.exit(app.exec())
+    sys.exit(async_util.exec())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
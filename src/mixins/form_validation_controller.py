@@ -0,0 +1,97 @@
+from PyQt6.QtCore import QTimer
+
+
+class FormValidationController:
+    """
+    Debounced validation of a form's text fields.
+
+    Every textChanged restarts one single-shot QTimer, so a burst of edits
+    (typing, holding a key, pasting) is validated once, `delay_ms` after it
+    settles. Each field's validator then runs only if the field's text
+    differs from the last validated text, and its `on_result` callback and
+    the form-wide `on_change` callback run only when a result differs from
+    the previous one. Widgets are therefore touched once per actual state
+    change instead of once per keystroke and validator.
+    """
+
+    def __init__(self, parent, delay_ms=150, on_change=None):
+        """
+        Initialize the controller
+
+        Args:
+            parent (QObject): Owner of the debounce timer
+            delay_ms (int): Quiet period before validating
+            on_change (callable, optional): Called after any result changed
+        """
+        # Latest result per field; None until the field is first validated
+        self.results = {}
+        self._fields = {}
+        self._values = {}
+        self._on_change = on_change
+
+        self.timer = QTimer(parent)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(delay_ms)
+        self.timer.timeout.connect(self.validate_now)
+
+    def add_field(self, name, widget, validator, on_result=None):
+        """
+        Validate a QLineEdit-like widget
+
+        Args:
+            name (str): Key of the field in `results`
+            widget: Widget with text() and a textChanged signal
+            validator (callable): Maps the text to a comparable result
+            on_result (callable, optional): Called with a field's new result
+        """
+        self._fields[name] = (widget, validator, on_result)
+        self.results[name] = None
+        widget.textChanged.connect(self._schedule)
+        self._schedule()
+
+    def _schedule(self, *args):
+        """
+        Restart the debounce window
+        """
+        self.timer.start()
+
+    def invalidate(self, name=None):
+        """
+        Force fields to be validated again at the next settle, e.g. when a
+        validator depends on state other than the text
+
+        Args:
+            name (str, optional): Field to invalidate, all fields if None
+        """
+        if name is None:
+            self._values.clear()
+        else:
+            self._values.pop(name, None)
+        self._schedule()
+
+    def validate_now(self):
+        """
+        Validate pending edits immediately
+
+        Returns:
+            bool: True if any result changed
+        """
+        self.timer.stop()
+        changed = False
+        for name, (widget, validator, on_result) in self._fields.items():
+            value = widget.text()
+            if name in self._values and self._values[name] == value:
+                continue
+            self._values[name] = value
+
+            result = validator(value)
+            if result == self.results[name] and self.results[name] is not None:
+                continue
+            self.results[name] = result
+            changed = True
+            if on_result is not None:
+                on_result(result)
+
+        if changed and self._on_change is not None:
+            self._on_change()
+        return changed
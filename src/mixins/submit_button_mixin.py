@@ -1,9 +1,78 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt6.QtWidgets import QPushButton, QWidget, QMessageBox
+from auth.metrics import REGISTRY
+from src.app_async_util import run_async
+from src.mixins.form_validation_controller import FormValidationController
+
+
+class SubmissionSignals(QObject):
+    """
+    Signals of one submission, emitted from the worker thread and
+    delivered on the GUI thread
+    """
+    # result, exception (or None), latency in seconds
+    finished = pyqtSignal(object, object, float)
+
+
+class SubmissionTask(QRunnable):
+    """
+    Runs one blocking auth call on the thread pool and reports the
+    outcome through SubmissionSignals
+    """
+    def __init__(self, function, args):
+        super().__init__()
+        self.function = function
+        self.args = args
+        # Created on the GUI thread, so emitting from the worker is queued there
+        self.signals = SubmissionSignals()
+
+    def run(self):
+        start = time.perf_counter()
+        result = error = None
+        try:
+            result = self.function(*self.args)
+        except Exception as e:
+            error = e
+        self.signals.finished.emit(result, error, time.perf_counter() - start)
+
 
 class SubmitButtonMixin:
     """
     A mixin class to handle submit button validation and connection
+
+    It is also the pages' submission engine: a click runs the page's
+    `_on_submit` coroutine with the form disabled, ignoring further clicks
+    until it finishes, and `submit()` runs blocking auth calls as
+    QRunnables whose results come back through Qt signals.
+
+    Field validation goes through a FormValidationController: edits are
+    debounced, and the submit button is updated from the cached results
+    only when one of them changes.
+
+    While the account store is still loading (see `set_store_ready`) the
+    submit button shows a pending label, and a submission made meanwhile
+    is queued with the form disabled and started once the store is ready.
+    If loading fails, the form stays disabled and the queue is dropped.
     """
+    # Latencies kept per page for `submission_latencies`
+    LATENCY_HISTORY = 100
+
+    # Quiet period after the last edit before fields are validated
+    VALIDATION_DELAY_MS = 150
+
+    # Seconds submit() waits for a result; None waits indefinitely
+    submit_timeout = None
+
+    # Appended to the submit button's label while the accounts load
+    STORE_PENDING_SUFFIX = " (loading accounts…)"
+
+    # Appended to the submit button's label when the accounts failed to load
+    STORE_FAILED_SUFFIX = " (accounts unavailable)"
+
     def _setup_submit_button(self):
         """
         Initial setup of submit button
@@ -16,33 +85,193 @@ class SubmitButtonMixin:
             # No existing connections, which is fine
             pass
 
-        # Connect validation methods
-        self.email_input.textChanged.connect(self.update_submit_button)
-        self.password_input.textChanged.connect(self.update_submit_button)
+        # Validate settled field values instead of every keystroke
+        self._setup_validation()
 
-        # Connect submit action
-        self.submit_button.clicked.connect(self._on_submit)
+        # Connect submit action; _on_submit is a coroutine run on the asyncio loop
+        self.submit_button.clicked.connect(self._submit_clicked)
 
         # Initial button state
         self.update_submit_button()
 
+    def _setup_validation(self):
+        """
+        Create the form's validation controller for `_validated_fields`
+        """
+        self.validation = FormValidationController(
+            self, self.VALIDATION_DELAY_MS, on_change=self.update_submit_button
+        )
+        for name, widget, validator, on_result in self._validated_fields():
+            self.validation.add_field(name, widget, validator, on_result)
+
+    def _validated_fields(self):
+        """
+        Fields to validate, as (name, widget, validator, on_result) tuples
+        """
+        return (
+            ('email', self.email_input, self.auth_service.validate_email, None),
+            ('password', self.password_input, self.auth_service.validate_password, None),
+        )
+
+    def _submit_allowed(self, results):
+        """
+        Whether the validation results allow submitting
+
+        Args:
+            results (dict): Latest result per field name
+        """
+        return all(results.values())
+
     def update_submit_button(self):
         """
-        Update submit button's enabled state based on input validation
+        Update submit button's enabled state from the cached validation results
         """
-        email = self.email_input.text()
-        password = self.password_input.text()
+        if getattr(self, '_submission_in_flight', False) or getattr(self, '_store_error', None):
+            return
+        enabled = bool(self._submit_allowed(self.validation.results))
+        if self.submit_button.isEnabled() != enabled:
+            self.submit_button.setEnabled(enabled)
+
+    def _form_widgets(self):
+        """
+        Widgets disabled while a submission is in flight
+        """
+        return (self.email_input, self.password_input, self.submit_button)
+
+    def _submit_clicked(self):
+        """
+        Start the page's submit coroutine with the form disabled; clicks
+        arriving while a submission is in flight are ignored
+        """
+        if getattr(self, '_submission_in_flight', False):
+            logging.getLogger(__name__).debug("Ignoring duplicate submit click")
+            return
+        # Settle edits still inside the debounce window before submitting
+        self.validation.validate_now()
+        if not self._submit_allowed(self.validation.results):
+            self.update_submit_button()
+            return
+        self._submission_in_flight = True
+        for widget in self._form_widgets():
+            widget.setEnabled(False)
 
-        # Validate inputs
-        email_valid = self.auth_service.validate_email(email)
-        password_valid = self.auth_service.validate_password(password)
+        if not getattr(self, '_store_ready', True):
+            # Submitted once set_store_ready(True) is called
+            logging.getLogger(__name__).info("Queued submit until the accounts are loaded")
+            self._submission_queued = True
+            return
+        self._start_submission()
 
-        # Enable/disable button based on validation
-        self.submit_button.setEnabled(email_valid and password_valid)
+    def _start_submission(self):
+        """
+        Run the page's submit coroutine for a submission already in flight
+        """
+        task = run_async(self._on_submit())
+        task.add_done_callback(self._submission_done)
+
+    def set_store_ready(self, ready, error=None):
+        """
+        Show or clear the pending state of a page whose account store is loading
+
+        Args:
+            ready (bool): Whether loading has ended; the first True starts a
+                submission queued while it had not
+            error (Exception, optional): What stopped loading; the form is
+                disabled for good and a queued submission is dropped
+        """
+        was_ready = getattr(self, '_store_ready', True)
+        self._store_ready = ready
+        if was_ready and (not ready or error is not None):
+            self._submit_label = self.submit_button.text()
+        if error is not None:
+            self._store_error = error
+            self._submission_queued = False
+            for widget in self._form_widgets():
+                widget.setEnabled(False)
+            self.submit_button.setText(self._submit_label + self.STORE_FAILED_SUFFIX)
+            self.submit_button.setToolTip(f"Accounts could not be loaded: {error}")
+            return
+        if was_ready and not ready:
+            self.submit_button.setText(self._submit_label + self.STORE_PENDING_SUFFIX)
+        elif ready and not was_ready:
+            self.submit_button.setText(self._submit_label)
+            if getattr(self, '_submission_queued', False):
+                self._submission_queued = False
+                self._start_submission()
+
+    def _submission_done(self, task):
+        """
+        Re-enable the form once the submit coroutine has finished
+        """
+        self._submission_in_flight = False
+        self.email_input.setEnabled(True)
+        self.password_input.setEnabled(True)
+        self.update_submit_button()
+
+    def submit(self, function, *args):
+        """
+        Run a blocking auth call as a QRunnable on the global thread pool
+
+        Args:
+            function (callable): Auth call, e.g. auth_service.login
+            *args: Its arguments
+
+        Returns:
+            Awaitable resolving with the call's result on the GUI thread
+
+        Raises:
+            TimeoutError: When awaited, if the call outlives `submit_timeout`;
+                the call itself finishes in the background
+        """
+        future = asyncio.get_event_loop().create_future()
+        task = SubmissionTask(function, args)
+        submitted = time.perf_counter()
+
+        def deliver(result, error, work_time):
+            self._record_latency(function.__name__, time.perf_counter() - submitted, work_time)
+            self._submission_tasks.discard(task)
+            if future.cancelled():
+                return
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+        task.signals.finished.connect(deliver)
+        # Keep the task (and its signals) alive until the result is delivered
+        if not hasattr(self, '_submission_tasks'):
+            self._submission_tasks = set()
+        self._submission_tasks.add(task)
+        QThreadPool.globalInstance().start(task)
+        return asyncio.wait_for(future, self.submit_timeout)
+
+    def _record_latency(self, name, latency, work_time):
+        """
+        Record an auth call's latency from submission to result delivery
+
+        Args:
+            name (str): Auth call name
+            latency (float): Seconds from submit() to the result on the GUI thread
+            work_time (float): Seconds spent in the call on the worker thread
+        """
+        if not hasattr(self, 'submission_latencies'):
+            self.submission_latencies = deque(maxlen=self.LATENCY_HISTORY)
+        self.submission_latencies.append((name, latency))
+        if REGISTRY.enabled:
+            REGISTRY.histogram(
+                "ui_submit_seconds", "Time from a page submit to its result on the GUI thread", call=name
+            ).observe(latency)
+            REGISTRY.histogram(
+                "ui_submit_work_seconds", "Time a page submit spent on the worker thread", call=name
+            ).observe(work_time)
+        logging.getLogger(__name__).info(
+            "%s: %s took %.1f ms (%.1f ms on worker)",
+            type(self).__name__, name, latency * 1000, work_time * 1000
+        )
 
-    def _on_submit(self):
+    async def _on_submit(self):
         """
-        Default submit method to be overridden by specific page implementations
+        Default submit coroutine to be overridden by specific page implementations
         """
         raise NotImplementedError(
             "Subclasses must implement the _on_submit method"
@@ -68,15 +297,15 @@ class LoginPage(QWidget, SubmitButtonMixin):
         
         self._setup_submit_button()  # From mixin
 
-    def _on_submit(self):
+    async def _on_submit(self):
         """
         Specific implementation for login page
         """
         email = self.email_input.text()
         password = self.password_input.text()
 
-        # Attempt login
-        success, message = self.auth_service.login(email, password)
+        # Attempt login off the GUI thread
+        success, message = await self.submit(self.auth_service.login, email, password)
         
         if success:
             # Handle successful login
@@ -115,7 +115,7 @@ class ApplicationPackager:
         """
         full_options = self.pyinstaller_options + [self.main_script]
 
-        self.logger.info(f"Running PyInstaller with options: {full_options}")
+        self.logger.info("Running PyInstaller with options: %s", full_options)
         subprocess.run(
             ["pyinstaller"] + full_options, check=True, capture_output=True, text=True
         )
@@ -134,7 +134,7 @@ class ApplicationPackager:
         if installer_func:
             installer_func()
         else:
-            self.logger.warning(f"No installer support for platform: {sys.platform}")
+            self.logger.warning("No installer support for platform: %s", sys.platform)
 
     def _create_mac_installer(self):
         """
@@ -177,7 +177,7 @@ class ApplicationPackager:
             self.logger.info("Mac installer created successfully")
 
         except Exception as e:
-            self.logger.error(f"Mac installer creation failed: {e}")
+            self.logger.error("Mac installer creation failed: %s", e)
             raise
 
     def _create_windows_installer(self):
@@ -198,7 +198,7 @@ class ApplicationPackager:
             self.logger.info("Windows installer created successfully")
 
         except Exception as e:
-            self.logger.error(f"Windows installer creation failed: {e}")
+            self.logger.error("Windows installer creation failed: %s", e)
             raise
 
     def _create_linux_installer(self):
@@ -217,7 +217,7 @@ class ApplicationPackager:
             self.logger.info("Linux AppImage created successfully")
 
         except Exception as e:
-            self.logger.error(f"Linux installer creation failed: {e}")
+            self.logger.error("Linux installer creation failed: %s", e)
             raise
 
 
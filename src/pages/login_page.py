@@ -39,7 +39,7 @@ class LoginPage(QWidget, SubmitButtonMixin):
         # Setup submit button using mixin
         self._setup_submit_button()
 
-    def _on_submit(self):
+    async def _on_submit(self):
         """
         Specific implementation for login page
         """
@@ -47,12 +47,12 @@ class LoginPage(QWidget, SubmitButtonMixin):
         password = self.password_input.text()
 
         try:
-            # Attempt to login
-            success, message = self.auth_service.login(email, password)
+            # Attempt to login off the GUI thread
+            success, message = await self.submit(self.auth_service.login, email, password)
 
             if success:
                 # Log successful login
-                self.logger.info(f"Successful login for email: {email}")
+                self.logger.info("Successful login for email: %s", email)
 
                 # Show success message
                 QMessageBox.information(
@@ -71,7 +71,7 @@ class LoginPage(QWidget, SubmitButtonMixin):
             else:
                 # Log failed login attempt
                 self.logger.warning(
-                    f"Failed login attempt for email: {email}. Reason: {message}"
+                    "Failed login attempt for email: %s. Reason: %s", email, message
                 )
 
                 # Show error message
@@ -81,7 +81,7 @@ class LoginPage(QWidget, SubmitButtonMixin):
 
         except Exception as e:
             # Log unexpected errors
-            self.logger.error(f"Unexpected error during login: {e}")
+            self.logger.error("Unexpected error during login: %s", e)
 
             # Show critical error message
             QMessageBox.critical(
@@ -32,15 +32,11 @@ class ProfilePage(QWidget, SubmitButtonMixin):
         self.submit_button = QPushButton("Save Profile")
         layout.addWidget(self.submit_button)
 
-        # Setup submit button using mixin
-        self._setup_submit_button()
-
-        # Track original email for updates
+        # Track original email for updates; set before validation starts
         self.original_email = ""
 
-        # Add listeners to detect changes
-        self.email_input.textChanged.connect(self.check_changes)
-        self.password_input.textChanged.connect(self.check_changes)
+        # Setup submit button using mixin; change detection is part of validation
+        self._setup_submit_button()
 
     def load_profile(self, email):
         """
@@ -50,44 +46,63 @@ class ProfilePage(QWidget, SubmitButtonMixin):
         self.email_input.setText(email)
         self.submit_button.setText("Save Profile")
         self.submit_button.setEnabled(False)
+        # The email result depends on original_email, not only on the text
+        self.validation.invalidate('email')
 
-    def check_changes(self):
+    def _validated_fields(self):
         """
-        Check if profile details have changed
+        Validate the fields and whether they differ from the saved profile
         """
-        current_email = self.email_input.text()
-        current_password = self.password_input.text()
-
-        # Enable save button if fields are valid and changed
-        email_valid = self.auth_service.validate_email(current_email)
-        password_valid = (
-            self.auth_service.validate_password(current_password)
-            if current_password
-            else True
+        return (
+            ('email', self.email_input, self._check_email, None),
+            ('password', self.password_input, self._check_password, None),
         )
 
-        is_changed = current_email != self.original_email or current_password != ""
+    def _check_email(self, email):
+        return self.auth_service.validate_email(email), email != self.original_email
+
+    def _check_password(self, password):
+        # An empty password keeps the current one
+        return (not password or self.auth_service.validate_password(password)), password != ""
+
+    def _submit_allowed(self, results):
+        """
+        Allow saving valid fields when at least one of them changed
+        """
+        if None in results.values():
+            return False
+        (email_valid, email_changed), (password_valid, password_changed) = results['email'], results['password']
+        return email_valid and password_valid and (email_changed or password_changed)
 
-        self.submit_button.setEnabled(email_valid and password_valid and is_changed)
+    def check_changes(self):
+        """
+        Check if profile details have changed, without waiting for the debounce window
+        """
+        self.validation.validate_now()
 
-    def _on_submit(self):
+    async def _on_submit(self):
         """
         Save updated profile details
         """
         new_email = self.email_input.text()
         new_password = self.password_input.text()
 
-        # If no password provided, keep the existing one
-        if not new_password:
-            success, message = self.auth_service.update_account(
-                self.original_email,
-                new_email,
-                "existing_password",  # Placeholder to keep existing password
-            )
-        else:
-            success, message = self.auth_service.update_account(
-                self.original_email, new_email, new_password
-            )
+        try:
+            # If no password provided, keep the existing one
+            if not new_password:
+                success, message = await self.submit(
+                    self.auth_service.update_account,
+                    self.original_email,
+                    new_email,
+                    "existing_password",  # Placeholder to keep existing password
+                )
+            else:
+                success, message = await self.submit(
+                    self.auth_service.update_account, self.original_email, new_email, new_password
+                )
+        except Exception as e:
+            QMessageBox.critical(self, "Update Error", f"An unexpected error occurred: {e}")
+            return
 
         if success:
             QMessageBox.information(
@@ -95,6 +110,7 @@ class ProfilePage(QWidget, SubmitButtonMixin):
             )
             # Update original email
             self.original_email = new_email
+            self.validation.invalidate('email')
             # Clear password field
             self.password_input.clear()
             self.submit_button.setEnabled(False)
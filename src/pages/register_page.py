@@ -35,7 +35,7 @@ class RegisterPage(QWidget, SubmitButtonMixin):
         # Setup submit button using mixin
         self._setup_submit_button()
 
-    def _on_submit(self):
+    async def _on_submit(self):
         """
         Specific implementation for register page
         """
@@ -43,8 +43,8 @@ class RegisterPage(QWidget, SubmitButtonMixin):
         password = self.password_input.text()
 
         try:
-            # Attempt to register
-            success, message = self.auth_service.register(email, password)
+            # Attempt to register off the GUI thread
+            success, message = await self.submit(self.auth_service.register_account, email, password)
 
             if success:
                 # Show success message
@@ -0,0 +1,718 @@
+import io
+import os
+import sys
+import json
+import pytest
+import shutil
+import tempfile
+import threading
+import multiprocessing
+
+from auth.auth_service import AuthService
+from auth.account_backup import AccountBackup
+from auth.account_store import create_account_store
+from auth.account_transfer import read_accounts
+from auth.compact_account_table import CompactAccountTable
+from benchmarks import account_codecs, account_memory, metrics_overhead
+from benchmarks.auth_benchmark import compare_results, run_benchmarks
+
+STORAGE_TYPES = ['json', 'sqlite']
+STORE_CONFIGS = [
+    ('json', {}),
+    ('json', {'durability': 'fsync+dir', 'commit_interval_ms': 5}),
+    ('json', {'journal': True}),
+    ('json', {'journal': True, 'durability': 'fsync', 'commit_interval_ms': 5}),
+    ('json', {'index': True}),
+    ('json', {'lazy': True}),
+    ('json', {'journal': True, 'index': True}),
+    ('json', {'compact_table': True}),
+    ('json', {'journal': True, 'compact_table': True}),
+    ('json', {'shards': 4}),
+    ('json', {'shards': 3, 'lazy': True, 'commit_interval_ms': 5}),
+    ('json', {'compression': 'gzip'}),
+    ('json', {'journal': True, 'serializer': 'msgpack', 'compression': 'zstd'}),
+    ('sqlite', {}),
+]
+SHARED_CONFIGS = [
+    {'shared': True},
+    {'shared': True, 'lazy': True},
+    {'shared': True, 'index': True},
+    {'shared': True, 'compact_table': True},
+    {'shared': True, 'journal': True},
+    {'shared': True, 'journal': True, 'compact_threshold': 300},
+]
+
+
+def _register_range(storage_path, options, start, count):
+    """
+    Write accounts from a separate process
+    """
+    store = create_account_store('json', storage_path, options)
+    store.load()
+    for number in range(start, start + count):
+        store[f'user{number}@example.com'] = {'id': str(number), 'login_attempts': 0}
+    store.close()
+
+
+class TestAccountStore:
+    @pytest.fixture
+    def storage_dir(self):
+        """
+        Create a temporary directory for each store
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            yield temp_dir
+
+    @pytest.fixture(params=STORE_CONFIGS)
+    def store_factory(self, request, storage_dir):
+        """
+        Build (and reopen) a store of every configured type
+        """
+        storage_type, options = request.param
+        storage_path = os.path.join(storage_dir, f'accounts.{storage_type}')
+        opened = []
+
+        def factory():
+            store = create_account_store(storage_type, storage_path, options)
+            store.load()
+            opened.append(store)
+            return store
+
+        yield factory
+
+        for store in opened:
+            store.close()
+
+    def test_records_persist(self, store_factory):
+        """
+        Test that single-record writes survive a reopen
+        """
+        store = store_factory()
+        store['a@example.com'] = {
+            'id': '1',
+            'password': 'hash',
+            'created_at': '2024-01-01T00:00:00',
+            'login_attempts': 0,
+            'locked_until': None,
+        }
+        store.update_fields('a@example.com', login_attempts=3)
+        store.rename('a@example.com', 'b@example.com', password='new-hash')
+        store.close()
+
+        reopened = store_factory()
+        assert 'a@example.com' not in reopened
+        assert len(reopened) == 1
+        account = reopened['b@example.com']
+        assert account['login_attempts'] == 3
+        assert account['password'] == 'new-hash'
+
+    def test_missing_account(self, store_factory):
+        """
+        Test dict-style access to unknown emails
+        """
+        store = store_factory()
+        assert store.get('missing@example.com') is None
+        with pytest.raises(KeyError):
+            store.update_fields('missing@example.com', login_attempts=1)
+
+    def test_secondary_queries(self, store_factory):
+        """
+        Test id, creation-time and lock queries as records change
+        """
+        store = store_factory()
+        store.put_many({
+            f'user{i}@example.com': {
+                'id': f'id-{i}',
+                'password': 'hash',
+                'created_at': f'2024-01-0{i + 1}T00:00:00',
+                'login_attempts': 0,
+                'locked_until': None,
+            }
+            for i in range(5)
+        })
+        assert store.get_by_id('id-3')[0] == 'user3@example.com'
+        assert store.get_by_id('missing') is None
+        assert store.locked_accounts() == []
+
+        # Writes after the first query keep the indexes current
+        store.update_fields('user1@example.com', locked_until='2999-01-01T00:00:00')
+        store.update_fields('user2@example.com', locked_until='2000-01-01T00:00:00')
+        store.rename('user3@example.com', 'moved@example.com')
+        del store['user4@example.com']
+        store['late@example.com'] = {
+            'id': 'id-late',
+            'password': 'hash',
+            'created_at': '2023-12-31T12:00:00',
+            'login_attempts': 0,
+            'locked_until': None,
+        }
+
+        assert store.get_by_id('id-3')[0] == 'moved@example.com'
+        assert store.get_by_id('id-4') is None
+        assert [email for email, _ in store.locked_accounts()] == ['user1@example.com']
+        between = store.created_between('2024-01-01T00:00:00', '2024-01-05T00:00:00')
+        assert [email for email, _ in between] == [
+            'user0@example.com', 'user1@example.com', 'user2@example.com', 'moved@example.com'
+        ]
+        assert [email for email, _ in store.created_between(limit=2)] == ['late@example.com', 'user0@example.com']
+        store.close()
+
+        reopened = store_factory()
+        assert reopened.get_by_id('id-late')[0] == 'late@example.com'
+        assert [email for email, _ in reopened.locked_accounts()] == ['user1@example.com']
+
+    def test_incremental_backup(self, store_factory, storage_dir):
+        """
+        Test delta backups, retention and point-in-time restore
+        """
+        store = store_factory()
+        backup = AccountBackup(store, os.path.join(storage_dir, 'backups'), max_deltas=2, keep_chains=1)
+        versioned = store.capture()[0] is not None
+        record = {'password': 'hash', 'created_at': '2024-01-01T00:00:00', 'login_attempts': 0, 'locked_until': None}
+        store.put_many({f'user{index}@example.com': dict(record, id=str(index)) for index in range(20)})
+        first = backup.backup()
+        assert (first['kind'], first['records']) == ('full', 20)
+        first_state = {email: dict(account) for email, account in store.items()}
+
+        store.update_fields('user3@example.com', login_attempts=2)
+        del store['user4@example.com']
+        second = backup.backup()
+        if versioned:
+            assert (second['kind'], second['records']) == ('delta', 2)
+            assert backup.backup() is None, "Unchanged store was backed up"
+
+        store['new@example.com'] = dict(record, id='new')
+        backup.backup()
+        latest = {email: dict(account) for email, account in store.items()}
+        assert backup.restore() == latest
+        if versioned:
+            assert backup.restore(at=first['created_at']) == first_state
+        with pytest.raises(ValueError):
+            backup.restore(at='2000-01-01T00:00:00')
+
+        # A fourth backup exceeds max_deltas, starts a new chain and retires the old one
+        store.update_fields('user5@example.com', login_attempts=1)
+        fourth = backup.backup()
+        assert fourth['kind'] == 'full'
+        assert [entry['id'] for entry in backup.backups()] == [fourth['id']]
+        assert len(os.listdir(backup.directory)) == 2
+
+        restored_path = os.path.join(storage_dir, 'restored.json')
+        backup.restore(path=restored_path)
+        with open(restored_path) as f:
+            assert json.load(f) == {email: dict(account) for email, account in store.items()}
+
+    @pytest.mark.parametrize('storage_type', STORAGE_TYPES)
+    def test_auth_service_roundtrip(self, storage_dir, storage_type):
+        """
+        Test the auth flow against every storage engine
+        """
+        storage_path = os.path.join(storage_dir, f'accounts.{storage_type}')
+        auth = AuthService(storage_path=storage_path, storage_type=storage_type)
+
+        success, account_id = auth.register_account('user@example.com', 'Strong1Pass!')
+        assert success is True
+
+        success, message = auth.login('user@example.com', 'Wrong1Pass!')
+        assert success is False
+        assert auth.lockout.attempts('user@example.com') == 1
+        assert auth.accounts['user@example.com']['login_attempts'] == 0, "Failed attempt was persisted"
+
+        success, _ = auth.update_account('user@example.com', 'new@example.com', 'Newer2Pass!')
+        assert success is True
+        auth.close()
+
+        reopened = AuthService(storage_path=storage_path, storage_type=storage_type)
+        success, logged_in_id = reopened.login('new@example.com', 'Newer2Pass!')
+        assert success is True
+        assert logged_in_id == account_id
+        assert reopened.accounts['new@example.com']['login_attempts'] == 0
+        reopened.close()
+
+    def test_sqlite_migrates_from_json(self, storage_dir):
+        """
+        Test that sqlite given a JSON path migrates it into a .db file and never opens JSON as a database
+        """
+        json_path = os.path.join(storage_dir, 'accounts.json')
+        auth = AuthService(storage_path=json_path)
+        success, account_id = auth.register_account('user@example.com', 'Strong1Pass!')
+        auth.close()
+
+        migrated = AuthService(storage_path=json_path, storage_type='sqlite')
+        assert migrated.store.storage_path == os.path.join(storage_dir, 'accounts.db')
+        assert migrated.login('user@example.com', 'Strong1Pass!') == (True, account_id)
+        migrated.close()
+        with open(json_path) as f:
+            assert 'user@example.com' in json.load(f), "The JSON store was changed"
+
+        store = create_account_store('sqlite', os.path.join(storage_dir, 'copy.db'))
+        shutil.copy(json_path, store.storage_path)
+        with pytest.raises(ValueError):
+            store.load()
+        store.close()
+
+    def test_sqlite_backups_stay_incremental_across_restarts(self, storage_dir):
+        """
+        Test that SQLite logs changes for delta backups, keeps the log over a reopen and trims it
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.db')
+        store = create_account_store('sqlite', storage_path)
+        store.load()
+        backup = AccountBackup(store, os.path.join(storage_dir, 'backups'))
+        record = {'password': 'hash', 'created_at': '2024-01-01T00:00:00', 'login_attempts': 0, 'locked_until': None}
+        store.put_many({f'user{index}@example.com': dict(record, id=str(index)) for index in range(10)})
+        assert backup.backup()['kind'] == 'full'
+        store.rename('user1@example.com', 'renamed@example.com')
+        store.close()
+
+        backup.store = store = create_account_store('sqlite', storage_path)
+        store.load()
+        del store['user2@example.com']
+        second = backup.backup()
+        assert (second['kind'], second['records']) == ('delta', 3)
+        assert backup.backup() is None
+        assert backup.restore() == {email: dict(account) for email, account in store.items()}
+        assert store._connection().execute('SELECT COUNT(*) FROM account_changes').fetchone()[0] == 0
+        store.close()
+
+    def test_sqlite_closes_connections_of_exited_threads(self, storage_dir):
+        """
+        Test that connections opened by short-lived threads do not accumulate
+        """
+        store = create_account_store('sqlite', os.path.join(storage_dir, 'accounts.db'))
+        store.load()
+        for _ in range(200):
+            thread = threading.Thread(target=len, args=(store,))
+            thread.start()
+            thread.join()
+        assert len(store) == 0
+        assert len(store._connections) <= 2
+        store.close()
+
+    def test_journal_replay_and_compaction(self, storage_dir):
+        """
+        Test that the journal replays over the snapshot and compacts
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        options = {'journal': True, 'compact_threshold': 10 ** 9}
+        store = create_account_store('json', storage_path, options)
+        store.load()
+        for index in range(3):
+            store[f'user{index}@example.com'] = {'id': str(index), 'login_attempts': 0}
+        store.update_fields('user0@example.com', login_attempts=2)
+        del store['user1@example.com']
+        store.close()
+        assert not os.path.exists(storage_path), "Journal mode rewrote the snapshot"
+
+        # Simulate a crash in the middle of an append
+        with open(f'{storage_path}.wal', 'a') as journal:
+            journal.write('{"op": "put", "email": "torn@exa')
+
+        store = create_account_store('json', storage_path, options)
+        store.load()
+        assert sorted(store) == ['user0@example.com', 'user2@example.com']
+        assert store['user0@example.com']['login_attempts'] == 2
+
+        store.compact()
+        assert os.path.getsize(f'{storage_path}.wal') == 0
+        store['user3@example.com'] = {'id': '3', 'login_attempts': 0}
+        store.close()
+
+        reopened = create_account_store('json', storage_path, options)
+        reopened.load()
+        assert sorted(reopened) == ['user0@example.com', 'user2@example.com', 'user3@example.com']
+        reopened.close()
+
+    def test_group_commit_bounds_writes(self, storage_dir):
+        """
+        Test that a burst of mutations is merged into few atomic saves
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        store = create_account_store('json', storage_path, {'commit_interval_ms': 50})
+        store.load()
+
+        def burst(worker):
+            for index in range(100):
+                store[f'user{worker}-{index}@example.com'] = {'id': str(index)}
+
+        threads = [threading.Thread(target=burst, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        store.close()
+
+        assert store._committer.requests == 400
+        assert store._committer.commits < 20
+        assert os.listdir(storage_dir) == ['accounts.json'], "Temporary files left behind"
+
+        reopened = create_account_store('json', storage_path)
+        reopened.load()
+        assert len(reopened) == 400
+
+    def test_index_sidecar(self, storage_dir):
+        """
+        Test that the sidecar index serves lookups without parsing the file
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        accounts = {
+            f'user{index}@example.com': {'id': str(index), 'login_attempts': index}
+            for index in range(50)
+        }
+        with open(storage_path, 'w') as f:
+            json.dump(accounts, f, indent=4)
+
+        store = create_account_store('json', storage_path, {'index': True})
+        store.load()
+        assert os.path.exists(f'{storage_path}.idx')
+        store.update_fields('user3@example.com', login_attempts=0)
+        del store['user4@example.com']
+        store['new@example.com'] = {'id': 'new', 'login_attempts': 0}
+        store.close()
+
+        # Saves keep the json.dump(indent=4) layout
+        accounts['user3@example.com']['login_attempts'] = 0
+        del accounts['user4@example.com']
+        accounts['new@example.com'] = {'id': 'new', 'login_attempts': 0}
+        with open(storage_path) as f:
+            assert f.read() == json.dumps(accounts, indent=4)
+
+        reopened = create_account_store('json', storage_path, {'index': True})
+        reopened.load()
+        assert reopened.accounts.overlay == {}, "Startup parsed accounts"
+        assert len(reopened) == 50
+        assert reopened['user7@example.com']['login_attempts'] == 7
+        assert 'user4@example.com' not in reopened
+        assert list(reopened.accounts.overlay) == ['user7@example.com']
+        reopened.close()
+
+        # An outside edit makes the index stale and forces a rebuild
+        accounts['outside@example.com'] = {'id': 'outside'}
+        with open(storage_path, 'w') as f:
+            json.dump(accounts, f)
+        rebuilt = create_account_store('json', storage_path, {'index': True})
+        rebuilt.load()
+        assert rebuilt['outside@example.com']['id'] == 'outside'
+        assert len(rebuilt) == 51
+        rebuilt.close()
+
+    def test_index_reads_during_group_commits(self, storage_dir):
+        """
+        Test that reads never touch an index a concurrent save has closed
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        options = {'index': True, 'commit_interval_ms': 1}
+        store = create_account_store('json', storage_path, options)
+        store.load()
+        store.put_many({f'user{index}@example.com': {'id': str(index), 'login_attempts': 0} for index in range(500)})
+        store.close()
+
+        store = create_account_store('json', storage_path, options)
+        store.load()
+        errors = []
+        stop = threading.Event()
+
+        def read():
+            number = 0
+            while not stop.is_set():
+                try:
+                    # Missing emails always go to the mapped index
+                    store.get(f'missing{number}@example.com')
+                    f'user{number % 500}@example.com' in store
+                except Exception as e:
+                    errors.append(e)
+                number += 1
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        try:
+            for reader in readers:
+                reader.start()
+            for number in range(3000):
+                store.update_fields(f'user{number % 500}@example.com', login_attempts=number)
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join()
+            sys.setswitchinterval(switch_interval)
+            store.close()
+        assert errors == []
+
+    def test_lazy_loading_streams_offsets(self, storage_dir):
+        """
+        Test that lazy loading parses records only on first access
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        accounts = {
+            f'üser{index}@example.com': {'id': str(index), 'note': 'naïve ' * index}
+            for index in range(200)
+        }
+        with open(storage_path, 'w', encoding='utf-8') as f:
+            json.dump(accounts, f, indent=2, ensure_ascii=False)
+
+        store = create_account_store('json', storage_path, {'lazy': True})
+        store.buffer_size = 256
+        store.load()
+        assert len(store) == 200
+        assert store.accounts.overlay == {}, "Startup parsed accounts"
+        assert store['üser150@example.com'] == accounts['üser150@example.com']
+
+        del store['üser0@example.com']
+        store.close()
+
+        reopened = create_account_store('json', storage_path, {'lazy': True})
+        reopened.load()
+        del accounts['üser0@example.com']
+        assert dict(reopened) == accounts
+        reopened.close()
+
+    @pytest.mark.parametrize('options', SHARED_CONFIGS)
+    def test_shared_store_merges(self, storage_dir, options):
+        """
+        Test that stores sharing a file keep each other's changes
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        first = create_account_store('json', storage_path, options)
+        second = create_account_store('json', storage_path, options)
+        first.load()
+        second.load()
+
+        first['a@example.com'] = {'id': '1', 'login_attempts': 0}
+        first['b@example.com'] = {'id': '2', 'login_attempts': 0}
+        first.flush()
+        second['c@example.com'] = {'id': '3', 'login_attempts': 0}
+        second.flush()
+        assert sorted(second) == ['a@example.com', 'b@example.com', 'c@example.com']
+
+        first.update_fields('a@example.com', login_attempts=2)
+        del first['b@example.com']
+        first.flush()
+        changed = second.refresh()
+        assert {'a@example.com', 'b@example.com'} <= changed
+        assert second['a@example.com']['login_attempts'] == 2
+        assert 'b@example.com' not in second
+        assert len(second) == 2
+        assert second.refresh() == set(), "Unchanged file was merged again"
+
+        first.close()
+        second.close()
+        reopened = create_account_store('json', storage_path, options)
+        reopened.load()
+        assert sorted(reopened) == ['a@example.com', 'c@example.com']
+        reopened.close()
+
+    def test_format_detection(self, storage_dir):
+        """
+        Test that every loader reads a file written in any configured format
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        accounts = {f'üser{index}@example.com': {'id': str(index), 'login_attempts': index} for index in range(50)}
+        formats = [
+            {},
+            {'compression': 'gzip'},
+            {'serializer': 'orjson', 'compression': 'zstd', 'compression_level': 1},
+            {'serializer': 'msgpack'},
+        ]
+        loaders = [{}, {'lazy': True}, {'index': True}, {'compact_table': True}]
+        for written in formats:
+            store = create_account_store('json', storage_path, written)
+            store.load()
+            store.put_many(accounts)
+            store.close()
+            with open(storage_path, 'rb') as f:
+                assert f.read(1) == (b'{' if store.codec.plain else b'\x00')
+
+            for options in loaders:
+                reopened = create_account_store('json', storage_path, options)
+                reopened.load()
+                assert {email: dict(account) for email, account in reopened.items()} == accounts, options
+                reopened.close()
+            os.remove(storage_path)
+            if os.path.exists(f'{storage_path}.idx'):
+                os.remove(f'{storage_path}.idx')
+
+    def test_sharded_store(self, storage_dir):
+        """
+        Test splitting an unsharded file, per-shard saves and resharding
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        accounts = {f'user{index}@example.com': {'id': str(index), 'login_attempts': 0} for index in range(100)}
+        with open(storage_path, 'w') as f:
+            json.dump(accounts, f)
+
+        store = create_account_store('json', storage_path, {'shards': 4})
+        store.load()
+        assert dict(store) == accounts
+        sizes = [len(shard) for shard in store.shards]
+        assert min(sizes) > 10, f"Uneven shards: {sizes}"
+        assert not os.path.exists(storage_path), "The split file is still loadable"
+        assert os.path.exists(f'{storage_path}.unsharded')
+        with pytest.raises(ValueError):
+            create_account_store('json', storage_path)
+
+        before = {shard.storage_path: os.stat(shard.storage_path).st_mtime_ns for shard in store.shards}
+        store.update_fields('user7@example.com', login_attempts=1)
+        rewritten = [path for path, mtime in before.items() if os.stat(path).st_mtime_ns != mtime]
+        assert rewritten == [store._shard('user7@example.com').storage_path]
+
+        store.rename('user7@example.com', 'moved@example.com')
+        store.reshard(7)
+        assert len(store.shards) == 7
+        assert len(os.listdir(store.directory)) == 8, "Old generation was not removed"
+        store.close()
+
+        reopened = create_account_store('json', storage_path, {'shards': 4})
+        reopened.load()
+        accounts['moved@example.com'] = dict(accounts.pop('user7@example.com'), login_attempts=1)
+        assert reopened.shard_count == 7
+        assert dict(reopened) == accounts
+        reopened.close()
+
+    def test_shared_store_processes(self, storage_dir):
+        """
+        Test that concurrent processes writing one file lose no updates
+        """
+        storage_path = os.path.join(storage_dir, 'accounts.json')
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=_register_range, args=(storage_path, {'shared': True}, start, 20))
+            for start in (0, 100, 200)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+            assert worker.exitcode == 0
+
+        store = create_account_store('json', storage_path, {'shared': True})
+        store.load()
+        assert len(store) == 60
+        store.close()
+
+    def test_compact_table_roundtrip(self, storage_dir):
+        """
+        Test that the compact table packs AuthService records and keeps others intact
+        """
+        service = AuthService(
+            storage_path=os.path.join(storage_dir, 'accounts.json'),
+            storage_options={'compact_table': True}
+        )
+        service.register_account('packed@example.com', 'Strong1Pass!')
+        packed = service.accounts['packed@example.com']
+        assert isinstance(service.store.accounts, CompactAccountTable)
+        assert service.store.accounts._overflow == {}, "AuthService record fell back to overflow"
+
+        table = CompactAccountTable()
+        odd = {'id': '1', 'password': 'HASH', 'created_at': '2024-01-01T00:00:00+00:00',
+               'login_attempts': 300, 'locked_until': None, 'extra': [1]}
+        table['odd'] = odd
+        table['packed@example.com'] = packed
+        table['legacy@example.com'] = dict(packed, password='ab' * 32)
+        assert table._overflow.keys() == {0}, "Hashes fell back to overflow"
+        assert table['legacy@example.com']['password'] == 'ab' * 32
+        assert table['odd'] == odd
+        assert dict(table['packed@example.com']) == dict(packed)
+
+        stale = table['odd']
+        del table['odd']
+        table['new@example.com'] = {'login_attempts': 1}
+        with pytest.raises(KeyError):
+            stale['id']
+        assert sorted(table) == ['legacy@example.com', 'new@example.com', 'packed@example.com']
+
+        # Lock deadlines are kept per row and never leak into a reused row
+        locked_until = '2030-01-01T00:00:00.000001'
+        table['packed@example.com'] = dict(packed, locked_until=locked_until)
+        assert table['packed@example.com']['locked_until'] == locked_until
+        del table['packed@example.com']
+        table['reused@example.com'] = dict(packed)
+        assert table['reused@example.com']['locked_until'] is None
+        table['reused@example.com'] = dict(packed, locked_until=locked_until)
+        table['reused@example.com'] = dict(packed, locked_until=None)
+        assert table['reused@example.com']['locked_until'] is None
+        assert table._locks == {}
+
+    @pytest.mark.parametrize('storage_type', STORAGE_TYPES)
+    def test_bulk_import_export(self, storage_dir, storage_type):
+        """
+        Test batched import with per-row errors and an export/import roundtrip
+        """
+        source = AuthService(
+            storage_path=os.path.join(storage_dir, f'source.{storage_type}'),
+            storage_type=storage_type
+        )
+        rows = [{'email': f'user{index}@example.com', 'password': 'Strong1Pass!'} for index in range(25)]
+        rows += [{'email': 'user3@example.com', 'password': 'Strong1Pass!'}, {'email': 'bad'}, 'junk',
+                 {'email': 'weak@example.com', 'password': 'weak'}]
+        report = source.import_accounts(iter(rows), batch_size=10, workers=2)
+        assert (report.imported, report.failed, report.batches) == (25, 4, 3)
+        assert [error[:2] for error in report.errors] == [
+            (26, 'user3@example.com'), (27, 'bad'), (28, None), (29, 'weak@example.com')
+        ]
+        assert source.login('user7@example.com', 'Strong1Pass!')[0] is True
+
+        # Stored fields are checked per row, so no imported account breaks login
+        user7_id = source.login('user7@example.com', 'Strong1Pass!')[1]
+        good_hash = source.accounts['user7@example.com']['password']
+        bad = [
+            {'email': 'hash@example.com', 'password_hash': '$scrypt$v=1$ln=abc,r=8,p=1$AAAA$AAAA'},
+            {'email': 'lock@example.com', 'password_hash': good_hash, 'locked_until': 'garbage'},
+            {'email': 'created@example.com', 'password_hash': good_hash, 'created_at': '2024-13-01'},
+            {'email': 'taken@example.com', 'password_hash': good_hash, 'id': user7_id},
+            {'email': 'twin1@example.com', 'password_hash': good_hash, 'id': 'twin'},
+            {'email': 'twin2@example.com', 'password_hash': good_hash, 'id': 'twin'},
+        ]
+        report = source.import_accounts(bad)
+        assert (report.imported, report.failed) == (1, 5)
+        assert [error[2] for error in report.errors] == [
+            'Invalid password_hash', 'Invalid locked_until', 'Invalid created_at',
+            'Account id already in use', 'Account id already in use'
+        ]
+        assert [error[0] for error in report.errors[3:]] == [4, 6]
+        assert source.login('twin1@example.com', 'Strong1Pass!')[0] is True
+        del source.store['twin1@example.com']
+
+        for format in ('jsonl', 'csv'):
+            stream = io.StringIO()
+            assert source.export_accounts(stream, format) == 25
+            stream.seek(0)
+
+            target = AuthService(
+                storage_path=os.path.join(storage_dir, f'target-{format}.{storage_type}'),
+                storage_type=storage_type
+            )
+            assert target.import_accounts(read_accounts(stream, format)).imported == 25
+            expected = source.login('user7@example.com', 'Strong1Pass!')
+            assert target.login('user7@example.com', 'Strong1Pass!') == expected
+            target.close()
+        source.close()
+
+    @pytest.mark.parametrize('storage_type', STORAGE_TYPES)
+    def test_benchmark_suite(self, storage_type):
+        """
+        Test a small benchmark sweep measures every operation in child processes
+        """
+        config = {'iterations': 5, 'repeats': 1, 'storage_type': storage_type, 'hashing_options': {'cost': 4}}
+        document = run_benchmarks([300], config)
+        entry, = document['sizes']
+        assert entry['accounts'] == 300
+        assert set(entry['operations']) == {
+            'load_accounts', 'save_accounts', 'register_account', 'update_account',
+            'login_success', 'login_failure', 'login_locked',
+        }
+        assert entry['operations']['login_success']['calls'] == 5
+        assert entry['operations']['login_locked']['p99_ms'] >= entry['operations']['login_locked']['p50_ms']
+        assert 'login_failure' in compare_results(document, json.loads(json.dumps(document)))
+
+    def test_component_benchmarks(self, capsys):
+        """
+        Test that the memory, codec and metrics benchmarks run on a few accounts
+        """
+        size, method = account_memory.measure('table', 200)
+        assert size >= 0 and method in ('RSS', 'tracemalloc')
+        account_codecs.main(['200'])
+        metrics_overhead.main(['1000'])
+        output = capsys.readouterr().out
+        assert 'json+gzip' in output
+        assert 'metrics on' in output
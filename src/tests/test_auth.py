@@ -1,9 +1,22 @@
 import os
+import json
+import time
+import hashlib
+import logging
+import urllib.request
 import pytest
 import tempfile
 
 # Import theauth service
 from auth.auth_service import AuthService
+from auth.lockout_tracker import LockoutTracker
+from auth.password_hasher import PasswordHasher
+from auth.rate_limiter import RateLimiter
+from auth.credential_policy import CredentialPolicy
+from auth.lazy_import import optional_module
+from auth.metrics import REGISTRY, MetricsRegistry
+from benchmarks.import_budget import check_budget, import_profile
+from config.logging_pipeline import LoggingPipeline
 
 class TestauthService:
     @pytest.fixture
@@ -24,7 +37,7 @@ class TestauthService:
         """
         Test email validation
         """
-        auth = AuthService()storage_path=temp_storage)
+        auth = AuthService(storage_path=temp_storage)
         
         # Valid email tests
         valid_emails = [
@@ -52,7 +65,7 @@ class TestauthService:
         """
         Test password validation
         """
-        auth = AuthService()storage_path=temp_storage)
+        auth = AuthService(storage_path=temp_storage)
         
         # Valid password tests
         valid_passwords = [
@@ -80,7 +93,7 @@ class TestauthService:
         """
         Test account registration process
         """
-        auth = AuthService()storage_path=temp_storage)
+        auth = AuthService(storage_path=temp_storage)
         
         # Successful registration
         email = 'newuser@example.com'
@@ -99,7 +112,7 @@ class TestauthService:
         """
         Test loginauth
         """
-        auth = AuthService()storage_path=temp_storage)
+        auth = AuthService(storage_path=temp_storage)
         
         # Setup test account
         email = 'testuser@example.com'
@@ -125,6 +138,321 @@ class TestauthService:
         assert success is False, "Login succeeded with incorrect password"
         assert "incorrect password" in message.lower()
 
+    def test_account_lockout(self, temp_storage):
+        """
+        Test that failed attempts stay in memory until a lock is applied
+        """
+        auth = AuthService(storage_path=temp_storage, max_login_attempts=3)
+        email = 'locked@example.com'
+        password = 'ValidStrong3Pass!'
+        auth.register_account(email, password)
+        saved = os.path.getmtime(temp_storage)
+
+        for _ in range(2):
+            success, message = auth.login(email, 'WrongPassword1!')
+            assert "incorrect password" in message.lower()
+        assert auth.accounts[email]['login_attempts'] == 0, "Failed attempts were persisted"
+        assert os.path.getmtime(temp_storage) == saved
+
+        success, message = auth.login(email, 'WrongPassword1!')
+        assert "locked" in message.lower()
+        assert auth.accounts[email]['locked_until'] is not None
+        auth.close()
+
+        # The persisted lock holds after a restart, even with the right password
+        reopened = AuthService(storage_path=temp_storage, max_login_attempts=3)
+        success, message = reopened.login(email, password)
+        assert success is False
+        assert "locked" in message.lower()
+        reopened.close()
+        os.unlink(f"{temp_storage}.lockout")
+
+    def test_password_hashing(self):
+        """
+        Test salted, versioned hashes for both schemes and cost calibration
+        """
+        for hasher in (PasswordHasher('scrypt', cost=10), PasswordHasher('pbkdf2-sha256', cost=1000)):
+            first = hasher.hash('Strong1Pass!')
+            assert first.startswith(f"${hasher.scheme}$v=1$")
+            assert hasher.hash('Strong1Pass!') != first, "Hashes are not salted"
+            assert hasher.verify('Strong1Pass!', first) is True
+            assert hasher.verify('Wrong1Pass!', first) is False
+            assert hasher.needs_rehash(first) is False
+
+        stronger = PasswordHasher('scrypt', cost=11)
+        assert stronger.verify('Strong1Pass!', first) is True, "Older hashes must still verify"
+        assert stronger.needs_rehash(first) is True
+        assert stronger.verify('Strong1Pass!', 'not-a-hash') is False
+        # Corrupt stored hashes fail verification instead of raising
+        salt, digest = first.split('$')[4:]
+        for params in ('ln=abc,r=8,p=1', 'ln=10,p=1', 'ln=99,r=8,p=1', 'ln=10,r=8,p=1,x=1', 'ln'):
+            corrupt = f"$scrypt$v=1${params}${salt}${digest}"
+            assert stronger.verify('Strong1Pass!', corrupt) is False, params
+        assert stronger.verify('Strong1Pass!', f"$scrypt$v=1$ln=10,r=8,p=1$!!${digest}") is False
+
+        calibrated = PasswordHasher.calibrate('pbkdf2-sha256', target_ms=5)
+        assert calibrated.cost >= 1000
+
+    def test_legacy_hash_upgrade(self, temp_storage):
+        """
+        Test that login accepts and upgrades unsalted SHA-256 hashes
+        """
+        auth = AuthService(storage_path=temp_storage)
+        email = 'legacy@example.com'
+        auth.register_account(email, 'Legacy1Pass!')
+        legacy = hashlib.sha256('Legacy1Pass!'.encode()).hexdigest()
+        auth.store.update_fields(email, password=legacy)
+
+        assert auth.login(email, 'Wrong1Pass!')[0] is False
+        assert auth.accounts[email]['password'] == legacy
+
+        assert auth.login(email, 'Legacy1Pass!')[0] is True
+        upgraded = auth.accounts[email]['password']
+        assert upgraded.startswith('$scrypt$v=1$'), "Legacy hash was not upgraded"
+        assert auth.login(email, 'Legacy1Pass!')[0] is True
+        assert auth.accounts[email]['password'] == upgraded
+        auth.close()
+
+    def test_credential_policy(self, temp_storage):
+        """
+        Test per-rule failures, configured limits, email memoization and batch checks
+        """
+        policy = CredentialPolicy(min_length=10, require_special=False)
+        assert policy.check_password('LongEnough1') and policy.check_password('LongEnough1').valid
+        assert policy.check_password('short').failures == ('min_length', 'uppercase', 'digit')
+        assert 'at least 10 characters' in policy.check_password('short').message
+        assert policy.check_password('LongEnough\u0663'), "A non-ASCII decimal digit was rejected"
+        assert CredentialPolicy().check_password('Strong1Pass!' * 20), "Long passwords are limited by default"
+        assert CredentialPolicy(max_length=128).check_password('Strong1Pass!' * 20).failures == ('max_length',)
+        assert policy.check_password('Strong1Pass!') is policy.check_password('Strong1Pass!')
+        assert not hasattr(policy.check_password, 'cache_info'), "Passwords are memoized"
+        assert policy.check_email('user@example.com')
+        assert policy.check_email('user@example.com\n').failures == ('email_format',)
+
+        results = policy.validate_many(['LongEnough1', 'nope'])
+        assert [bool(result) for result in results] == [True, False]
+        assert policy.validate_many(['a@b.co', 'bad'], 'email')[1].message == 'Invalid email format'
+        with pytest.raises(ValueError):
+            policy.validate_many([], 'phone')
+
+        auth = AuthService(storage_path=temp_storage, policy_options={'min_length': 12})
+        assert auth.validate_password('Strong1Pass!') is True
+        assert auth.validate_password('Strong1Pas!') is False
+        assert auth.check_password('Strong1Pas!').failures == ('min_length',)
+        auth.close()
+
+    def test_rate_limiter(self):
+        """
+        Test per-account and global buckets, refill and bounded tracking
+        """
+        now = [0.0]
+        limiter = RateLimiter(account_rate=1, account_burst=2, global_rate=10, global_burst=3,
+                              max_tracked=2, clock=lambda: now[0])
+
+        assert limiter.acquire('a@example.com') and limiter.acquire('a@example.com')
+        assert limiter.acquire('a@example.com') is False, "Account bucket was not enforced"
+        assert limiter.acquire('b@example.com') is True
+        assert limiter.acquire('c@example.com') is False, "Global bucket was not enforced"
+        assert limiter.stats()['rejected_account'] == 1
+        assert limiter.stats()['rejected_global'] == 1
+        assert len(limiter) == 2
+
+        now[0] += 1
+        assert limiter.acquire('a@example.com') is True, "Bucket did not refill"
+        assert limiter.acquire('d@example.com') is True
+        assert len(limiter) == 2, "Tracked buckets exceeded max_tracked"
+
+    def test_login_rate_limit(self, temp_storage):
+        """
+        Test that rate-limited logins are rejected before password verification
+        """
+        auth = AuthService(storage_path=temp_storage, rate_limit_options={'account_burst': 2})
+        auth.register_account('limited@example.com', 'Strong1Pass!')
+        verifications = []
+        verify = auth.hasher.verify
+        auth.hasher.verify = lambda *args: verifications.append(args) or verify(*args)
+
+        assert auth.login('limited@example.com', 'Strong1Pass!')[0] is True
+        assert auth.login('limited@example.com', 'Strong1Pass!')[0] is True
+        success, message = auth.login('limited@example.com', 'Strong1Pass!')
+        assert success is False
+        assert "too many login attempts" in message.lower()
+        assert len(verifications) == 2, "Rate-limited attempt reached the hasher"
+        assert auth.rate_limiter.rejected == 1
+        auth.close()
+
+        # With the default burst, failures past the threshold report the lockout, not rate limiting
+        auth = AuthService(storage_path=temp_storage, max_login_attempts=5)
+        for _ in range(4):
+            assert "incorrect password" in auth.login('limited@example.com', 'Wrong1Pass!')[1].lower()
+        assert "locked" in auth.login('limited@example.com', 'Wrong1Pass!')[1].lower()
+        for _ in range(10):
+            assert "account locked" in auth.login('limited@example.com', 'Wrong1Pass!')[1].lower()
+        auth.close()
+        os.unlink(f"{temp_storage}.lockout")
+
+    def test_lockout_expiry(self):
+        """
+        Test that counters and locks expire and are swept from memory
+        """
+        now = [1000.0]
+        tracker = LockoutTracker(max_attempts=2, lock_duration=60, attempt_ttl=10, clock=lambda: now[0])
+
+        assert tracker.record_failure('a@example.com') == (1, None)
+        now[0] += 11
+        assert tracker.attempts('a@example.com') == 0, "Counter outlived its TTL"
+
+        tracker.record_failure('a@example.com')
+        assert tracker.record_failure('a@example.com') == (2, 1071.0)
+        assert tracker.locked_until('a@example.com') == 1071.0
+
+        now[0] += 61
+        assert tracker.locked_until('a@example.com') is None
+        assert len(tracker) == 0, "Expired state was not swept"
+
+    def test_logging_pipeline(self, temp_storage):
+        """
+        Test that logging goes through the queue as JSON lines, with warning floods and sampled loggers thinned
+        """
+        root = logging.getLogger()
+        handlers, level = root.handlers[:], root.level
+        pipeline = LoggingPipeline.from_options({
+            'file': temp_storage,
+            'level': 'DEBUG',
+            'sampling': {'noisy': 0.25},
+        })
+        try:
+            pipeline.start()
+            logger = logging.getLogger('auth.test')
+            for number in range(5):
+                logger.warning('Incorrect password for email: %s', f'user{number}@example.com')
+                logger.info('Successful login: %s', f'user{number}@example.com')
+            for number in range(8):
+                logging.getLogger('noisy.child').debug('tick %s', number)
+            for number in range(2):
+                logger.error('Could not save accounts: %s', f'disk error {number}')
+            logger.error('Failed', extra={'account_id': 'abc'})
+        finally:
+            pipeline.stop()
+            root.handlers[:] = handlers
+            root.setLevel(level)
+
+        with open(temp_storage) as f:
+            entries = [json.loads(line) for line in f]
+        messages = [entry['message'] for entry in entries]
+        assert messages.count('Incorrect password for email: user0@example.com') == 1
+        assert not any(message.startswith('Incorrect password for email: user1') for message in messages)
+        assert sum(message.startswith('Successful login') for message in messages) == 5
+        assert sum(message.startswith('tick') for message in messages) == 2
+        errors = [message for message in messages if message.startswith('Could not save accounts')]
+        assert len(errors) == 2, "Errors were deduplicated"
+        assert entries[-1]['account_id'] == 'abc'
+        assert entries[-1]['level'] == 'ERROR'
+        assert entries[-1]['logger'] == 'auth.test'
+
+    def test_metrics(self, temp_storage):
+        """
+        Test that auth and storage calls are measured and exported only while metrics are enabled
+        """
+        registry = MetricsRegistry()
+        histogram = registry.histogram('latency_seconds', 'Latency')
+        histogram.observe(0.5)
+        assert histogram.count == 0, "Disabled registry recorded a value"
+        registry.enabled = True
+        for millisecond in range(1, 1001):
+            histogram.observe(millisecond / 1000)
+        assert abs(histogram.percentile(50) - 0.5) <= 0.5 / 64
+        assert abs(histogram.percentile(99) - 0.99) <= 0.99 / 64
+        assert histogram.percentile(100) == 1.0
+        assert 'latency_seconds_bucket{le="+Inf"} 1000' in registry.render()
+
+        logins = REGISTRY.counter('auth_login_total', '', result='failed')
+        written = REGISTRY.counter('account_store_written_bytes_total', '')
+        failed_before, written_before = logins.value, written.value
+        textfile = f"{temp_storage}.prom"
+        auth = AuthService(
+            storage_path=temp_storage,
+            metrics_options={'enabled': True, 'http_port': 0, 'textfile': textfile},
+        )
+        try:
+            email = 'metrics@example.com'
+            password = 'ValidStrong4Pass!'
+            assert auth.register_account(email, password)[0] is True
+            assert auth.login(email, 'WrongStrong4Pass!')[0] is False
+            auth.save_accounts()
+
+            port = auth.metrics_exporter.port
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+                text = response.read().decode()
+            assert 'auth_register_account_total{result="ok"}' in text
+            assert 'auth_accounts 1' in text
+            assert logins.value == failed_before + 1
+            assert written.value > written_before
+        finally:
+            auth.close()
+        assert REGISTRY.enabled is False, "Closing the service left metrics enabled"
+        assert 'auth_accounts' not in REGISTRY.snapshot(), "The registry still references the closed store"
+        with open(textfile) as f:
+            assert 'auth_login_seconds_count' in f.read()
+        os.unlink(textfile)
+
+    def test_import_budget(self):
+        """
+        Test that startup imports defer optional and rarely used modules, and that budgets are enforced
+        """
+        assert optional_module('no_such_module_for_tests') is None
+
+        profile = import_profile(['auth.auth_service', 'config.application_settings'], runs=1)
+        assert 'auth.auth_service' in profile['modules']
+        for deferred in ('yaml', 'http.server', 'tracemalloc'):
+            assert deferred not in profile['modules'], f"{deferred} is imported at startup"
+
+        budget = {'total_ms': 10000, 'module_ms': {'auth.auth_service': 10000}, 'forbidden': ['yaml']}
+        assert check_budget(profile, budget) == []
+        violations = check_budget(profile, {'module_ms': {'auth.auth_service': 0}, 'forbidden': ['uuid']})
+        assert len(violations) == 2
+
+    def test_background_loading(self, temp_storage):
+        """
+        Test that deferred loading runs in the background and store operations wait until it ends
+        """
+        email = 'background@example.com'
+        password = 'ValidStrong5Pass!'
+        auth = AuthService(storage_path=temp_storage)
+        auth.register_account(email, password)
+        auth.close()
+
+        auth = AuthService(storage_path=temp_storage, defer_load=True)
+        try:
+            assert not auth.ready.is_set()
+            assert auth.wait_until_ready(0.01) is False
+
+            # Slow the load down so a login is made while it runs
+            load = auth.store.load
+            auth.store.load = lambda: (time.sleep(0.2), load())
+            results = []
+            auth.start_loading(results.append)
+            assert auth.login(email, password)[0] is True
+            assert auth.wait_until_ready(5) is True
+            assert results == [None]
+
+            # Loading once more reports readiness right away
+            auth.start_loading(results.append)
+            assert results == [None, None]
+        finally:
+            auth.close()
+
+        auth = AuthService(storage_path=temp_storage, defer_load=True)
+        auth.store.load = lambda: 1 / 0
+        try:
+            auth.start_loading()
+            assert auth.wait_until_ready(5) is True
+            assert isinstance(auth.load_error, ZeroDivisionError)
+            with pytest.raises(RuntimeError):
+                auth.email_exists(email)
+        finally:
+            auth.close()
+
 def main():
     """
     Run tests directly